@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # antes de abrir conexiones: cada una recibe al abrirse el execute_wrapper
+        # de la medición por petición (myblog/perf.py)
+        import myblog.perf  # noqa: F401
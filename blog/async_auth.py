@@ -0,0 +1,42 @@
+"""Usuario, ``login_required`` y ``require_POST`` para vistas ``async``.
+
+En Django 4.2 ``request.user`` es un objeto perezoso que al usarse lee la
+sesión y el usuario con el ORM síncrono, cosa que no se puede hacer desde el
+bucle de eventos, y ``login_required`` y ``require_POST`` no saben envolver
+corrutinas (llegan en Django 5: ``request.auser()`` y los decoradores async).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+from django.utils.functional import empty
+
+
+async def aget_user(request):
+    """``request.user`` ya resuelto; la primera vez lo carga en un hilo."""
+    user = request.user
+    if getattr(user, '_wrapped', None) is empty:
+        await sync_to_async(user._setup)()
+    return user
+
+
+def async_login_required(view):
+    """``login_required`` para vistas ``async``: redirige al login a los anónimos."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_require_POST(view):
+    """``require_POST`` para vistas ``async``: 405 a cualquier otro método."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view(request, *args, **kwargs)
+    return wrapper
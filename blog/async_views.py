@@ -0,0 +1,155 @@
+"""Versiones async de las rutas más usadas, para servirlas bajo ASGI.
+
+``myblog/asgi.py`` enruta con ``myblog/urls_async.py``, que cambia estas
+vistas por las de ``views.py``; bajo WSGI (la configuración por defecto)
+se siguen usando las síncronas, que no pagan el paso entre hilo y bucle de
+eventos. Las dos versiones deben comportarse igual.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+
+from . import notifications, page_cache, tasks
+from .async_auth import aget_user, async_login_required, async_require_POST
+from .forms import CommentForm, ReviewForm
+from .models import Comment, CommentVote, Post, Reaction, Subscription
+from .ratelimit import ratelimit
+
+
+# ==================== POSTS ====================
+async def post_detail(request, slug):
+    """``views.post_detail`` con las consultas de la vista por el ORM async.
+
+    La plantilla se pinta en un hilo porque sus fragmentos cacheados consultan
+    de forma perezosa (ver blog/fragments.py), igual que el POST del comentario.
+    """
+    try:
+        post = await Post.objects.aget(slug=slug, published=True)
+    except Post.DoesNotExist:
+        raise Http404('No existe el post.')
+    await page_cache.adepends(request, posts=[post.pk], authors=[post.author_id])
+    user = await aget_user(request)
+    new_comment = None
+
+    # Lo que no depende del usuario se consulta de forma perezosa desde los
+    # fragmentos cacheados de la plantilla
+    counts = post.reaction_counts
+
+    user_has_reviewed = user.is_authenticated and await post.reviews.filter(user=user).aexists()
+
+    if request.method == 'POST':
+        comment_form, response = await sync_to_async(_add_detail_comment)(request, post)
+        if response is not None:
+            return response
+    else:
+        comment_form = CommentForm()
+    review_form = ReviewForm()
+
+    # up_votes/down_votes/score son columnas materializadas (ver comment_thread_idx)
+    comments = (
+        post.comments.filter(active=True, is_approved=True)
+        .select_related('user')
+        .order_by('-pinned', '-score', 'created_date')
+    )
+
+    is_subscribed = False
+    if user.is_authenticated and user.pk != post.author_id:
+        is_subscribed = await Subscription.objects.filter(user=user, author_id=post.author_id).aexists()
+
+    return await sync_to_async(render)(request, 'blog/post_detail.html', {
+        'post': post,
+        'comments': comments,
+        'new_comment': new_comment,
+        'comment_form': comment_form,
+        'review_form': review_form,
+        'user_has_reviewed': user_has_reviewed,
+        'counts': counts,
+        'is_subscribed': is_subscribed,
+    })
+
+
+def _add_detail_comment(request, post):
+    """POST del formulario de comentario del detalle: (formulario, redirección o None)."""
+    comment_form = CommentForm(data=request.POST)
+    if not comment_form.is_valid():
+        return comment_form, None
+    new_comment = comment_form.save(commit=False)
+    new_comment.post = post
+    new_comment.save()
+    messages.success(request, '¡Tu comentario ha sido añadido exitosamente!')
+    return comment_form, redirect('blog:post_detail', slug=post.slug)
+
+
+# ==================== COMENTARIOS ====================
+@async_require_POST
+@async_login_required
+@ratelimit('toggle_vote', key='user', json=True)
+async def toggle_vote(request, comment_id, vote_type):
+    if not await Comment.objects.filter(id=comment_id).aexists():
+        raise Http404('No existe el comentario.')
+    user = request.user
+
+    value = 1 if vote_type == "up" else -1 if vote_type == "down" else None
+    if value is None:
+        return JsonResponse({"error": "Invalid vote type"}, status=400)
+
+    # Los totales de Comment se actualizan con deltas en las señales de
+    # CommentVote, dentro de la transacción de update_or_create (que bloquea el
+    # voto y guarda en _loaded_vote el valor anterior). Dos clics simultáneos
+    # pueden leer el mismo voto y dejar el segundo valor en vez de alternar,
+    # pero los totales siempre cuadran con las filas.
+    current = await (
+        CommentVote.objects.filter(comment_id=comment_id, user=user).values_list("vote", flat=True).afirst()
+    )
+    vote, _ = await CommentVote.objects.aupdate_or_create(
+        comment_id=comment_id, user=user, defaults={"vote": 0 if current == value else value}
+    )
+    totals = await Comment.objects.filter(id=comment_id).values("up_votes", "down_votes", "score").aget()
+
+    return JsonResponse({"up": totals["up_votes"], "down": totals["down_votes"], "total": totals["score"], "current": vote.vote})
+
+
+# ==================== REACCIONES ====================
+@async_require_POST
+@async_login_required
+@ratelimit('toggle_reaction', key='user', json=True)
+async def toggle_reaction(request, post_id, reaction_type):
+    reaction_fields = [Post.reaction_field(key) for key, _ in Reaction.REACTION_CHOICES]
+    try:
+        post = await Post.objects.only('id', 'author_id').aget(id=post_id)
+    except Post.DoesNotExist:
+        raise Http404('No existe el post.')
+    allowed = dict(Reaction.REACTION_CHOICES)
+    if reaction_type not in allowed:
+        return JsonResponse({"error": "Tipo de reacción inválido"}, status=400)
+    user = request.user
+
+    # Los contadores de Post se actualizan con F() desde las señales de
+    # Reaction, en la misma transacción que adelete/aupdate_or_create. Una
+    # reacción por usuario y post (unique_together): dos clics simultáneos no
+    # crean dos filas, el segundo cambia la que creó el primero.
+    existing = await Reaction.objects.filter(post_id=post.pk, user=user).afirst()
+    if existing and existing.type == reaction_type:
+        await existing.adelete()
+        action = "removed"
+    else:
+        _, created = await Reaction.objects.aupdate_or_create(
+            post_id=post.pk, user=user, defaults={"type": reaction_type}
+        )
+        action = "added" if created else "changed"
+        if created and user.pk != post.author_id:
+            # en modo "sync" la tarea usa el ORM síncrono: fuera del bucle
+            await sync_to_async(tasks.enqueue)(notifications.notify_reaction, post.pk, user.pk)
+
+    for field, value in (await Post.objects.filter(pk=post.pk).values(*reaction_fields).aget()).items():
+        setattr(post, field, value)
+    counts = post.reaction_counts
+
+    wants_html = request.headers.get("HX-Request") == "true" or request.GET.get("format") == "html"
+    if wants_html:
+        html = render_to_string("blog/_reactions_fragment.html", {"post": post, "counts": counts, "user": user})
+        return HttpResponse(html)
+
+    return JsonResponse({"status": "ok", "action": action, "counts": counts})
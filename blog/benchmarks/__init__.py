@@ -0,0 +1,19 @@
+"""Banco de pruebas de rendimiento de las vistas más usadas.
+
+* ``datagen``: datos sintéticos deterministas (usuarios, posts con HTML tipo
+  CKEditor, comentarios, votos, reacciones, reviews, etiquetas y
+  suscripciones) a la escala elegida. Comando ``bench_seed``.
+* ``micro``: cada vista a través del cliente de pruebas de Django; latencia
+  por percentiles y consultas SQL por petición. Comando ``bench_views``.
+* ``load``: carga concurrente con un pool de hilos contra un servidor en
+  marcha (``runserver``, gunicorn...). Comando ``bench_load``.
+* ``servers``: clics concurrentes contra las aplicaciones WSGI y ASGI en el
+  mismo proceso; req/s y p99 de cada una. Comando ``bench_asgi``.
+* ``results``: resultados en JSON y comparación con una línea base guardada,
+  con un umbral de regresión.
+
+Flujo habitual::
+
+    python manage.py bench_seed --scale small
+    python manage.py bench_views --output bench/views.json --baseline bench/baseline.json
+"""
@@ -0,0 +1,241 @@
+"""Datos sintéticos deterministas para los benchmarks.
+
+Con la misma semilla y escala se generan siempre los mismos usuarios, textos
+y relaciones. Todo se inserta con ``bulk_create`` (sin señales) y los
+contadores desnormalizados (reacciones, ratings, votos de comentarios) se
+calculan aquí mismo; después se indexa la búsqueda y se recalcula
+``hot_score``. Los usuarios se llaman ``benchdata-u<n>`` y ``clear()`` borra
+todo lo generado (en cascada desde ellos).
+"""
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+
+from blog import page_cache, ranking, search
+from blog.models import Comment, CommentVote, Notification, Post, Reaction, Review, Subscription
+
+PREFIX = 'benchdata-'
+# contraseña de benchdata-u0, el usuario con sesión de los benchmarks
+PASSWORD = 'bench'
+# fechas fijas: los datos no dependen del día en que se generan
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Medias por post (comments, reactions, reviews), por comentario (votes) y por usuario (subscriptions)
+SCALES = {
+    'tiny': {'users': 12, 'posts': 20, 'tags': 5, 'comments': 3, 'votes': 2, 'reactions': 4, 'reviews': 2,
+             'subscriptions': 2},
+    'small': {'users': 200, 'posts': 1_000, 'tags': 30, 'comments': 8, 'votes': 3, 'reactions': 10, 'reviews': 3,
+              'subscriptions': 5},
+    'medium': {'users': 2_000, 'posts': 10_000, 'tags': 100, 'comments': 10, 'votes': 3, 'reactions': 20,
+               'reviews': 4, 'subscriptions': 10},
+    'large': {'users': 10_000, 'posts': 100_000, 'tags': 300, 'comments': 10, 'votes': 4, 'reactions': 25,
+              'reviews': 4, 'subscriptions': 10},
+}
+
+SYLLABLES = ['ca', 'sa', 'la', 'to', 'mi', 're', 'do', 'pan', 'ver', 'dad', 'ción', 'es', 'tra', 'bo', 'li', 'que', 'na']
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_html(rng, vocabulary, paragraphs):
+    # HTML parecido al que genera CKEditor
+    blocks = []
+    for _ in range(paragraphs):
+        words = rng.choices(vocabulary, k=rng.randint(30, 80))
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] = f'<strong>{rng.choice(vocabulary)}</strong>'
+        blocks.append(f'<p>{" ".join(words)}.</p>')
+    blocks.insert(1, f'<h2>{" ".join(rng.choices(vocabulary, k=4))}</h2>')
+    if rng.random() < 0.3:
+        items = ''.join(f'<li>{" ".join(rng.choices(vocabulary, k=5))}</li>' for _ in range(rng.randint(2, 5)))
+        blocks.append(f'<ul>{items}</ul>')
+    if rng.random() < 0.2:
+        blocks.append(f'<blockquote><p>{" ".join(rng.choices(vocabulary, k=20))}</p></blockquote>')
+    return '\n'.join(blocks)
+
+
+def _around(rng, mean):
+    """Entero aleatorio con media ``mean`` y cola larga (unos pocos posts muy activos)."""
+    return min(int(rng.expovariate(1 / mean)) if mean else 0, mean * 10)
+
+
+def exists():
+    return User.objects.filter(username=f'{PREFIX}u0').exists()
+
+
+def clear():
+    """Borra todo lo generado.
+
+    Las tablas hoja (votos, reacciones, reviews, comentarios, etiquetado,
+    suscripciones) se vacían con un DELETE por tabla y sin señales: fila a
+    fila moverían contadores, ranking y caché de páginas de posts que se
+    borran igualmente. Posts y usuarios sí pasan por ``delete()``.
+    """
+    users = User.objects.filter(username__startswith=PREFIX)
+    comments = Comment.objects.filter(post__author__in=users)
+    leaves = [
+        CommentVote.objects.filter(comment__in=comments),
+        Reaction.objects.filter(post__author__in=users),
+        Review.objects.filter(post__author__in=users),
+        comments,
+        TaggedItem.objects.filter(tag__name__startswith=PREFIX),
+        Subscription.objects.filter(user__in=users),
+    ]
+    with transaction.atomic():
+        Notification.objects.filter(comment__in=comments).delete()
+        for queryset in leaves:
+            queryset._raw_delete(queryset.db)
+        Tag.objects.filter(name__startswith=PREFIX).delete()
+        users.delete()
+    page_cache.purge(extra=[page_cache.ALL_POSTS])
+
+
+def generate(scale='small', seed=42, batch_size=1000, log=None, **overrides):
+    """Genera el juego de datos. Devuelve {modelo: filas creadas}."""
+    params = {**SCALES[scale], **overrides}
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    vocabulary = make_vocabulary(rng, 3000)
+    created = Counter()
+
+    with transaction.atomic():
+        clear()
+        # misma contraseña para todos: un solo hash
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            [User(username=f'{PREFIX}u{i}', email=f'u{i}@bench.invalid', password=password)
+             for i in range(params['users'])],
+            batch_size=batch_size,
+        )
+        created['users'] = len(users)
+        tag_names = [f'{PREFIX}{word}' for word in rng.sample(vocabulary, params['tags'])]
+        Tag.objects.bulk_create([Tag(name=name, slug=slugify(name)) for name in tag_names], ignore_conflicts=True)
+        tags = list(Tag.objects.filter(name__in=tag_names).order_by('name'))
+        log(f'{len(users)} usuarios y {len(tags)} etiquetas')
+
+        # plan de interacciones por post, para escribir los contadores junto al post
+        posts, plans = [], []
+        for i in range(params['posts']):
+            author = rng.choice(users)
+            reactions = [
+                (user.pk, rng.choice(Reaction.REACTION_CHOICES)[0])
+                for user in rng.sample(users, min(_around(rng, params['reactions']), len(users)))
+            ]
+            reviews = [
+                (user.pk, rng.randint(1, 5))
+                for user in rng.sample(users, min(_around(rng, params['reviews']), len(users)))
+            ]
+            post = Post(
+                title=' '.join(rng.choices(vocabulary, k=rng.randint(3, 8))).capitalize(),
+                slug=f'{PREFIX}{i}',
+                author=author,
+                content=make_html(rng, vocabulary, rng.randint(2, 8)),
+                created_date=EPOCH - timedelta(hours=params['posts'] - i),
+                published=rng.random() < 0.95,
+                notified_at=EPOCH,
+            )
+            post.published_date = post.created_date if post.published else None
+            for kind, total in Counter(kind for _, kind in reactions).items():
+                setattr(post, Post.reaction_field(kind), total)
+            post.rating_sum = sum(rating for _, rating in reviews)
+            post.rating_count = len(reviews)
+            post.rating_score = Post.rating_score_for(post.rating_sum, post.rating_count)
+            post.render_content()
+            posts.append(post)
+            plans.append((reactions, reviews, rng.sample(tags, rng.randint(0, min(4, len(tags))))))
+        posts = Post.objects.bulk_create(posts, batch_size=batch_size)
+        created['posts'] = len(posts)
+        log(f'{len(posts)} posts')
+
+        post_type = ContentType.objects.get_for_model(Post)
+        reactions, reviews, tagged = [], [], []
+        for post, (post_reactions, post_reviews, post_tags) in zip(posts, plans):
+            reactions += [Reaction(post=post, user_id=user_id, type=kind) for user_id, kind in post_reactions]
+            reviews += [Review(post=post, user_id=user_id, rating=rating, comment=' '.join(rng.choices(vocabulary, k=8)))
+                        for user_id, rating in post_reviews]
+            tagged += [TaggedItem(content_type=post_type, object_id=post.pk, tag=tag) for tag in post_tags]
+        created['reactions'] = len(Reaction.objects.bulk_create(reactions, batch_size=batch_size))
+        created['reviews'] = len(Review.objects.bulk_create(reviews, batch_size=batch_size))
+        created['tagged_items'] = len(TaggedItem.objects.bulk_create(tagged, batch_size=batch_size))
+
+        comments, votes = [], []
+        for post in posts:
+            for _ in range(_around(rng, params['comments'])):
+                user = rng.choice(users)
+                comment = Comment(
+                    post=post, user=user, name=user.username, email=user.email,
+                    content=' '.join(rng.choices(vocabulary, k=rng.randint(5, 40))),
+                    is_approved=rng.random() < 0.9,
+                )
+                comment_votes = [
+                    (voter.pk, rng.choice((CommentVote.UP, CommentVote.UP, CommentVote.DOWN)))
+                    for voter in rng.sample(users, min(_around(rng, params['votes']), len(users)))
+                ]
+                comment.up_votes = sum(1 for _, vote in comment_votes if vote == CommentVote.UP)
+                comment.down_votes = len(comment_votes) - comment.up_votes
+                comment.score = comment.up_votes - comment.down_votes
+                comments.append(comment)
+                votes.append(comment_votes)
+        comments = Comment.objects.bulk_create(comments, batch_size=batch_size)
+        created['comments'] = len(comments)
+        created['comment_votes'] = len(CommentVote.objects.bulk_create(
+            [CommentVote(comment=comment, user_id=user_id, vote=vote, created_at=EPOCH)
+             for comment, comment_votes in zip(comments, votes) for user_id, vote in comment_votes],
+            batch_size=batch_size,
+        ))
+
+        subscriptions = set()
+        for user in users:
+            for _ in range(_around(rng, params['subscriptions'])):
+                if rng.random() < 0.7:
+                    subscriptions.add((user.pk, rng.choice(users).pk, None))
+                else:
+                    subscriptions.add((user.pk, None, rng.choice(tag_names)))
+        created['subscriptions'] = len(Subscription.objects.bulk_create(
+            [Subscription(user_id=user_id, author_id=author_id, tag=tag)
+             for user_id, author_id, tag in sorted(subscriptions, key=str) if user_id != author_id],
+            batch_size=batch_size,
+        ))
+        log(f"{created['comments']} comentarios, {created['comment_votes']} votos, "
+            f"{created['reactions']} reacciones, {created['reviews']} reviews")
+
+        backend = search.get_backend()
+        for offset in range(0, len(posts), batch_size):
+            backend.index_many([post for post in posts[offset:offset + batch_size] if post.published])
+        ranking.recompute(batch_size=batch_size)
+        log('índice de búsqueda y hot_score al día')
+    # bulk_create no pasa por las señales que purgan los listados
+    page_cache.purge(extra=[page_cache.ALL_POSTS])
+    return dict(created)
+
+
+def targets():
+    """Objetos sobre los que actúan los benchmarks (siempre los mismos para una semilla)."""
+    visible = Q(comments__active=True, comments__is_approved=True)
+    # el post con más comentarios visibles: el detalle más caro de pintar
+    post = (
+        Post.objects.filter(author__username__startswith=PREFIX, published=True)
+        .annotate(visible_comments=Count('comments', filter=visible)).order_by('-visible_comments', 'id').first()
+    )
+    comment = Comment.objects.filter(post=post, active=True, is_approved=True).order_by('id').first()
+    tag = Tag.objects.filter(name__startswith=PREFIX).order_by('name').first()
+    return {
+        'user': User.objects.get(username=f'{PREFIX}u0'),
+        'post': post,
+        'comment': comment,
+        'tag': tag,
+        'search': post.title.split()[0].lower(),
+    }
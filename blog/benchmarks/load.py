@@ -0,0 +1,129 @@
+"""Carga concurrente contra un servidor en marcha (``runserver``, gunicorn...).
+
+Cada hilo del pool abre su propia sesión HTTP (cookies y, con credenciales,
+login por el formulario con su token CSRF) y lanza peticiones elegidas al
+azar, con pesos, de una mezcla fija de rutas. La mezcla y el orden dependen
+solo de la semilla. Solo usa la biblioteca estándar.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.urls import reverse
+
+from . import results
+
+# (escenario, método, peso); los POST solo con sesión
+MIX = [
+    ('post_list', 'GET', 30),
+    ('post_detail', 'GET', 30),
+    ('search_posts', 'GET', 10),
+    ('posts_by_tag', 'GET', 10),
+    ('toggle_reaction', 'POST', 10),
+    ('toggle_vote', 'POST', 10),
+]
+
+
+def paths(targets):
+    post, comment = targets['post'], targets['comment']
+    return {
+        'post_list': reverse('blog:post_list'),
+        'post_detail': reverse('blog:post_detail', args=[post.slug]),
+        'search_posts': f"{reverse('blog:search_posts')}?{urlencode({'q': targets['search']})}",
+        'posts_by_tag': reverse('blog:posts_by_tag', args=[targets['tag'].slug]),
+        'toggle_reaction': reverse('blog:toggle_reaction', args=[post.pk, 'like']),
+        'toggle_vote': reverse('blog:vote_comment', args=[comment.pk, 'up']),
+    }
+
+
+class Session:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None):
+        url = urljoin(self.base_url, path)
+        headers = {'Referer': url}
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.csrf_token()
+        body = urlencode(data or {}).encode() if method == 'POST' else None
+        try:
+            with self.opener.open(Request(url, data=body, headers=headers, method=method), timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as exc:
+            return exc.code
+
+    def login(self, username, password):
+        path = reverse('blog:login')
+        self.request('GET', path)  # cookie csrftoken
+        self.request('POST', path, {
+            'username': username, 'password': password, 'csrfmiddlewaretoken': self.csrf_token(),
+        })
+        return any(cookie.name == 'sessionid' for cookie in self.cookies)
+
+
+def run(base_url, targets, threads=8, requests=100, credentials=None, seed=42, timeout=10, log=None):
+    """Lanza ``requests`` peticiones por hilo. Devuelve {escenario: resumen, 'total': resumen}."""
+    log = log or (lambda message: None)
+    routes = paths(targets)
+    mix = [(name, method, weight) for name, method, weight in MIX if credentials or method == 'GET']
+    lock = threading.Lock()
+    latencies, statuses = defaultdict(list), defaultdict(list)
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        session = Session(base_url, timeout)
+        try:
+            if credentials and not session.login(*credentials):
+                raise RuntimeError(f'No se pudo iniciar sesión como {credentials[0]}.')
+        except Exception:
+            barrier.abort()  # que no se queden esperando los demás
+            raise
+        choices = rng.choices(mix, weights=[weight for *_, weight in mix], k=requests)
+        local_latencies, local_statuses = defaultdict(list), defaultdict(list)
+        barrier.wait()
+        for name, method, _ in choices:
+            started = time.perf_counter()
+            try:
+                status = session.request(method, routes[name])
+            except (URLError, OSError) as exc:
+                status = f'error: {getattr(exc, "reason", exc)}'
+            local_latencies[name].append(time.perf_counter() - started)
+            local_statuses[name].append(status)
+        with lock:
+            for name in local_latencies:
+                latencies[name] += local_latencies[name]
+                statuses[name] += local_statuses[name]
+
+    log(f'{threads} hilos x {requests} peticiones contra {base_url}')
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(worker, index) for index in range(threads)]
+        errors = [future.exception() for future in futures]
+    failure = next((error for error in errors if error and not isinstance(error, threading.BrokenBarrierError)), None)
+    if failure:
+        raise failure
+    elapsed = time.perf_counter() - started
+    summary = {
+        name: results.summarize(latencies[name], statuses=statuses[name], elapsed=elapsed)
+        for name in sorted(latencies)
+    }
+    summary['total'] = results.summarize(
+        [latency for values in latencies.values() for latency in values],
+        statuses=[status for values in statuses.values() for status in values],
+        elapsed=elapsed,
+    )
+    return summary
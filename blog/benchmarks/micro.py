@@ -0,0 +1,79 @@
+"""Micro-benchmarks de las vistas a través del cliente de pruebas de Django.
+
+Cada escenario es una petición fija sobre los datos de ``datagen`` (mismo
+post, comentario y búsqueda para una semilla) y se repite ``iterations``
+veces después de ``warmup`` peticiones de calentamiento. Se mide la latencia
+de cada petición (middlewares incluidos) y sus consultas SQL con
+``myblog.perf.measure``.
+
+Los límites de peticiones, la caché de páginas para anónimos y la medición
+por petición se apagan (se mediría el límite, la caché o se llenaría
+``perf_report``); las tareas se ejecutan en línea para contarlas.
+"""
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from myblog import perf
+
+from . import results
+
+Scenario = namedtuple('Scenario', 'name method path login')
+
+
+def scenarios(targets):
+    post, comment = targets['post'], targets['comment']
+    detail = reverse('blog:post_detail', args=[post.slug])
+    search = f"{reverse('blog:search_posts')}?{urlencode({'q': targets['search']})}"
+    return [
+        Scenario('post_list', 'GET', reverse('blog:post_list'), False),
+        Scenario('post_list_page_2', 'GET', f"{reverse('blog:post_list')}?page=2", False),
+        Scenario('post_list_auth', 'GET', reverse('blog:post_list'), True),
+        Scenario('post_detail', 'GET', detail, False),
+        Scenario('post_detail_auth', 'GET', detail, True),
+        Scenario('search_posts', 'GET', search, False),
+        Scenario('posts_by_tag', 'GET', reverse('blog:posts_by_tag', args=[targets['tag'].slug]), False),
+        Scenario('trending', 'GET', reverse('blog:trending'), False),
+        Scenario('toggle_reaction', 'POST', reverse('blog:toggle_reaction', args=[post.pk, 'like']), True),
+        Scenario('toggle_vote', 'POST', reverse('blog:vote_comment', args=[comment.pk, 'up']), True),
+    ]
+
+
+def run_scenario(scenario, user, iterations, warmup):
+    client = Client()
+    if scenario.login:
+        client.force_login(user)
+    send = client.post if scenario.method == 'POST' else client.get
+    latencies, queries, statuses = [], [], []
+    for i in range(warmup + iterations):
+        with perf.measure(scenario.name) as measurement:
+            response = send(scenario.path)
+        if i >= warmup:
+            latencies.append(measurement.duration)
+            queries.append(measurement.queries)
+            statuses.append(response.status_code)
+    return results.summarize(latencies, queries, statuses)
+
+
+def run(targets, iterations=50, warmup=5, only=None, page_cache=False, log=None):
+    """{escenario: resumen} de los escenarios (``only``: nombres a ejecutar)."""
+    log = log or (lambda message: None)
+    summary = {}
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        BLOG_RATELIMITS={},
+        BLOG_PAGE_CACHE=page_cache,
+        BLOG_TASKS_BACKEND='sync',
+        BLOG_PERF=False,
+        BLOG_QUERY_BUDGET_STRICT=False,
+    ):
+        for scenario in scenarios(targets):
+            if only and scenario.name not in only:
+                continue
+            started = time.perf_counter()
+            summary[scenario.name] = run_scenario(scenario, targets['user'], iterations, warmup)
+            log(scenario.name, summary[scenario.name], time.perf_counter() - started)
+    return summary
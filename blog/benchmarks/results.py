@@ -0,0 +1,138 @@
+"""Resultados de los benchmarks en JSON y comparación con una línea base.
+
+Formato::
+
+    {"meta": {...}, "results": {"post_detail": {"p50_ms": ..., "p95_ms": ..., "queries": ...}}}
+
+``compare`` marca como regresión un percentil de latencia que empeora más
+que ``threshold`` (0.25 = un 25 %), un rendimiento (``rps``) que cae más que
+eso o cualquier consulta SQL de más.
+"""
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+from django.core.management.base import CommandError
+from django.db import connection
+
+# métrica -> cómo se compara: 'lower' (más es peor, con umbral),
+# 'higher' (menos es peor, con umbral) o 'exact' (cualquier aumento es peor)
+METRICS = {
+    'p50_ms': 'lower',
+    'p95_ms': 'lower',
+    'rps': 'higher',
+    'queries': 'exact',
+}
+
+
+# datos de meta que cambian en cada ejecución y no invalidan la comparación
+VOLATILE_META = {'created', 'revision'}
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano."""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+
+def summarize(latencies, queries=None, statuses=None, elapsed=None):
+    """Resumen de una serie de peticiones (latencias en segundos)."""
+    ms = [latency * 1000 for latency in latencies]
+    summary = {
+        'count': len(ms),
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 3) if ms else None,
+        'p95_ms': round(percentile(ms, 95), 3) if ms else None,
+        'p99_ms': round(percentile(ms, 99), 3) if ms else None,
+        'max_ms': round(max(ms), 3) if ms else None,
+    }
+    if queries is not None:
+        # la mediana: las vistas que alternan (toggle) no hacen siempre lo mismo
+        summary['queries'] = percentile(queries, 50)
+        summary['queries_max'] = max(queries) if queries else None
+    if statuses is not None:
+        summary['statuses'] = {str(status): statuses.count(status) for status in sorted(set(statuses), key=str)}
+    if elapsed:
+        summary['rps'] = round(len(ms) / elapsed, 2)
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(**extra):
+    return {
+        'created': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        **extra,
+    }
+
+
+def write(path, results, meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'meta': meta, 'results': results}, indent=2, sort_keys=True) + '\n')
+
+
+def load(path):
+    return json.loads(Path(path).read_text())
+
+
+def compare(current, baseline, threshold=0.25):
+    """Filas (escenario, métrica, base, actual, cambio relativo, ¿regresión?) de lo comparable."""
+    rows = []
+    for name, values in sorted(current.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, direction in METRICS.items():
+            old, new = base.get(metric), values.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else math.inf)
+            if direction == 'exact':
+                regression = new > old
+            elif direction == 'higher':
+                regression = change < -threshold
+            else:
+                regression = change > threshold
+            rows.append((name, metric, old, new, change, regression))
+    return rows
+
+
+def check_baseline(command, current, path, threshold, meta=None):
+    """Escribe la comparación con la línea base ``path`` en la salida de un comando
+    y lanza ``CommandError`` si hay alguna regresión."""
+    baseline = load(path)
+    rows = compare(current, baseline['results'], threshold)
+    command.stdout.write(command.style.MIGRATE_HEADING(f'Frente a {path} (umbral {threshold:.0%})'))
+    if meta is not None:
+        differ = sorted(
+            key for key in meta.keys() - VOLATILE_META
+            if baseline.get('meta', {}).get(key) != meta[key]
+        )
+        if differ:
+            command.stdout.write(command.style.WARNING(
+                f'La línea base se tomó con otra configuración ({", ".join(differ)}): la comparación orienta, no prueba.'
+            ))
+    for name, metric, old, new, change, regression in rows:
+        line = f'{name:<20} {metric:<8} {old:>10} -> {new:<10} {change:+8.1%}'
+        command.stdout.write(command.style.ERROR(f'{line} REGRESIÓN') if regression else line)
+    if any(row[-1] for row in rows):
+        raise CommandError('Hay regresiones de rendimiento frente a la línea base.')
+    command.stdout.write(command.style.SUCCESS('Sin regresiones.'))
@@ -0,0 +1,226 @@
+"""Clics concurrentes contra la aplicación WSGI y la ASGI, en el mismo proceso.
+
+Sin servidor HTTP de por medio se llama a ``WSGIHandler`` como lo haría un
+servidor WSGI con un pool de ``threads`` hilos (gunicorn ``--threads``) y a
+``BlogASGIHandler`` (con las vistas async) como lo haría un servidor ASGI con
+un solo bucle de eventos (uvicorn, daphne): son las aplicaciones de ``myblog/wsgi.py`` y
+``myblog/asgi.py`` (ASGI sin conexiones persistentes, como allí). Así se compara el modelo de concurrencia de cada uno sin
+medir el parser HTTP del servidor.
+
+``clients`` usuarios distintos (``benchdata-u<n>``, con sesión y token CSRF)
+hacen ``clicks`` peticiones seguidas cada uno, todos a la vez. La latencia
+se mide desde que el clic llega al servidor: en WSGI incluye la espera a que
+quede libre un hilo.
+
+Con SQLite la base de datos corre dentro del proceso y no hay esperas de red
+que el bucle de eventos pueda solapar; ASGI solo gana cuando las consultas
+esperan de verdad (PostgreSQL en otra máquina, ``BLOG_DB_ENGINE=postgres``). En los
+dos casos las escrituras de SQLite se hacen de una en una.
+"""
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from urllib.parse import unquote_to_bytes
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test import Client, override_settings
+from django.utils.crypto import get_random_string
+
+from myblog.handlers import BlogASGIHandler
+
+from . import datagen, load, results
+
+SERVERS = ('wsgi', 'asgi')
+# (escenario, método): los dos clics más frecuentes y la lectura del detalle
+SCENARIOS = {
+    'toggle_reaction': 'POST',
+    'toggle_vote': 'POST',
+    'post_detail': 'GET',
+}
+
+
+def sessions(count):
+    """Cabeceras (cookie de sesión y CSRF) de ``count`` usuarios de benchdata."""
+    users = list(User.objects.filter(username__startswith=datagen.PREFIX).order_by('pk')[:count])
+    headers = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        token = get_random_string(32)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}; ' \
+                 f'{settings.CSRF_COOKIE_NAME}={token}'
+        headers.append({'Cookie': cookie, 'X-CSRFToken': token})
+    return headers
+
+
+def _split(path):
+    path, _, query = path.partition('?')
+    return unquote_to_bytes(path), query
+
+
+def wsgi_request(app, method, path, headers):
+    """Una petición a la aplicación WSGI; devuelve el código de estado."""
+    path, query = _split(path)
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path.decode('iso-8859-1'),
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': '0',
+        'HTTP_HOST': 'testserver',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()},
+    }
+    status = []
+    response = app(environ, lambda line, response_headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()  # request_finished: cierra la conexión como un servidor real
+    return status[0]
+
+
+async def asgi_request(app, method, path, headers):
+    """Una petición a la aplicación ASGI; devuelve el código de estado."""
+    path, query = _split(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path.decode(),
+        'raw_path': path,
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    done = asyncio.Event()
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+@contextmanager
+def _conn_max_age(seconds):
+    """``CONN_MAX_AGE`` de las conexiones que se abran dentro del bloque."""
+    saved = {alias: config['CONN_MAX_AGE'] for alias, config in connections.settings.items()}
+    for config in connections.settings.values():
+        config['CONN_MAX_AGE'] = seconds
+    try:
+        yield
+    finally:
+        for alias, seconds in saved.items():
+            connections.settings[alias]['CONN_MAX_AGE'] = seconds
+
+
+async def _clicks(call, method, path, clients, clicks):
+    latencies, statuses = [], []
+
+    async def client(headers):
+        for _ in range(clicks):
+            started = time.perf_counter()
+            status = await call(method, path, headers)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(headers) for headers in clients))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def run_phase(server, method, path, clients, clicks, threads=8, warmup=1):
+    """Resumen de ``clicks`` peticiones por cliente contra ``server`` ('wsgi' o 'asgi')."""
+    if server == 'wsgi':
+        app = WSGIHandler()
+        pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+        async def call(method, path, headers):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, wsgi_request, app, method, path, headers)
+    else:
+        app = BlogASGIHandler()
+        pool = None
+
+        async def call(method, path, headers):
+            return await asgi_request(app, method, path, headers)
+
+    async def phase():
+        if warmup:
+            await _clicks(call, method, path, clients, warmup)
+        return await _clicks(call, method, path, clients, clicks)
+
+    try:
+        with _conn_max_age(0) if server == 'asgi' else nullcontext():
+            latencies, statuses, elapsed = asyncio.run(phase())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return results.summarize(latencies, statuses=statuses, elapsed=elapsed)
+
+
+def run(targets, scenarios=None, clients=32, clicks=20, threads=8, warmup=1, log=None):
+    """{'<escenario>:<servidor>': resumen} de cada escenario en WSGI y en ASGI.
+
+    Como en ``micro``, sin límites de peticiones ni medición por petición y con
+    las tareas en línea: se mide lo mismo en los dos modelos.
+    """
+    log = log or (lambda name, summary: None)
+    headers = sessions(clients)
+    routes = load.paths(targets)
+    summary = {}
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        DEBUG=False,
+        BLOG_RATELIMITS={},
+        BLOG_TASKS_BACKEND='sync',
+        BLOG_PERF=False,
+        BLOG_QUERY_BUDGET_STRICT=False,
+    ):
+        for scenario in scenarios or SCENARIOS:
+            for server in SERVERS:
+                name = f'{scenario}:{server}'
+                summary[name] = run_phase(
+                    server, SCENARIOS[scenario], routes[scenario], headers, clicks, threads, warmup,
+                )
+                log(name, summary[name])
+    return summary
@@ -0,0 +1,148 @@
+"""Limpieza y pre-renderizado del contenido de CKEditor.
+
+``Post.save`` pasa ``content`` por ``render()`` una sola vez y guarda el
+resultado en columnas propias, de modo que las vistas nunca vuelven a tocar el
+HTML original:
+
+* ``content_html``: HTML saneado con una lista blanca de etiquetas y atributos
+  (lo que produce CKEditor 5); ``<script>``, ``style``, manejadores ``on*`` y
+  URLs ``javascript:`` desaparecen.
+* ``content_text``: texto plano (búsqueda y feeds).
+* ``summary``: el resumen escrito por el autor o las primeras palabras.
+* ``reading_time``: minutos estimados de lectura.
+"""
+import html
+import math
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+from django.utils.text import Truncator
+
+RenderedContent = namedtuple('RenderedContent', ['html', 'text', 'summary', 'reading_time'])
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'em', 'i', 'u', 's',
+    'sub', 'sup', 'mark', 'span', 'blockquote', 'ul', 'ol', 'li', 'a', 'img', 'figure',
+    'figcaption', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption', 'pre', 'code',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class'},
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start', 'reversed'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+# Se eliminan con todo su contenido (el resto de etiquetas no permitidas se desenvuelven)
+DROP_CONTENT = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'textarea', 'select'}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Etiquetas que separan palabras en el texto plano
+BLOCK_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'ul', 'ol', 'li',
+    'figure', 'figcaption', 'table', 'tr', 'th', 'td', 'caption', 'pre', 'div',
+}
+
+SUMMARY_WORDS = 30
+WORDS_PER_MINUTE = 200
+
+_SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+
+def safe_url(value):
+    """La URL si es relativa o de un esquema permitido; si no, None."""
+    # los navegadores ignoran espacios y controles dentro de "java\tscript:"
+    compact = re.sub(r'[\x00-\x20]+', '', html.unescape(value))
+    match = _SCHEME_RE.match(compact)
+    if match and match.group(1).lower() not in ALLOWED_SCHEMES:
+        return None
+    return value.strip()
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        clean = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES:
+                value = safe_url(value)
+                if value is None:
+                    continue
+            clean.append(f' {name}="{html.escape(value)}"')
+        if tag == 'a':
+            clean.append(' rel="nofollow noopener"')
+        elif tag == 'img':
+            clean.append(' loading="lazy"')
+        self.html.append(f'<{tag}{"".join(clean)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in self.open_tags:
+            return  # cierre sin apertura
+        # cierra también lo que quedó abierto dentro
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.html.append(f'</{current}>')
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(html.escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f'</{self.open_tags.pop()}>')
+
+
+def sanitize(value):
+    """(HTML saneado, texto plano) de ``value``."""
+    parser = _Sanitizer()
+    parser.feed(value or '')
+    parser.close()
+    return ''.join(parser.html), ' '.join(''.join(parser.text).split())
+
+
+def render(content, excerpt=''):
+    content_html, content_text = sanitize(content)
+    # el resumen puede venir con HTML pegado; solo se guarda su texto
+    summary = sanitize(excerpt)[1] or Truncator(content_text).words(SUMMARY_WORDS)
+    words = len(content_text.split())
+    reading_time = max(1, math.ceil(words / WORDS_PER_MINUTE)) if words else 0
+    return RenderedContent(content_html, content_text, summary, reading_time)
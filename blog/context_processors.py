@@ -0,0 +1,9 @@
+from . import notifications
+
+
+def unread_notifications(request):
+    """``unread_count`` para la campana de base.html (cacheado por usuario)."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_count': 0}
+    return {'unread_count': notifications.unread_count(user.pk)}
@@ -0,0 +1,142 @@
+"""Feeds RSS y Atom del blog (todo el sitio, por autor y por etiqueta).
+
+Los lectores de feeds consultan cada pocos minutos, así que:
+
+* cada feed tiene un número máximo de entradas y solo lee las columnas que usa;
+* el XML se envía por partes (``StreamingHttpResponse``) mientras se genera y
+  se guarda en caché con una clave que incluye el host (los enlaces son
+  absolutos), el ``published_date`` más reciente y la generación de sus
+  dependencias en ``page_cache`` (cualquier edición de un post del feed la
+  cambia);
+* el ``ETag`` permite responder 304 a ``If-None-Match`` sin generar nada. No se
+  envía ``Last-Modified``: editar un post no cambia ninguna fecha, y un
+  ``If-Modified-Since`` devolvería 304 con el feed antiguo.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.connection import ConnectionProxy
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from . import page_cache
+from .models import Post
+
+cache = ConnectionProxy(caches, 'feeds')
+
+# Entradas por feed
+FEED_ITEMS = getattr(settings, 'BLOG_FEED_ITEMS', 20)
+TIMEOUT = getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT', 60 * 60)
+
+FEED_FIELDS = ('id', 'title', 'slug', 'summary', 'published_date', 'author__username')
+
+
+class StreamingFeedMixin:
+    """Genera el feed en trozos: cabecera, una entrada por trozo y cierre."""
+    closing_tags = None
+    item_element = None
+    latest = None
+
+    def latest_post_date(self):
+        # la cabecera se escribe antes de ver las entradas
+        return self.latest or super().latest_post_date()
+
+    def stream(self, items):
+        buffer = io.StringIO()
+        self.write(buffer, 'utf-8')
+        document = buffer.getvalue()
+        yield document[:-len(self.closing_tags)]
+
+        handler = SimplerXMLGenerator(buffer, 'utf-8', short_empty_elements=True)
+        for item in items:
+            buffer.seek(0)
+            buffer.truncate()
+            self.add_item(**item)
+            item = self.items.pop()
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield buffer.getvalue()
+
+        yield self.closing_tags
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    closing_tags = '</channel></rss>'
+    item_element = 'item'
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    closing_tags = '</feed>'
+    item_element = 'entry'
+
+
+FORMATS = {'rss': StreamingRssFeed, 'atom': StreamingAtomFeed}
+
+
+def feed_posts(**filters):
+    """Últimos posts publicados con solo las columnas que usa el feed."""
+    return (
+        Post.objects.filter(published=True, **filters)
+        .select_related('author')
+        .only(*FEED_FIELDS)
+        .order_by('-published_date', '-id')[:FEED_ITEMS]
+    )
+
+
+def _items(request, posts):
+    for post in posts.iterator():
+        link = request.build_absolute_uri(post.get_absolute_url())
+        yield {
+            'title': post.title,
+            'link': link,
+            'description': post.summary,
+            'author_name': post.author.username,
+            'pubdate': post.published_date,
+            'unique_id': link,
+        }
+
+
+def _render(feed, items, key):
+    chunks = []
+    for chunk in feed.stream(items):
+        chunks.append(chunk)
+        yield chunk
+    # solo se cachea un feed generado completo
+    cache.set(key, ''.join(chunks), TIMEOUT)
+
+
+def serve(request, posts, format, title, link, description, **dependencies):
+    """Respuesta del feed ``format`` ("rss" o "atom") con los posts de ``posts``.
+
+    ``dependencies`` son las de ``page_cache.depends`` (authors, tag_names...).
+    """
+    feed_class = FORMATS[format]
+    newest = posts.values_list('published_date', flat=True).first()
+    version = page_cache.dependency_version(**dependencies)
+    key = 'feed:' + hashlib.md5(
+        f'{format}:{request.get_host()}:{request.path}:{newest and newest.isoformat()}:{version}'.encode()
+    ).hexdigest()
+    etag = f'"{key[5:]}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = cache.get(key)
+        if content is not None:
+            response = HttpResponse(content, content_type=feed_class.content_type)
+        else:
+            feed = feed_class(
+                title=title,
+                link=request.build_absolute_uri(link),
+                description=description,
+                feed_url=request.build_absolute_uri(),
+                language='es',
+            )
+            feed.latest = newest
+            response = StreamingHttpResponse(_render(feed, _items(request, posts), key), content_type=feed_class.content_type)
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,45 @@
+"""Caché de fragmentos renderizados de post_detail.
+
+Cada fragmento se guarda bajo ``(nombre, post.id, post.version)``; como la
+versión sube con cada cambio del post, sus comentarios, reviews o reacciones,
+nunca hace falta borrar nada: las entradas viejas simplemente caducan.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+cache = ConnectionProxy(caches, 'fragments')
+
+FRAGMENTS = ('body', 'stats', 'comments', 'info')
+TIMEOUT = getattr(settings, 'BLOG_FRAGMENT_CACHE_TIMEOUT', 60 * 60)
+
+
+def cache_key(name, post):
+    return f'fragment:{name}:{post.pk}:{post.version}'
+
+
+def _stats_key(name, outcome):
+    return f'fragment-stats:{name}:{outcome}'
+
+
+def record(name, hit):
+    key = _stats_key(name, 'hit' if hit else 'miss')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:  # expiró entre add() e incr()
+            cache.set(key, 1, None)
+
+
+def stats(names=FRAGMENTS):
+    """{nombre: (aciertos, fallos)} de cada fragmento."""
+    keys = [_stats_key(name, outcome) for name in names for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    return {
+        name: (values.get(_stats_key(name, 'hit'), 0), values.get(_stats_key(name, 'miss'), 0))
+        for name in names
+    }
+
+
+def reset_stats(names=FRAGMENTS):
+    cache.delete_many([_stats_key(name, outcome) for name in names for outcome in ('hit', 'miss')])
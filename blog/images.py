@@ -0,0 +1,123 @@
+"""Derivados redimensionados de las imágenes subidas (portadas y avatares).
+
+Cuando se sube ``Post.cover`` o ``Profile.avatar`` se generan, en la cola de
+tareas, versiones WebP y JPEG de cada tamaño de ``SIZES`` (nunca más grandes
+que el original). El resultado se guarda en ``<campo>_renditions``::
+
+    {"source": "covers/foto.png", "width": 3000, "height": 2000,
+     "sizes": {"card": {"width": 800, "height": 533,
+                        "webp": "renditions/covers/foto-card.webp",
+                        "jpeg": "renditions/covers/foto-card.jpg"}, ...}}
+
+y las dimensiones del original en ``<campo>_width``/``<campo>_height`` para que
+la plantilla reserve el espacio. ``{% responsive_image %}`` (templatetags/
+responsive_images.py) pinta el ``<picture>`` con su ``srcset``.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from . import page_cache
+from .models import Post, Profile
+
+logger = logging.getLogger(__name__)
+
+# Ancho máximo de cada tamaño, por tipo de imagen
+SIZES = {
+    'cover': {'thumb': 320, 'card': 800, 'full': 1600},
+    'avatar': {'thumb': 64, 'card': 160, 'full': 400},
+}
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+QUALITY = getattr(settings, 'BLOG_IMAGE_QUALITY', 80)
+RENDITIONS_DIR = 'renditions'
+
+
+def _rendition_name(source, size, extension):
+    stem, _ = os.path.splitext(source)
+    return f'{RENDITIONS_DIR}/{stem}-{size}.{extension}'
+
+
+def build_renditions(file, sizes):
+    """Genera los derivados de ``file`` (un FieldFile) y devuelve su descripción."""
+    from PIL import Image, ImageOps
+
+    with file.open('rb') as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    # JPEG no tiene transparencia: se compone sobre blanco
+    opaque = image
+    if image.mode == 'RGBA':
+        opaque = Image.new('RGB', image.size, 'white')
+        opaque.paste(image, mask=image.getchannel('A'))
+
+    result = {'source': file.name, 'width': image.width, 'height': image.height, 'sizes': {}}
+    for size, max_width in sizes.items():
+        width = min(max_width, image.width)
+        height = max(1, round(image.height * width / image.width))
+        entry = {'width': width, 'height': height}
+        for key, (pil_format, extension) in FORMATS.items():
+            source = opaque if pil_format == 'JPEG' else image
+            resized = source if width == image.width else source.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=QUALITY, optimize=True)
+            name = _rendition_name(file.name, size, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            entry[key] = default_storage.save(name, ContentFile(buffer.getvalue()))
+        result['sizes'][size] = entry
+    return result
+
+
+def delete_renditions(renditions, keep=None):
+    """Borra los ficheros de ``renditions`` que no estén en ``keep``."""
+    kept = {name for entry in (keep or {}).get('sizes', {}).values() for name in entry.values()}
+    for entry in (renditions or {}).get('sizes', {}).values():
+        for key in FORMATS:
+            name = entry.get(key)
+            if name and name not in kept:
+                default_storage.delete(name)
+
+
+def _process(model, pk, field_name, kind):
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    file = getattr(instance, field_name)
+    old = getattr(instance, f'{field_name}_renditions')
+    renditions = {}
+    if file:
+        try:
+            renditions = build_renditions(file, SIZES[kind])
+        except (OSError, ValueError):
+            logger.warning('No se pudieron generar derivados de %s', file.name, exc_info=True)
+    # solo si el fichero no ha cambiado mientras se procesaba
+    same_file = Q(**{field_name: file.name}) if file else Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True})
+    updated = model.objects.filter(same_file, pk=pk).update(**{
+        f'{field_name}_renditions': renditions,
+        f'{field_name}_width': renditions.get('width'),
+        f'{field_name}_height': renditions.get('height'),
+    })
+    if updated:
+        delete_renditions(old, keep=renditions)
+    else:
+        delete_renditions(renditions)
+    return updated
+
+
+def process_post_cover(post_id):
+    if _process(Post, post_id, 'cover', 'cover'):
+        # la portada está dentro del fragmento "body" de post_detail
+        Post.bump_version(pk=post_id)
+        page_cache.purge(posts=[post_id])
+
+
+def process_avatar(profile_id):
+    _process(Profile, profile_id, 'avatar', 'avatar')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from blog import page_cache
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Pone published_date = created_date en los posts publicados sin fecha de publicación. '
+            'Hay que ejecutarlo antes de crear la restricción post_published_has_date en una base de datos existente.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            missing = Post.objects.filter(published=True, published_date__isnull=True)
+            rows = list(missing.values_list('id', 'author_id'))
+            if not rows:
+                self.stdout.write(self.style.SUCCESS('Ningún post publicado sin fecha.'))
+                return
+            ids = [pk for pk, _ in rows]
+            # update() no pasa por Post.save: la versión y las cachés se invalidan aquí
+            Post.objects.filter(pk__in=ids).update(published_date=F('created_date'), version=F('version') + 1)
+            tags = list(Post.tags.through.objects.filter(object_id__in=ids).values_list('tag__slug', 'tag__name'))
+
+        page_cache.purge(
+            posts=ids,
+            authors={author_id for _, author_id in rows},
+            tags=[slug for slug, _ in tags],
+            tag_names=[name for _, name in tags],
+            extra=[page_cache.ALL_POSTS],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} post(s) con published_date tomado de created_date.'))
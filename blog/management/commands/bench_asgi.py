@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarks import datagen, results, servers
+
+
+class Command(BaseCommand):
+    help = ('Compara WSGI y ASGI con clics concurrentes (toggle_reaction, toggle_vote) y lecturas de '
+            'post_detail sobre los datos de bench_seed: req/s y latencias p50/p99 de cada uno. Llama a las '
+            'aplicaciones de myblog/wsgi.py y myblog/asgi.py en el mismo proceso; para medir con servidores '
+            'reales, lanza bench_load --login contra gunicorn myblog.wsgi --threads N y contra uvicorn '
+            'myblog.asgi:application.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(servers.SCENARIOS),
+                            help='Escenario a ejecutar (se puede repetir). Por defecto, todos.')
+        parser.add_argument('--clients', type=int, default=32, help='Usuarios que hacen clic a la vez.')
+        parser.add_argument('--clicks', type=int, default=20, help='Peticiones por usuario.')
+        parser.add_argument('--threads', type=int, default=8, help='Hilos del servidor WSGI.')
+        parser.add_argument('--warmup', type=int, default=1, help='Clics de calentamiento por usuario.')
+        parser.add_argument('--output', help='Fichero JSON donde guardar los resultados.')
+        parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Empeoramiento relativo tolerado (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        if not datagen.exists():
+            raise CommandError('No hay datos de benchmark: ejecuta antes bench_seed.')
+        self.stdout.write(f"{options['clients']} usuarios x {options['clicks']} clics; "
+                          f"WSGI con {options['threads']} hilos, ASGI con un bucle de eventos")
+
+        def log(name, row):
+            self.stdout.write(
+                f"{name:<22} {row['count']:>6} peticiones  {row['rps']:>8.1f} req/s  "
+                f"p50 {row['p50_ms']:>8.2f}ms  p99 {row['p99_ms']:>8.2f}ms  {row['statuses']}"
+            )
+
+        summary = servers.run(
+            datagen.targets(), options['scenario'], options['clients'], options['clicks'],
+            options['threads'], options['warmup'], log=log,
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('ASGI frente a WSGI'))
+        for scenario in options['scenario'] or servers.SCENARIOS:
+            wsgi, asgi = summary[f'{scenario}:wsgi'], summary[f'{scenario}:asgi']
+            self.stdout.write(
+                f"{scenario:<22} req/s x{asgi['rps'] / wsgi['rps']:.2f}  "
+                f"p99 {asgi['p99_ms'] - wsgi['p99_ms']:+.2f}ms ({(asgi['p99_ms'] - wsgi['p99_ms']) / wsgi['p99_ms']:+.0%})"
+            )
+
+        meta = results.metadata(kind='asgi', clients=options['clients'], clicks=options['clicks'],
+                                threads=options['threads'])
+        if options['output']:
+            results.write(options['output'], summary, meta)
+            self.stdout.write(f"Resultados en {options['output']}")
+        if options['baseline']:
+            results.check_baseline(self, summary, options['baseline'], options['threshold'], meta)
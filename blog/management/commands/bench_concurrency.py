@@ -0,0 +1,130 @@
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from blog.models import Comment, Post, Reaction
+
+
+class Command(BaseCommand):
+    help = ('Lanza peticiones concurrentes a toggle_reaction y toggle_vote desde varios hilos '
+            'y mide el rendimiento y los errores de "database is locked" con cada perfil de '
+            'SQLite (SQLITE_PROFILES) o con la configuración actual en PostgreSQL. '
+            'Usa la base de datos configurada y borra lo que crea al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=100, help='Peticiones por hilo.')
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--profile', action='append', help='Perfiles de SQLite a comparar (por defecto todos).')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            profiles = options['profile'] or list(settings.SQLITE_PROFILES)
+            unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+            if unknown:
+                raise CommandError(f'Perfiles desconocidos: {", ".join(sorted(unknown))}')
+            if 'memory' in str(connection.settings_dict['NAME']):
+                raise CommandError('Hace falta una base de datos SQLite en fichero.')
+        else:
+            profiles = [connection.vendor]
+
+        # los 500 por "database is locked" se cuentan, no se registran
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        db_options = connections.settings['default'].setdefault('OPTIONS', {})
+        original = {option: db_options.get(option) for option in ('transaction_mode', 'pragmas')}
+        try:
+            for profile in profiles:
+                config = settings.SQLITE_PROFILES.get(profile, {})
+                if 'transaction_mode' in config:
+                    db_options['transaction_mode'] = config['transaction_mode']
+                    db_options['pragmas'] = config.get('pragmas', {})
+                # sin límites de peticiones y con las tareas en línea (también escriben)
+                with override_settings(
+                    BLOG_RATELIMITS={},
+                    BLOG_TASKS_BACKEND='sync',
+                    ALLOWED_HOSTS=['testserver'],
+                ):
+                    connections.close_all()  # PRAGMA y modo se aplican al conectar
+                    self._run(profile, options)
+                    connections.close_all()
+        finally:
+            request_logger.setLevel(level)
+            for option, value in original.items():
+                if value is None:
+                    db_options.pop(option, None)
+                else:
+                    db_options[option] = value
+
+    def _run(self, profile, options):
+        stamp = time.time_ns()
+        author = User.objects.create(username=f'bench-conc-{stamp}')
+        users = [User.objects.create(username=f'bench-conc-{stamp}-{i}') for i in range(options['threads'])]
+        posts = [
+            Post.objects.create(title=f'Concurrencia {i}', content='-', author=author, published=True)
+            for i in range(options['posts'])
+        ]
+        comments = [Comment.objects.create(post=post, user=author, content='-') for post in posts]
+        reaction_types = [key for key, _ in Reaction.REACTION_CHOICES]
+
+        results = Counter()
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(users))
+
+        def worker(user, seed):
+            rng = random.Random(seed)
+            client = Client()
+            client.force_login(user)
+            local, times = Counter(), []
+            barrier.wait()
+            for _ in range(options['requests']):
+                if rng.random() < 0.5:
+                    url = reverse('blog:toggle_reaction', args=[rng.choice(posts).pk, rng.choice(reaction_types)])
+                else:
+                    url = reverse('blog:vote_comment', args=[rng.choice(comments).pk, rng.choice(('up', 'down'))])
+                started = time.perf_counter()
+                try:
+                    response = client.post(url)
+                    local[response.status_code] += 1
+                except OperationalError as exc:
+                    local['locked' if 'locked' in str(exc) else 'db-error'] += 1
+                times.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                results.update(local)
+                latencies.extend(times)
+
+        threads = [threading.Thread(target=worker, args=(user, i)) for i, user in enumerate(users)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(results.values())
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f'[{profile}]'))
+        self.stdout.write(
+            f'  {total} peticiones en {elapsed:.2f}s ({total / elapsed:,.0f} req/s) con {len(users)} hilos; '
+            f'latencia p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms'
+        )
+        self.stdout.write(
+            f'  respuestas: {dict(sorted((str(k), v) for k, v in results.items()))}; '
+            f'"database is locked": {results["locked"]}'
+        )
+
+        User.objects.filter(pk__in=[user.pk for user in users] + [author.pk]).delete()
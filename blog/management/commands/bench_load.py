@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarks import datagen, load, results
+
+
+class Command(BaseCommand):
+    help = ('Carga concurrente con un pool de hilos contra un servidor en marcha (runserver, gunicorn...) '
+            'que use la misma base de datos con los datos de bench_seed. Con --login los hilos inician '
+            'sesión y lanzan también toggle_reaction y toggle_vote (conviene quitar BLOG_RATELIMITS en el '
+            'servidor). Guarda JSON y compara con una línea base.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=100, help='Peticiones por hilo.')
+        parser.add_argument('--login', action='store_true', help=f'Inicia sesión como {datagen.PREFIX}u0.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--output', help='Fichero JSON donde guardar los resultados.')
+        parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Empeoramiento relativo tolerado (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        if not datagen.exists():
+            raise CommandError('No hay datos de benchmark: ejecuta antes bench_seed.')
+        targets = datagen.targets()
+        credentials = (targets['user'].username, datagen.PASSWORD) if options['login'] else None
+        try:
+            summary = load.run(
+                options['url'], targets, options['threads'], options['requests'], credentials,
+                options['seed'], options['timeout'], log=self.stdout.write,
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        for name, row in summary.items():
+            line = (f"{name:<20} {row['count']:>6} peticiones  {row['rps']:>8.1f} req/s  "
+                    f"p50 {row['p50_ms']:>8.2f}ms  p95 {row['p95_ms']:>8.2f}ms  p99 {row['p99_ms']:>8.2f}ms  "
+                    f"{row['statuses']}")
+            self.stdout.write(self.style.MIGRATE_HEADING(line) if name == 'total' else line)
+
+        meta = results.metadata(kind='load', url=options['url'], threads=options['threads'],
+                                requests=options['requests'], login=options['login'])
+        if options['output']:
+            results.write(options['output'], summary, meta)
+            self.stdout.write(f"Resultados en {options['output']}")
+        if options['baseline']:
+            results.check_baseline(self, summary, options['baseline'], options['threshold'], meta)
@@ -0,0 +1,111 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from blog import ranking
+from blog.models import Post, Reaction
+
+POSTS_PER_PAGE = 10
+
+
+class Command(BaseCommand):
+    help = ('Mide el ranking de tendencias: cálculo por lotes en memoria, recompute_hot_scores '
+            'sobre la base de datos, actualización incremental y la primera página de '
+            'blog:trending frente a agregar las interacciones en cada petición. '
+            'Todo lo creado se deshace al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Reacciones sintéticas.')
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def _time(self, label, func, repeat=1):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed = (time.perf_counter() - started) / repeat
+        self.stdout.write(f'{label:<48} {elapsed * 1000:>10.2f}ms')
+        return result, elapsed
+
+    def handle(self, *args, **options):
+        rows, total_posts, batch_size = options['rows'], options['posts'], options['batch_size']
+        formula = ranking.get_formula()
+        now = timezone.now()
+        rng = random.Random(0)
+
+        # 1) solo la matemática: eventos en memoria, sin base de datos
+        events = [(rng.randrange(total_posts), now - timedelta(seconds=rng.randrange(30 * 86400))) for _ in range(rows)]
+        _, elapsed = self._time(f'accumulate() de {rows} eventos en memoria', lambda: ranking.accumulate(ranking.REACTION, events, formula))
+        self.stdout.write(f'{"":<48} {rows / elapsed:>10,.0f} eventos/s')
+        del events
+
+        with transaction.atomic():
+            self._seed(rows, total_posts, batch_size, rng, now)
+
+            # 2) recálculo completo leyendo las tablas
+            (read, _), elapsed = self._time('recompute() desde la base de datos', lambda: ranking.recompute(batch_size, formula))
+            self.stdout.write(f'{"":<48} {read / elapsed:>10,.0f} eventos/s')
+
+            # 3) coste por evento del UPDATE incremental
+            post_ids = list(Post.objects.filter(published=True).values_list('id', flat=True)[:100])
+            _, elapsed = self._time(
+                'record() incremental (100 eventos)',
+                lambda: [ranking.record(ranking.REACTION, now, 1, pk=pk) for pk in post_ids],
+            )
+
+            # 4) primera página: columna indexada frente a agregación por petición
+            self._time(
+                'primera página por hot_score (índice)',
+                lambda: list(Post.objects.filter(published=True, hot_score__isnull=False)
+                             .order_by('-hot_score', '-id').values_list('id', flat=True)[:POSTS_PER_PAGE]),
+                repeat=5,
+            )
+            self._time(
+                'primera página agregando reacciones',
+                lambda: list(Post.objects.filter(published=True).annotate(total=Count('reactions'))
+                             .order_by('-total', '-id').values_list('id', flat=True)[:POSTS_PER_PAGE]),
+                repeat=5,
+            )
+            plan = Post.objects.filter(published=True, hot_score__isnull=False).order_by('-hot_score', '-id')[:POSTS_PER_PAGE].explain()
+            self.stdout.write(f'Plan de la página de tendencias: {plan}')
+
+            transaction.set_rollback(True)
+
+    def _seed(self, rows, total_posts, batch_size, rng, now):
+        started = time.perf_counter()
+        stamp = time.time_ns()
+        author = User.objects.create(username=f'bench-ranking-{stamp}')
+        posts = Post.objects.bulk_create(
+            Post(title=f'Bench {i}', slug=f'bench-ranking-{stamp}-{i}', content='-', author=author,
+                 published=True, published_date=now - timedelta(days=rng.randrange(30)))
+            for i in range(total_posts)
+        )
+        # (post, usuario, tipo) es único: hacen falta usuarios suficientes
+        types = [choice for choice, _ in Reaction.REACTION_CHOICES]
+        users_needed = -(-rows // (total_posts * len(types)))
+        users = User.objects.bulk_create(User(username=f'bench-ranking-{stamp}-{i}') for i in range(users_needed))
+
+        def reactions():
+            created = 0
+            for user in users:
+                for post in posts:
+                    for kind in types:
+                        if created == rows:
+                            return
+                        created += 1
+                        yield Reaction(post=post, user=user, type=kind)
+
+        batch = []
+        for reaction in reactions():
+            batch.append(reaction)
+            if len(batch) == batch_size:
+                Reaction.objects.bulk_create(batch)
+                batch = []
+        Reaction.objects.bulk_create(batch)
+        self.stdout.write(f'Datos: {total_posts} posts y {rows} reacciones en {time.perf_counter() - started:.1f}s')
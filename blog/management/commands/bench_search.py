@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+
+from blog import search
+from blog.benchmarks.datagen import make_html, make_vocabulary
+from blog.models import Post
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = ('Compara el índice de búsqueda con el antiguo filtro icontains sobre un corpus sintético. '
+            'Todo se hace dentro de una transacción que se deshace al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--backend', choices=sorted(search.BACKENDS))
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        backend = search.BACKENDS[options['backend']]() if options['backend'] else search.get_backend()
+        vocabulary = make_vocabulary(rng, 5000)
+
+        with transaction.atomic():
+            author = User.objects.create(username=f'bench-search-{rng.random()}')
+            now = timezone.now()
+            started = time.perf_counter()
+            for offset in range(0, options['posts'], options['batch_size']):
+                posts = [
+                    Post(
+                        title=' '.join(rng.choices(vocabulary, k=rng.randint(3, 8))).capitalize(),
+                        slug=f'bench-search-{i}',
+                        author=author,
+                        content=make_html(rng, vocabulary, rng.randint(2, 6)),
+                        published=True,
+                        published_date=now,
+                    )
+                    for i in range(offset, min(offset + options['batch_size'], options['posts']))
+                ]
+                for post in posts:
+                    post.render_content()
+                posts = Post.objects.bulk_create(posts)
+                # como rebuild_search_index: una consulta de etiquetas por lote, no por post
+                prefetch_related_objects(posts, 'tags')
+                backend.index_many(posts)
+            self.stdout.write(f'Corpus: {options["posts"]} posts generados e indexados en '
+                              f'{time.perf_counter() - started:.1f}s (backend "{backend.name}")')
+
+            queries = [' '.join(rng.sample(vocabulary, rng.choice([1, 1, 2]))) for _ in range(options['queries'])]
+            results = {'icontains': [], backend.name: []}
+            for query in queries:
+                started = time.perf_counter()
+                # lo que hacía search_posts: COUNT del Paginator + primera página
+                qs = Post.objects.filter(published=True).filter(Q(title__icontains=query) | Q(content__icontains=query))
+                qs.count()
+                list(qs[:10])
+                results['icontains'].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                backend.search(query)
+                results[backend.name].append(time.perf_counter() - started)
+
+            for name, timings in results.items():
+                self.stdout.write(
+                    f'{name:>10}: p50={statistics.median(timings) * 1000:.1f}ms '
+                    f'p95={percentile(timings, 95) * 1000:.1f}ms max={max(timings) * 1000:.1f}ms'
+                )
+            transaction.set_rollback(True)
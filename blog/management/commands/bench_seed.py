@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.benchmarks import datagen
+
+
+class Command(BaseCommand):
+    help = ('Genera (o borra con --clear) los datos sintéticos deterministas de bench_views y bench_load '
+            'en la base de datos configurada. Sustituye los generados antes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(datagen.SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true', help='Solo borra los datos generados.')
+        for name in datagen.SCALES['small']:
+            parser.add_argument(f'--{name}', type=int, help=f'Sustituye "{name}" de la escala elegida.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            datagen.clear()
+            self.stdout.write(self.style.SUCCESS('Datos de benchmark borrados.'))
+            return
+        overrides = {name: options[name] for name in datagen.SCALES['small'] if options[name] is not None}
+        started = time.perf_counter()
+        created = datagen.generate(
+            options['scale'], options['seed'], options['batch_size'],
+            log=lambda message: self.stdout.write(f'  {message}'), **overrides,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Escala "{options["scale"]}" (semilla {options["seed"]}) generada en '
+            f'{time.perf_counter() - started:.1f}s: ' + ', '.join(f'{k}={v}' for k, v in created.items())
+        ))
@@ -0,0 +1,71 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from blog.models import Post
+
+
+def legacy_slug(title):
+    # el bucle que usaba Post.save antes del contador por base
+    slug = original = slugify(title)
+    counter = 1
+    while Post.objects.filter(slug=slug).exists():
+        slug = f'{original}-{counter}'
+        counter += 1
+    return slug
+
+
+class QueryCounter:
+    """Cuenta consultas con execute_wrapper (sin el límite del log de DEBUG)."""
+
+    def __init__(self, table=None):
+        self.table = table
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.table is None or self.table in sql:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Crea muchos posts con el mismo título y mide el coste de generar el slug, '
+            'comparado con el bucle anterior. Todo se deshace al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--title', default='Mismo título para todos')
+
+    def handle(self, *args, **options):
+        total, title = options['posts'], options['title']
+        step = max(1, total // 10)
+
+        with transaction.atomic():
+            author = User.objects.create(username=f'bench-slugs-{time.time_ns()}')
+            started = last = time.perf_counter()
+            for i in range(1, total + 1):
+                Post.objects.create(title=title, content='-', author=author)
+                if i % step == 0:
+                    now = time.perf_counter()
+                    self.stdout.write(f'{i:>7} posts: {(now - last) / step * 1000:.2f}ms/post')
+                    last = now
+            self.stdout.write(f'Total: {time.perf_counter() - started:.1f}s para {total} posts')
+
+            post = Post(title=title, content='-', author=author)
+            counter = QueryCounter('blog_slugcounter')
+            with connection.execute_wrapper(counter):
+                post.save()
+            self.stdout.write(f'Post {total + 1}: {counter.count} consultas para el slug "{post.slug}"')
+
+            started = time.perf_counter()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                slug = legacy_slug(title)
+            self.stdout.write(
+                f'Bucle anterior para el mismo post: {counter.count} consultas, '
+                f'{(time.perf_counter() - started) * 1000:.1f}ms (slug "{slug}")'
+            )
+            transaction.set_rollback(True)
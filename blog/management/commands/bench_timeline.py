@@ -0,0 +1,101 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import timeline
+from blog.models import Post, Subscription
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Crea un autor con N suscriptores, mide el fan-out de un post a sus portadas '
+            'y compara la lectura de la portada (filas copiadas y fan-out en lectura) con '
+            'la consulta OR sobre los posts. Todo se deshace al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=10_000)
+        parser.add_argument('--posts', type=int, default=2_000, help='Posts de relleno de otros autores.')
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+        cache.delete_many([f'timeline:popular:{limit}' for limit in self.limits])
+
+    def _time(self, func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
+
+    def _run(self, options):
+        stamp = time.time_ns()
+        count = options['subscribers']
+        # límites con los que se cachean las fuentes populares; se limpian al terminar
+        self.limits = (count + 1, count - 1)
+        cache.delete_many([f'timeline:popular:{limit}' for limit in self.limits])
+        author = User.objects.create(username=f'bench-tl-{stamp}')
+        others = User.objects.bulk_create([User(username=f'bench-tl-{stamp}-o{i}') for i in range(20)])
+        users = [user.pk for user in User.objects.bulk_create(
+            [User(username=f'bench-tl-{stamp}-{i}') for i in range(count)], batch_size=1000)]
+        Subscription.objects.bulk_create([Subscription(user_id=user_id, author=author) for user_id in users],
+                                         batch_size=1000)
+        reader = users[0]
+        Subscription.objects.bulk_create([Subscription(user_id=reader, author=other) for other in others[:5]])
+
+        now = timezone.now()
+        Post.objects.bulk_create([
+            Post(title=f'Relleno {i}', slug=f'bench-tl-{stamp}-{i}', content='-', author=others[i % len(others)],
+                 published=True, published_date=now - timezone.timedelta(minutes=i))
+            for i in range(options['posts'])
+        ], batch_size=500)
+        for post in Post.objects.filter(author__in=others[:5]).only('id', 'author_id', 'published_date'):
+            timeline._copy(Subscription.objects.filter(author_id=post.author_id), post)
+
+        # borrador publicado con update(): sin señales, el fan-out se mide aparte
+        post = Post.objects.create(title='Fan-out', content='-', author=author)
+        Post.objects.filter(pk=post.pk).update(published=True, published_date=now)
+        with override_settings(BLOG_TIMELINE_FANOUT_LIMIT=count + 1):
+            started = time.perf_counter()
+            copied = timeline.fan_out(post.pk)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Fan-out a {count:,} suscriptores'))
+        self.stdout.write(f'  {copied:,} filas en {elapsed:.2f}s ({copied / elapsed:,.0f} filas/s)')
+
+        per_page, repeat = options['per_page'], options['repeat']
+        reader_user = User.objects.get(pk=reader)
+        followed = list(Subscription.objects.filter(user=reader_user, author__isnull=False).values_list('author', flat=True))
+
+        def naive():
+            list(Post.objects.listing().filter(Q(author__in=followed)).distinct()
+                 .order_by('-published_date', '-id')[:per_page])
+
+        def page(limit):
+            with override_settings(BLOG_TIMELINE_FANOUT_LIMIT=limit):
+                list(timeline.TimelinePaginator(reader_user, per_page).get_page({}))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Primera página ({per_page} posts, mejor de {repeat})'))
+        self.stdout.write(f'  consulta OR sobre posts: {self._time(naive, repeat):.2f}ms')
+        self.stdout.write(f'  filas copiadas:          {self._time(lambda: page(count + 1), repeat):.2f}ms')
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            page(count - 1)
+        self.stdout.write(f'  fan-out en lectura:      {self._time(lambda: page(count - 1), repeat):.2f}ms '
+                          f'({len(queries)} consultas, autor popular leído de su índice)')
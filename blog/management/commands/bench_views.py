@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarks import datagen, micro, results
+
+
+class Command(BaseCommand):
+    help = ('Micro-benchmarks de post_list, post_detail, search_posts, toggle_reaction, toggle_vote... '
+            'con el cliente de pruebas sobre los datos de bench_seed: percentiles de latencia y '
+            'consultas SQL por petición. Guarda JSON y compara con una línea base.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', help='Solo estos escenarios (se puede repetir).')
+        parser.add_argument('--page-cache', action='store_true', help='Con la caché de páginas para anónimos.')
+        parser.add_argument('--output', help='Fichero JSON donde guardar los resultados.')
+        parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Empeoramiento relativo de latencia tolerado (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        if not datagen.exists():
+            raise CommandError('No hay datos de benchmark: ejecuta antes bench_seed.')
+        targets = datagen.targets()
+
+        def log(name, summary, elapsed):
+            self.stdout.write(
+                f"{name:<20} p50 {summary['p50_ms']:>8.2f}ms  p95 {summary['p95_ms']:>8.2f}ms  "
+                f"p99 {summary['p99_ms']:>8.2f}ms  consultas {summary['queries']:>3} (máx {summary['queries_max']})  "
+                f"{summary['statuses']}"
+            )
+
+        summary = micro.run(targets, options['iterations'], options['warmup'], options['scenario'],
+                            options['page_cache'], log=log)
+        meta = results.metadata(kind='views', iterations=options['iterations'], warmup=options['warmup'],
+                                page_cache=options['page_cache'])
+        if options['output']:
+            results.write(options['output'], summary, meta)
+            self.stdout.write(f"Resultados en {options['output']}")
+        if options['baseline']:
+            results.check_baseline(self, summary, options['baseline'], options['threshold'], meta)
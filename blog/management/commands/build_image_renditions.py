@@ -0,0 +1,75 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from blog import images
+from blog.models import Post, Profile
+
+TARGETS = {
+    'covers': (Post, 'cover', images.process_post_cover),
+    'avatars': (Profile, 'avatar', images.process_avatar),
+}
+
+
+def _run(process, pk):
+    try:
+        process(pk)
+    finally:
+        # cada hilo del pool abre su propia conexión
+        connection.close()
+
+
+class InlineExecutor:
+    """Con --workers 1 todo se procesa en el hilo principal."""
+
+    def submit(self, func, process, pk):
+        future = Future()
+        process(pk)
+        future.set_result(None)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Command(BaseCommand):
+    help = ('Genera en paralelo los derivados (WebP/JPEG por tamaño) de las portadas y avatares '
+            'que aún no los tienen.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+        parser.add_argument('--only', choices=sorted(TARGETS))
+        parser.add_argument('--force', action='store_true', help='Regenerar también los que ya tienen derivados.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names = [options['only']] if options['only'] else sorted(TARGETS)
+        total = 0
+        workers = options['workers']
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else InlineExecutor()
+        with executor:
+            for name in names:
+                model, field, process = TARGETS[name]
+                pending = model.objects.exclude(Q(**{field: ''}) | Q(**{f'{field}__isnull': True}))
+                if not options['force']:
+                    pending = pending.filter(**{f'{field}_renditions': {}})
+                futures = [
+                    executor.submit(_run, process, pk)
+                    for pk in pending.values_list('pk', flat=True).iterator()
+                ]
+                for future in as_completed(futures):
+                    future.result()
+                total += len(futures)
+                self.stdout.write(f'{name}: {len(futures)} imagen(es) procesadas')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} imagen(es) en {elapsed:.1f}s con {options["workers"]} worker(s).'
+        ))
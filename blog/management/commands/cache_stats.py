@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from myblog.cache import TieredCache
+
+
+class Command(BaseCommand):
+    help = ('Aciertos (en memoria local y en la caché compartida), fallos y valores viejos '
+            'servidos por espacio de nombres de cada caché TieredCache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', help='Solo estos alias (se puede repetir).')
+        parser.add_argument('--reset', action='store_true', help='Pone los contadores a cero después de mostrarlos.')
+
+    def handle(self, *args, **options):
+        aliases = options['alias'] or list(settings.CACHES)
+        tiered = [alias for alias in aliases if isinstance(caches[alias], TieredCache)]
+        if options['alias'] and len(tiered) != len(aliases):
+            raise CommandError('Solo se pueden consultar alias con el backend myblog.cache.TieredCache.')
+        if not tiered:
+            self.stdout.write('No hay cachés TieredCache configuradas.')
+            return
+
+        for alias in tiered:
+            cache = caches[alias]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'[{alias}]'))
+            stats = cache.stats()
+            if not stats:
+                self.stdout.write('  sin datos')
+            for namespace, counts in sorted(stats.items()):
+                hits = counts['local'] + counts['shared']
+                total = hits + counts['miss']
+                rate = f'{hits / total:.1%}' if total else '-'
+                self.stdout.write(
+                    f"  {namespace:<16} local {counts['local']:>8}  compartida {counts['shared']:>8}  "
+                    f"fallos {counts['miss']:>8}  viejos {counts['stale']:>6}  tasa de acierto {rate}"
+                )
+            if options['reset']:
+                cache.reset_stats()
+        if options['reset']:
+            self.stdout.write(self.style.SUCCESS('Contadores reiniciados.'))
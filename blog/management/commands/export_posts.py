@@ -0,0 +1,35 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.transfer import export_records, write_jsonl
+
+
+class Command(BaseCommand):
+    help = 'Exporta los posts (con etiquetas, comentarios, reviews y reacciones) a JSONL, una línea por post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help='Fichero de salida ("-" = stdout, .gz comprimido).')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--published', action='store_true', help='Solo posts publicados.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.filter(published=True) if options['published'] else Post.objects.all()
+        records = export_records(queryset, chunk_size=options['chunk_size'])
+        started = time.perf_counter()
+
+        output = options['output']
+        if output == '-':
+            write_jsonl(records, sys.stdout)
+            return
+        opener = gzip.open if output.endswith('.gz') else open
+        with opener(output, 'wt', encoding='utf-8') as stream:
+            total = write_jsonl(records, stream)
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'{total} post(s) exportados en {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} posts/s).'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from blog import fragments
+
+
+class Command(BaseCommand):
+    help = 'Muestra aciertos y fallos de la caché de fragmentos de post_detail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Pone los contadores a cero después de mostrarlos.')
+
+    def handle(self, *args, **options):
+        for name, (hits, misses) in fragments.stats().items():
+            total = hits + misses
+            rate = f'{hits / total:.1%}' if total else '-'
+            self.stdout.write(f'{name:>10}: {hits} aciertos, {misses} fallos, tasa de acierto {rate}')
+        if options['reset']:
+            fragments.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Contadores reiniciados.'))
@@ -0,0 +1,49 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import PostImporter, read_jsonl
+
+
+class Command(BaseCommand):
+    help = ('Importa posts desde JSONL (el formato de export_posts) con inserciones por lotes. '
+            'Los posts cuyo slug ya existe se saltan.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Fichero JSONL ("-" = stdin, .gz comprimido).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--create-users', action='store_true', help='Crear los usuarios que no existan.')
+        parser.add_argument('--no-index', action='store_true', help='No indexar (usar después rebuild_search_index).')
+
+    def handle(self, *args, **options):
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            create_users=options['create_users'],
+            index=not options['no_index'],
+        )
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{stats.posts} posts, {stats.rows} filas ({stats.rows / max(elapsed, 1e-9):.0f} filas/s)')
+
+        path = options['input']
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            if path == '-':
+                stats = importer.run(read_jsonl(sys.stdin), progress)
+            else:
+                with opener(path, 'rt', encoding='utf-8') as stream:
+                    stats = importer.run(read_jsonl(stream), progress)
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'No se pudo importar: {exc}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats.posts} post(s), {stats.comments} comentario(s), {stats.reviews} review(s), '
+            f'{stats.reactions} reacción(es) y {stats.tags} etiqueta(s) en {elapsed:.1f}s '
+            f'({stats.rows / max(elapsed, 1e-9):.0f} filas/s). Saltados: {stats.skipped}. '
+            f'Usuarios creados: {stats.users_created}.'
+        ))
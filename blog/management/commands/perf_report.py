@@ -0,0 +1,53 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myblog import perf
+
+
+class Command(BaseCommand):
+    help = ('Percentiles de tiempo, consultas SQL, plantillas y acierto de caché por vista, '
+            'sobre las últimas BLOG_PERF_WINDOW peticiones de todos los procesos '
+            '(PerformanceMiddleware).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', action='append', help='Solo estas vistas (p.ej. blog:post_detail).')
+        parser.add_argument('--sort', default='p95_ms', help='Columna por la que ordenar (por defecto p95_ms).')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON.')
+        parser.add_argument('--reset', action='store_true', help='Vacía las ventanas después de mostrarlas.')
+
+    def handle(self, *args, **options):
+        windows = perf.window.samples()
+        if options['view']:
+            windows = {name: samples for name, samples in windows.items() if name in options['view']}
+        budgets = getattr(settings, 'BLOG_QUERY_BUDGETS', {})
+        report = {
+            name: {**perf.summary(samples), 'budget': budgets.get(name)}
+            for name, samples in windows.items() if samples
+        }
+        rows = sorted(report.items(), key=lambda item: item[1][options['sort']] or 0, reverse=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(dict(rows), indent=2))
+        elif not rows:
+            self.stdout.write('Sin datos.')
+        else:
+            self.stdout.write(
+                f"{'vista':<32} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'bd p95':>8} "
+                f"{'tpl p95':>8} {'cons.':>6} {'máx':>5} {'ppto':>5} {'caché':>6}"
+            )
+            for name, row in rows:
+                over = row['budget'] is not None and row['queries_max'] > row['budget']
+                rate = f"{row['cache_hit_rate']:.0%}" if row['cache_hit_rate'] is not None else '-'
+                line = (
+                    f"{name:<32} {row['count']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                    f"{row['db_p95_ms']:>8.1f} {row['template_p95_ms']:>8.1f} {row['queries_p50']:>6} "
+                    f"{row['queries_max']:>5} {row['budget'] if row['budget'] is not None else '-':>5} {rate:>6}"
+                )
+                self.stdout.write(self.style.WARNING(line) if over else line)
+            self.stdout.write('Tiempos en ms; "cons." es la mediana de consultas y "máx" el máximo.')
+
+        if options['reset']:
+            perf.window.reset()
+            self.stdout.write(self.style.SUCCESS('Ventanas vaciadas.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from blog.models import Post, Review
+
+FIELDS = ('rating_sum', 'rating_count', 'rating_score')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula rating_sum, rating_count y rating_score de cada post a partir de la tabla Review.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        totals = {
+            row['post_id']: (row['total'], row['count'])
+            for row in Review.objects.values('post_id').annotate(total=Sum('rating'), count=Count('id')).order_by()
+        }
+
+        fixed = []
+        for post in Post.objects.only('id', *FIELDS).iterator(chunk_size=batch_size):
+            rating_sum, rating_count = totals.get(post.id, (0, 0))
+            rating_score = Post.rating_score_for(rating_sum, rating_count)
+            if (post.rating_sum, post.rating_count) != (rating_sum, rating_count) or abs(post.rating_score - rating_score) > 1e-9:
+                post.rating_sum, post.rating_count, post.rating_score = rating_sum, rating_count, rating_score
+                fixed.append(post)
+
+        Post.objects.bulk_update(fixed, FIELDS, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} post(s) con ratings corregidos.'))
@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from blog.models import Post, Reaction
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de reacciones de cada post a partir de la tabla Reaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        keys = [key for key, _ in Reaction.REACTION_CHOICES]
+        fields = [Post.reaction_field(key) for key in keys]
+
+        totals = defaultdict(dict)
+        rows = Reaction.objects.values('post_id', 'type').annotate(total=Count('id')).order_by()
+        for row in rows:
+            totals[row['post_id']][row['type']] = row['total']
+
+        fixed = []
+        for post in Post.objects.only('id', *fields).iterator(chunk_size=batch_size):
+            expected = totals.get(post.id, {})
+            changed = False
+            for key in keys:
+                field = Post.reaction_field(key)
+                if getattr(post, field) != expected.get(key, 0):
+                    setattr(post, field, expected.get(key, 0))
+                    changed = True
+            if changed:
+                fixed.append(post)
+
+        Post.objects.bulk_update(fixed, fields, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} post(s) con contadores corregidos.'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero el índice de búsqueda de los posts publicados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--backend', choices=sorted(search.BACKENDS), help='Forzar un backend concreto.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = search.BACKENDS[options['backend']]() if options['backend'] else search.get_backend()
+        started = time.perf_counter()
+
+        backend.clear()
+        posts = Post.objects.filter(published=True).prefetch_related('tags').order_by('pk')
+        batch, total = [], 0
+        for post in posts.iterator(chunk_size=batch_size):
+            batch.append(post)
+            if len(batch) >= batch_size:
+                backend.index_many(batch)
+                total += len(batch)
+                batch = []
+        backend.index_many(batch)
+        total += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} post(s) indexados con el backend "{backend.name}" en {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import ranking
+
+
+class Command(BaseCommand):
+    help = 'Recalcula hot_score (tendencias) de cada post a partir de reacciones, comentarios, reviews y votos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        events, fixed = ranking.recompute(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        rate = events / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{events} eventos en {elapsed:.2f}s ({rate:,.0f} eventos/s); {fixed} post(s) corregidos.'
+        ))
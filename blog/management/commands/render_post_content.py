@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import page_cache, search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Recalcula content_html, content_text, summary y reading_time de todos los posts '
+            '(p. ej. tras cambiar las reglas de blog/content.py) y reindexa los publicados.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--no-index', action='store_true', help='No actualizar el índice de búsqueda.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = None if options['no_index'] else search.get_backend()
+        started = time.perf_counter()
+
+        posts = Post.objects.only('id', 'title', 'content', 'excerpt', 'published', *Post.RENDERED_FIELDS)
+        batch, total = [], 0
+        for post in posts.order_by('pk').iterator(chunk_size=batch_size):
+            post.render_content()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                total += self._flush(batch, backend)
+                batch = []
+        total += self._flush(batch, backend)
+        page_cache.purge(extra=[page_cache.ALL_POSTS])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'{total} post(s) renderizados en {elapsed:.1f}s.'))
+
+    def _flush(self, batch, backend):
+        # bulk_update no pasa por save() ni por las señales: se invalidan aquí
+        ids = [post.pk for post in batch]
+        Post.objects.bulk_update(batch, Post.RENDERED_FIELDS)
+        Post.bump_version(pk__in=ids)
+        page_cache.purge(posts=ids)
+        if backend is not None:
+            published = [post.pk for post in batch if post.published]
+            backend.index_many(Post.objects.filter(pk__in=published).prefetch_related('tags'))
+        return len(batch)
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -8,7 +10,27 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from taggit.managers import TaggableManager
 from django_ckeditor_5.fields import CKEditor5Field
 from django.conf import settings
-from django.utils.text import slugify
+
+class PostQuerySet(models.QuerySet):
+    def listing(self):
+        """Posts publicados para listados y feeds, sin consultas N+1 en las tarjetas."""
+        approved_comments = (
+            Comment.objects.filter(post=OuterRef('pk'), active=True, is_approved=True)
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return (
+            self.filter(published=True)
+            .select_related('author', 'author__profile')
+            .prefetch_related('tags')
+            # las tarjetas usan summary; el cuerpo completo solo hace falta en post_detail
+            .defer('content', 'content_html', 'content_text')
+            .annotate(approved_comment_count=Coalesce(Subquery(approved_comments), Value(0)))
+            .order_by('-published_date', '-id')
+        )
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200, verbose_name='Título')
@@ -19,15 +41,103 @@ class Post(models.Model):
     content = CKEditor5Field('Contenido') # <-- reemplaza TextField por RichTextField
     #"Se agrega cover para subir imagen de portada."
     cover = models.ImageField(upload_to='covers/', null=True, blank=True, verbose_name='Imagen de portada') 
+    # Dimensiones y derivados redimensionados de la portada (ver blog/images.py)
+    cover_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
     excerpt = models.TextField(max_length=300, blank=True, verbose_name='Resumen')
+    # Versión pre-renderizada de content, calculada en save() (ver blog/content.py)
+    content_html = models.TextField(blank=True, editable=False)
+    content_text = models.TextField(blank=True, editable=False)
+    summary = models.TextField(blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)
     created_date = models.DateTimeField(default=timezone.now, verbose_name='Fecha de creación')
     published_date = models.DateTimeField(blank=True, null=True, verbose_name='Fecha de publicación')
     published = models.BooleanField(default=False, verbose_name='Publicado')
     tags = TaggableManager(blank=True, verbose_name='Etiquetas')
+
+    # Contadores desnormalizados de reacciones (uno por tipo en Reaction.REACTION_CHOICES)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    love_count = models.PositiveIntegerField(default=0, editable=False)
+    haha_count = models.PositiveIntegerField(default=0, editable=False)
+    wow_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Agregados de Review mantenidos con F() en las señales; rating_score es la
+    # media bayesiana (ver rating_score_for) para ordenar "mejor valorados"
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_score = models.FloatField(default=0, editable=False)
+
+    # Puntuación de tendencias en escala log2 (ver blog/ranking.py); None sin publicar
+    hot_score = models.FloatField(null=True, blank=True, editable=False)
+
+    # Momento en que se avisó a los suscriptores de la publicación (una sola vez,
+    # ver blog/notifications.py:notify_subscribers)
+    notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Versión del contenido renderizado: sube con cada cambio del post o de sus
+    # comentarios, reviews y reacciones (clave de la caché de fragmentos)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Columnas mantenidas con F(); save() nunca las escribe con valores viejos
+    COUNTER_FIELDS = (
+        'like_count', 'love_count', 'haha_count', 'wow_count',
+        'rating_sum', 'rating_count', 'rating_score', 'hot_score',
+    )
+
+    # Prior de la media bayesiana: cuántas reviews "virtuales" y con qué nota
+    RATING_PRIOR_COUNT = 5
+    RATING_PRIOR_MEAN = 3.0
+
+    # Columnas que escriben los workers (imágenes, avisos); save() tampoco las pisa
+    DERIVED_FIELDS = ('cover_width', 'cover_height', 'cover_renditions', 'notified_at')
+
+    # Columnas que se recalculan a partir de content y excerpt
+    RENDERED_FIELDS = ('content_html', 'content_text', 'summary', 'reading_time')
+
+    # Reintentos si el slug generado choca con la restricción unique
+    SLUG_RETRIES = 5
+
     class Meta:
         ordering = ['-created_date']
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
+        indexes = [
+            # listados públicos: published=True ORDER BY -published_date, -id
+            models.Index(fields=['published', '-published_date', '-id'], name='post_publication_idx'),
+            models.Index(
+                fields=['-published_date', '-id'],
+                condition=models.Q(published=True),
+                name='post_timeline_idx',
+            ),
+            models.Index(
+                fields=['author', '-published_date', '-id'],
+                condition=models.Q(published=True),
+                name='post_author_timeline_idx',
+            ),
+            # trending: ORDER BY -hot_score, -id
+            models.Index(
+                fields=['-hot_score', '-id'],
+                condition=models.Q(published=True),
+                name='post_hot_idx',
+            ),
+            # top_rated: ORDER BY -rating_score, -id sin agregar reviews
+            models.Index(
+                fields=['-rating_score', '-id'],
+                condition=models.Q(published=True),
+                name='post_top_rated_idx',
+            ),
+        ]
+        constraints = [
+            # en una base de datos existente, antes de crearla:
+            # manage.py backfill_published_dates
+            models.CheckConstraint(
+                check=models.Q(published=False) | models.Q(published_date__isnull=False),
+                name='post_published_has_date',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -35,22 +145,150 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
 
+    @staticmethod
+    def reaction_field(reaction_type):
+        return f'{reaction_type}_count'
+
+    @property
+    def reaction_counts(self):
+        """Contadores por tipo de reacción, sin consultas extra."""
+        return {key: getattr(self, self.reaction_field(key)) for key, _ in Reaction.REACTION_CHOICES}
+
+    @classmethod
+    def bump_reaction(cls, post_id, reaction_type, delta):
+        """Incrementa (o decrementa) de forma atómica el contador de un tipo de reacción."""
+        field = cls.reaction_field(reaction_type)
+        cls.objects.filter(pk=post_id).update(
+            **{field: Greatest(F(field) + delta, Value(0))},
+            version=F('version') + 1,
+        )
+
+    @classmethod
+    def rating_score_for(cls, rating_sum, rating_count):
+        """Media bayesiana: pocas reviews pesan poco frente al prior."""
+        if not rating_count:
+            return 0.0
+        prior = cls.RATING_PRIOR_COUNT
+        return (prior * cls.RATING_PRIOR_MEAN + rating_sum) / (prior + rating_count)
+
+    @classmethod
+    def bump_rating(cls, post_id, rating_delta, count_delta):
+        """Aplica de forma atómica una review nueva, editada o borrada."""
+        rating_sum = F('rating_sum') + rating_delta
+        rating_count = F('rating_count') + count_delta
+        prior = cls.RATING_PRIOR_COUNT
+        score = Case(
+            When(rating_count__lte=-count_delta, then=Value(0.0)),
+            default=ExpressionWrapper(
+                (Value(prior * cls.RATING_PRIOR_MEAN) + rating_sum) / (Value(float(prior)) + rating_count),
+                output_field=models.FloatField(),
+            ),
+        )
+        # en el UPDATE todas las F() ven los valores anteriores a la fila
+        cls.objects.filter(pk=post_id).update(rating_sum=rating_sum, rating_count=rating_count, rating_score=score)
+
+    @classmethod
+    def bump_version(cls, **filters):
+        """Invalida los fragmentos cacheados de los posts que cumplan ``filters``."""
+        cls.objects.filter(**filters).update(version=F('version') + 1)
+
+    def _save_with_slug_retry(self, *args, **kwargs):
+        """Si otro proceso (o un slug puesto a mano) ocupó el slug, pide otro número."""
+        from .slugs import allocate_slug
+        for attempt in range(self.SLUG_RETRIES):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == self.SLUG_RETRIES - 1 or not Post.objects.filter(slug=self.slug).exists():
+                    raise
+                self.slug = allocate_slug(self.title)
+
+    def render_content(self):
+        """Sanea content y rellena las columnas pre-renderizadas."""
+        from .content import render
+        self.content_html, self.content_text, self.summary, self.reading_time = render(self.content, self.excerpt)
+
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
     def publish(self):
         self.published_date = timezone.now()
         self.published = True
         self.save()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # estado original para detectar cuándo se publica (ver blog/timeline.py)
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_published = instance.__dict__.get('published')
+        instance._loaded_published_date = instance.__dict__.get('published_date')
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
+        # un post publicado siempre tiene fecha (admin list_editable, PostForm, etc.)
+        if self.published and not self.published_date:
+            self.published_date = timezone.now()
+
+        # slug único con un contador por base (ver blog/slugs.py)
+        generated_slug = not self.slug
+        if generated_slug:
+            from .slugs import allocate_slug
+            self.slug = allocate_slug(self.title)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'content', 'excerpt'} & set(update_fields):
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.RENDERED_FIELDS}
+
+        bump = not self._state.adding
+        if bump:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None and not args:
+                update_fields = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name not in self.COUNTER_FIELDS + self.DERIVED_FIELDS
+                ]
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+            self.version = F('version') + 1
+
+        if generated_slug:
+            self._save_with_slug_retry(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
 
-            # si ya existe un slug igual, agrega un número
-            original_slug = self.slug
-            counter = 1
-            while Post.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+        if bump:
+            self.refresh_from_db(fields=['version'])
+
+
+class SlugCounter(models.Model):
+    """Último sufijo numérico asignado a cada slug base (ver blog/slugs.py)."""
+    base = models.CharField(max_length=200, unique=True)
+    last = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.base} ({self.last})'
+
+
+class SearchDocument(models.Model):
+    """Texto plano indexado de un post publicado (ver blog/search.py)."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.TextField()
+    body = models.TextField()
+    length = models.PositiveIntegerField(default=0)
+
+
+class SearchPosting(models.Model):
+    """Entrada del índice invertido: término -> documento con su frecuencia."""
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['term', 'document'], name='search_term_idx')]
 
-        super().save(*args, **kwargs)
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -63,14 +301,46 @@ class Comment(models.Model):
     is_approved = models.BooleanField(default=False, verbose_name='Aprobado')
     pinned = models.BooleanField(default=False, verbose_name="Fijado")
 
+    # Totales materializados de CommentVote (se mantienen con deltas en las señales)
+    up_votes = models.PositiveIntegerField(default=0, editable=False)
+    down_votes = models.PositiveIntegerField(default=0, editable=False)
+    score = models.IntegerField(default=0, editable=False)
+
+    # Columnas mantenidas con F(); save() nunca las escribe con valores viejos
+    VOTE_FIELDS = ('up_votes', 'down_votes', 'score')
+
     class Meta:
         ordering = ['created_date']
         verbose_name = 'Comentario'
         verbose_name_plural = 'Comentarios'
-    
-    @property
-    def score(self):
-        return self.votes.aggregate(total=models.Sum('vote'))['total'] or 0
+        indexes = [
+            # orden del hilo en post_detail sin agregaciones
+            models.Index(
+                fields=['post', 'active', 'is_approved', '-pinned', '-score', 'created_date'],
+                name='comment_thread_idx',
+            ),
+        ]
+
+    @classmethod
+    def apply_vote(cls, comment_id, old, new):
+        """Aplica el delta de un voto que pasa de `old` a `new` (1, -1 o 0)."""
+        if old == new:
+            return
+        cls.objects.filter(pk=comment_id).update(
+            up_votes=F('up_votes') + (new == CommentVote.UP) - (old == CommentVote.UP),
+            down_votes=F('down_votes') + (new == CommentVote.DOWN) - (old == CommentVote.DOWN),
+            score=F('score') + (new - old),
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None and not args:
+                kwargs['update_fields'] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name not in self.VOTE_FIELDS
+                ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         if self.user:
@@ -82,6 +352,10 @@ class Comment(models.Model):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Dimensiones y derivados redimensionados del avatar (ver blog/images.py)
+    avatar_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    avatar_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True)
 
     def __str__(self):
@@ -109,6 +383,13 @@ class Review(models.Model):
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # nota original para aplicar solo la diferencia a Post.rating_sum
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
+
     def __str__(self):
         return f'Review de {self.user.username} en {self.post.title} ({self.rating})'
 
@@ -128,7 +409,15 @@ class Reaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('post', 'user', 'type')
+        # una reacción por usuario y post: cambiar de tipo actualiza la fila
+        unique_together = ('post', 'user')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # guardamos el tipo original para saber qué contador mover si cambia
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_type = instance.__dict__.get('type')
+        return instance
 
     def __str__(self):
         return f"{self.user} reacted {self.type} on {self.post}"
@@ -146,13 +435,32 @@ class CommentVote(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name="votes")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     vote = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
     class Meta:
         unique_together = ("user", "comment")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # guardamos el voto original para calcular el delta al guardar
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_vote = instance.__dict__.get('vote')
+        return instance
+
     def __str__(self):
         return f"{self.user} → {self.comment} ({self.vote})"
     
 class Notification(models.Model):
+    COMMENT = 'comment'
+    MENTION = 'mention'
+    REACTION = 'reaction'
+    PUBLISH = 'publish'
+    KIND_CHOICES = [
+        (COMMENT, 'Comentario'),
+        (MENTION, 'Mención'),
+        (REACTION, 'Reacción'),
+        (PUBLISH, 'Publicación'),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
@@ -181,12 +489,17 @@ class Notification(models.Model):
         blank=True
     ) 
 
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True)  # Qué la generó
     message = models.CharField(max_length=255)  # Texto de la notificación
     is_read = models.BooleanField(default=False)  # Si ya fue leída
     created_at = models.DateTimeField(auto_now_add=True)  # Fecha de creación
 
     class Meta:
         ordering = ['-created_at']  # Mostrar primero las más recientes
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
 
     def __str__(self):
         return f"Notificación para {self.user.username} - {self.message[:20]}"
@@ -215,4 +528,22 @@ class Subscription(models.Model):
         if self.author:
             return f"{self.user} sigue a {self.author}"
         else:
-            return f"{self.user} sigue el tag '{self.tag}'"
\ No newline at end of file
+            return f"{self.user} sigue el tag '{self.tag}'"
+
+
+class TimelineEntry(models.Model):
+    """Post en la portada "siguiendo" de un usuario (fan-out al publicar, ver blog/timeline.py)."""
+    # sin índice propio en user: lo cubren unique_together y timeline_user_idx
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries', db_index=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # copia de Post.published_date: la portada se lee de un solo índice
+    published_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-published_date', '-post'], name='timeline_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post} en la portada de {self.user}"
@@ -0,0 +1,212 @@
+"""Creación de notificaciones por comentarios, menciones, reacciones y publicaciones.
+
+Las funciones reciben ids (no instancias) porque se ejecutan desde la cola de
+``blog.tasks``, normalmente en otro hilo después de responder la petición.
+"""
+import heapq
+import logging
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Comment, Notification, Post, Subscription
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+MENTION_RE = re.compile(r"@(\w+)")
+
+# Reacciones del mismo usuario al mismo post dentro de esta ventana se agrupan
+REACTION_WINDOW = timedelta(seconds=getattr(settings, 'BLOG_REACTION_NOTIFICATION_WINDOW', 10 * 60))
+
+# Filas por INSERT al avisar a los suscriptores de una publicación
+PUBLISH_BATCH_SIZE = getattr(settings, 'BLOG_NOTIFICATION_BATCH_SIZE', 1000)
+
+# Vida del contador cacheado de no leídas (se recalcula con un COUNT al caducar)
+UNREAD_TIMEOUT = 60 * 60
+
+
+# ==================== CONTADOR DE NO LEÍDAS ====================
+def _cache():
+    # incr atómico y sin copia local por proceso (ver CACHES en settings)
+    return caches['counters']
+
+
+def _unread_key(user_id):
+    return f'unread-count:{user_id}'
+
+
+def unread_count(user_id):
+    """No leídas de un usuario; un COUNT solo cuando el contador no está en caché."""
+    count = _cache().get(_unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        _cache().add(_unread_key(user_id), count, UNREAD_TIMEOUT)
+    return count
+
+
+def bump_unread(user_ids, delta=1):
+    cache = _cache()
+    for user_id in user_ids:
+        try:
+            if delta >= 0:
+                cache.incr(_unread_key(user_id), delta)
+            else:
+                cache.decr(_unread_key(user_id), -delta)
+        except ValueError:
+            pass  # no está cacheado: el próximo unread_count() lo recalcula
+
+
+def reset_unread(user_id):
+    _cache().delete(_unread_key(user_id))
+
+
+def mark_read(notification):
+    """Marca una notificación como leída y descuenta el contador si hacía falta."""
+    if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+        notification.is_read = True
+        bump_unread([notification.user_id], -1)
+
+
+def mark_all_read(user_id):
+    """Un único UPDATE para todas las no leídas del usuario."""
+    updated = Notification.objects.filter(user_id=user_id, is_read=False).update(is_read=True)
+    reset_unread(user_id)
+    return updated
+
+
+# ==================== CREACIÓN ====================
+
+
+def notify_comment(comment_id):
+    """Avisa al autor del post y a los @mencionados, con un único bulk_create."""
+    comment = Comment.objects.select_related('post', 'user').filter(pk=comment_id).first()
+    if comment is None or comment.user is None:
+        return
+    post, origin = comment.post, comment.user
+
+    notifications = {}
+    if origin.pk != post.author_id:
+        notifications[post.author_id] = Notification(
+            user_id=post.author_id,
+            origin_user=origin,
+            post=post,
+            comment=comment,
+            kind=Notification.COMMENT,
+            message=f"{origin.username} comentó en tu post: {post.title}",
+        )
+
+    # todas las menciones se resuelven en una sola consulta IN
+    usernames = set(MENTION_RE.findall(comment.content))
+    if usernames:
+        mentioned = User.objects.filter(username__in=usernames).exclude(pk__in=[origin.pk, post.author_id])
+        for user_id in mentioned.values_list('pk', flat=True):
+            notifications.setdefault(user_id, Notification(
+                user_id=user_id,
+                origin_user=origin,
+                post=post,
+                comment=comment,
+                kind=Notification.MENTION,
+                message=f"@{origin.username} te mencionó en un comentario.",
+            ))
+
+    Notification.objects.bulk_create(notifications.values())
+    bump_unread(notifications.keys())
+
+
+def notify_reaction(post_id, user_id):
+    """Avisa al autor de una reacción; varias seguidas cuentan como una sola."""
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    origin = User.objects.filter(pk=user_id).first()
+    if post is None or origin is None or origin.pk == post.author_id:
+        return
+
+    now = timezone.now()
+    recent = Notification.objects.filter(
+        user_id=post.author_id,
+        origin_user=origin,
+        post=post,
+        kind=Notification.REACTION,
+        created_at__gte=now - REACTION_WINDOW,
+    )
+    if recent.update(created_at=now, is_read=False):
+        reset_unread(post.author_id)  # pudo pasar de leída a no leída
+        return
+    Notification.objects.create(
+        user_id=post.author_id,
+        origin_user=origin,
+        post=post,
+        kind=Notification.REACTION,
+        message=f"{origin.username} reaccionó a tu post: {post.title}",
+    )
+    bump_unread([post.author_id])
+
+
+def _subscriber_ids(post):
+    """Ids de los suscriptores del autor o de alguna etiqueta del post, sin repetir.
+
+    Cada fuente se lee en streaming y ordenada por user_id; ``heapq.merge``
+    las intercala y basta comparar con el último id para quitar duplicados.
+    """
+    subscriptions = Subscription.objects.exclude(user_id=post.author_id)
+    streams = [subscriptions.filter(author_id=post.author_id)]
+    tags = Q()
+    for name in post.tags.values_list('name', flat=True):
+        tags |= Q(tag__iexact=name)
+    if tags:
+        streams.append(subscriptions.filter(tags))
+    streams = [
+        stream.values_list('user_id', flat=True).order_by('user_id').iterator(chunk_size=PUBLISH_BATCH_SIZE)
+        for stream in streams
+    ]
+    last = None
+    for user_id in heapq.merge(*streams):
+        if user_id != last:
+            last = user_id
+            yield user_id
+
+
+def notify_subscribers(post_id):
+    """Avisa de un post recién publicado a los suscriptores del autor y de sus etiquetas.
+
+    Idempotente: el UPDATE que marca ``notified_at`` reclama el aviso, así que
+    volver a guardar o a publicar el post (o una tarea repetida) no avisa dos veces.
+    """
+    claimed = Post.objects.filter(pk=post_id, published=True, notified_at__isnull=True).update(
+        notified_at=timezone.now(),
+    )
+    if not claimed:
+        return 0
+    post = Post.objects.select_related('author').get(pk=post_id)
+    message = f"{post.author.username} publicó: {post.title}"[:255]
+
+    started = time.perf_counter()
+    total, batch = 0, []
+    for user_id in _subscriber_ids(post):
+        batch.append(user_id)
+        if len(batch) == PUBLISH_BATCH_SIZE:
+            total += _notify_batch(post, message, batch)
+            batch = []
+    if batch:
+        total += _notify_batch(post, message, batch)
+    elapsed = time.perf_counter() - started
+    logger.info('Post %s: %s avisos de publicación en %.2fs (%.0f/s)',
+                post_id, total, elapsed, total / elapsed if elapsed else 0)
+    return total
+
+
+def _notify_batch(post, message, user_ids):
+    Notification.objects.bulk_create([
+        Notification(user_id=user_id, origin_user_id=post.author_id, post=post,
+                     kind=Notification.PUBLISH, message=message)
+        for user_id in user_ids
+    ])
+    bump_unread(user_ids)
+    return len(user_ids)
@@ -0,0 +1,223 @@
+"""Caché de páginas completas para visitantes anónimos con invalidación precisa.
+
+Cada vista pública declara de qué depende la página que genera con
+``depends(request, posts=..., authors=..., tags=...)``. La entrada cacheada
+guarda la generación de cada dependencia; cuando cambia un Post, Comment,
+Review, Reaction o una etiqueta, ``purge()`` da a sus dependencias una
+generación nueva y todas las páginas que las usaban dejan de servirse, sin
+tocar el resto. La generación es un valor aleatorio escrito con ``set``, no un
+``incr``: con la caché de ficheros ``incr`` no es atómico y dos purgas
+simultáneas podían escribir el mismo número; con ``set`` la que gane también
+cambia la generación.
+
+La entrada guarda también las cabeceras de la respuesta (X-Frame-Options,
+Vary...), porque el middleware va por fuera de los que las ponen, y toda
+página cacheada lleva ``Vary: Cookie``.
+
+Las vistas ``async`` usan ``adepends`` y el middleware funciona en los dos
+modos (WSGI y ASGI) con los métodos síncronos o async de la caché.
+"""
+import hashlib
+import secrets
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.connection import ConnectionProxy
+from django.utils.http import http_date
+
+cache = ConnectionProxy(caches, 'pages')
+
+TIMEOUT = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 60 * 10)
+CACHED_ROUTES = {'post_list', 'post_detail', 'posts_by_tag'}
+
+# Dependencia común a todos los listados: cualquier alta/edición de posts
+ALL_POSTS = 'posts'
+
+
+def _new_generation():
+    return secrets.token_hex(8)
+
+
+def _dependency_key(label):
+    return f'page-dep:{label}'
+
+
+def _labels(posts=(), authors=(), tags=(), tag_names=(), extra=()):
+    return (
+        [f'post:{pk}' for pk in posts]
+        + [f'author:{pk}' for pk in authors]
+        + [f'tag:{slug}' for slug in tags]
+        + [f'tag-name:{name.lower()}' for name in tag_names]
+        + list(extra)
+    )
+
+
+def _generations(labels):
+    keys = {label: _dependency_key(label) for label in labels}
+    found = cache.get_many(keys.values())
+    generations = {}
+    for label, key in keys.items():
+        if key not in found:
+            # una generación nueva nunca coincide con entradas anteriores aunque
+            # la clave se haya perdido de la caché
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+        generations[label] = found[key]
+    return generations
+
+
+async def _agenerations(labels):
+    keys = {label: _dependency_key(label) for label in labels}
+    found = await cache.aget_many(keys.values())
+    generations = {}
+    for label, key in keys.items():
+        if key not in found:
+            await cache.aadd(key, _new_generation(), None)
+            found[key] = await cache.aget(key)
+        generations[label] = found[key]
+    return generations
+
+
+def depends(request, posts=(), authors=(), tags=(), tag_names=(), extra=()):
+    """Registra de qué depende la página que se está generando (si es cacheable)."""
+    deps = getattr(request, '_page_cache_deps', None)
+    if deps is not None:
+        deps.update(_generations(_labels(posts, authors, tags, tag_names, extra)))
+
+
+async def adepends(request, posts=(), authors=(), tags=(), tag_names=(), extra=()):
+    """``depends`` para vistas ``async``."""
+    deps = getattr(request, '_page_cache_deps', None)
+    if deps is not None:
+        deps.update(await _agenerations(_labels(posts, authors, tags, tag_names, extra)))
+
+
+def dependency_version(posts=(), authors=(), tags=(), tag_names=(), extra=()):
+    """Cadena que cambia cuando se purga alguna de estas dependencias (ver feeds.py)."""
+    generations = _generations(_labels(posts, authors, tags, tag_names, extra))
+    return ','.join(f'{label}={generation}' for label, generation in sorted(generations.items()))
+
+
+def purge(posts=(), authors=(), tags=(), tag_names=(), extra=()):
+    """Invalida todas las páginas que dependen de alguno de estos objetos."""
+    generation = _new_generation()
+    cache.set_many({_dependency_key(label): generation for label in _labels(posts, authors, tags, tag_names, extra)}, None)
+
+
+def _page_key(request):
+    return 'page:' + hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def _is_anonymous(request):
+    return (
+        request.method == 'GET'
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _conditional(request, response, entry):
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response
+    )
+
+
+# Cabeceras que no se guardan con la página: las pone _conditional o cada petición
+_UNSTORED_HEADERS = {'etag', 'last-modified', 'x-page-cache', 'server-timing', 'set-cookie'}
+
+
+def _cached_response(request, entry):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    # las que pusieron los middlewares interiores (X-Frame-Options, Vary...)
+    for name, value in entry.get('headers', ()):
+        response[name] = value
+    # la página es distinta con sesión: que ninguna caché intermedia la comparta
+    patch_vary_headers(response, ('Cookie',))
+    response['X-Page-Cache'] = 'hit'
+    return _conditional(request, response, entry)
+
+
+def _new_entry(request, response):
+    """Entrada para guardar la respuesta recién generada, o None si no se cachea."""
+    match = request.resolver_match
+    if (
+        match is None
+        or match.url_name not in CACHED_ROUTES
+        or response.status_code != 200
+        or response.streaming
+        or response.cookies
+        or not request._page_cache_deps
+    ):
+        return None
+    return {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'headers': [(name, value) for name, value in response.items() if name.lower() not in _UNSTORED_HEADERS],
+        'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+        'last_modified': int(time.time()),
+        'deps': request._page_cache_deps,
+    }
+
+
+def _stored_response(request, response, entry):
+    patch_vary_headers(response, ('Cookie',))
+    response['X-Page-Cache'] = 'miss'
+    return _conditional(request, response, entry)
+
+
+class AnonymousPageCacheMiddleware:
+    """Sirve desde caché las rutas públicas del blog a visitantes sin sesión.
+
+    Debe ir antes de SessionMiddleware para ver las cookies que se añaden a la
+    respuesta (una respuesta que pone cookies nunca se cachea).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'BLOG_PAGE_CACHE', True) or not _is_anonymous(request):
+            return self.get_response(request)
+
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None and _generations(entry['deps']) == entry['deps']:
+            return _cached_response(request, entry)
+
+        request._page_cache_deps = {}
+        response = self.get_response(request)
+        entry = _new_entry(request, response)
+        if entry is None:
+            return response
+        cache.set(key, entry, TIMEOUT)
+        return _stored_response(request, response, entry)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'BLOG_PAGE_CACHE', True) or not _is_anonymous(request):
+            return await self.get_response(request)
+
+        key = _page_key(request)
+        entry = await cache.aget(key)
+        if entry is not None and await _agenerations(entry['deps']) == entry['deps']:
+            return _cached_response(request, entry)
+
+        request._page_cache_deps = {}
+        response = await self.get_response(request)
+        entry = _new_entry(request, response)
+        if entry is None:
+            return response
+        await cache.aset(key, entry, TIMEOUT)
+        return _stored_response(request, response, entry)
@@ -0,0 +1,190 @@
+"""Paginación por cursor (keyset) para listados de posts.
+
+En lugar de ``OFFSET`` se filtra por la última fila vista, de modo que la
+página 500 cuesta lo mismo que la primera. Los cursores viajan en la URL como
+tokens opacos (``?after=`` / ``?before=``).
+"""
+import base64
+import datetime
+import json
+
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def _cursor_value(value):
+    # isoformat conserva los microsegundos (DjangoJSONEncoder los recorta)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_cursor_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    padded = token + '=' * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_token(self):
+        return self.paginator.cursor_for(self.object_list[-1]) if self.object_list else ''
+
+    @property
+    def previous_token(self):
+        return self.paginator.cursor_for(self.object_list[0]) if self.object_list else ''
+
+    @property
+    def count(self):
+        return self.paginator.count
+
+
+class CursorPaginator:
+    """Paginador keyset sobre ``keys`` (todas descendentes, la última debe ser única).
+
+    Las columnas no pueden ser nulas: así el orden se sirve directamente de un
+    índice compuesto. ``count_cache_key`` activa un total aproximado cacheado
+    durante ``count_timeout`` segundos.
+    """
+
+    def __init__(self, queryset, per_page, keys=('published_date', 'id'),
+                 count_cache_key=None, count_timeout=300):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = keys
+        self.count_cache_key = count_cache_key
+        self.count_timeout = count_timeout
+
+    # ---------- cursores ----------
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, key) for key in self.keys)
+
+    def _parse(self, token):
+        try:
+            values = decode_cursor(token)
+            if len(values) != len(self.keys):
+                return None
+            opts = self.queryset.model._meta
+            return [opts.get_field(key).to_python(value) for key, value in zip(self.keys, values)]
+        except Exception:
+            return None
+
+    def _seek(self, values, forward, keys=None):
+        """Q de las filas que van después (forward) o antes del cursor."""
+        keys = keys or self.keys
+        lookup = 'lt' if forward else 'gt'
+        condition = Q()
+        equal = Q()
+        for key, value in zip(keys, values):
+            condition |= equal & Q(**{f'{key}__{lookup}': value})
+            equal &= Q(**{key: value})
+        # cota sargable sobre la primera columna: el índice se recorre desde el cursor
+        return Q(**{f'{keys[0]}__{lookup}e': values[0]}) & condition
+
+    def _ordered(self, forward):
+        return self.queryset.order_by(*[f'-{key}' if forward else key for key in self.keys])
+
+    # ---------- páginas ----------
+    def get_page(self, params):
+        """Construye la página pedida por ``?after=``, ``?before=`` o ``?last=1``."""
+        after = self._parse(params.get('after', ''))
+        before = self._parse(params.get('before', ''))
+
+        if after is not None:
+            rows = list(self._ordered(True).filter(self._seek(after, True))[:self.per_page + 1])
+            return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+        if before is not None or params.get('last'):
+            qs = self._ordered(False)
+            if before is not None:
+                qs = qs.filter(self._seek(before, False))
+            rows = list(qs[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self, before is not None, has_previous)
+
+        rows = list(self._ordered(True)[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+    @property
+    def count(self):
+        """Total de filas; aproximado (cacheado) si hay ``count_cache_key``."""
+        if self.count_cache_key is None:
+            return None
+        # con TieredCache, mientras uno recalcula el COUNT el resto usa el anterior
+        return cache.get_or_set(self.count_cache_key, self.queryset.count, self.count_timeout)
+
+
+class RankedPaginator(CursorPaginator):
+    """Paginación por cursor sobre una lista acotada de resultados ya ordenados
+    (p.ej. búsqueda por relevancia). El cursor es la posición en la lista y
+    ``loader(ids)`` devuelve los objetos de una página.
+    """
+
+    def __init__(self, ids, per_page, loader):
+        self.ids = list(ids)
+        self.per_page = per_page
+        self.loader = loader
+
+    def cursor_for(self, obj):
+        return encode_cursor([self._positions[obj.pk]])
+
+    def _position(self, token):
+        try:
+            position = int(decode_cursor(token)[0])
+        except Exception:
+            return None
+        return position if 0 <= position < len(self.ids) else None
+
+    def _slice(self, start, stop):
+        start = max(start, 0)
+        ids = self.ids[start:stop]
+        self._positions = {pk: start + i for i, pk in enumerate(ids)}
+        objects = self.loader(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+    def get_page(self, params):
+        after = self._position(params.get('after', ''))
+        before = self._position(params.get('before', ''))
+        total = len(self.ids)
+        if after is not None:
+            start = after + 1
+        elif before is not None:
+            start = before - self.per_page
+        elif params.get('last'):
+            start = total - self.per_page
+        else:
+            start = 0
+        start = max(start, 0)
+        stop = start + self.per_page if before is None else before
+        rows = self._slice(start, stop)
+        return CursorPage(rows, self, stop < total, start > 0)
+
+    @property
+    def count(self):
+        return len(self.ids)
@@ -0,0 +1,145 @@
+"""Puntuación "hot" de los posts para el listado de tendencias (blog:trending).
+
+Cada interacción (publicación, reacción, comentario, review, voto) aporta
+``peso · 2^((t − epoch) / halflife)``: una interacción de hace ``halflife``
+vale la mitad que una de ahora. Como todas las puntuaciones se escalan igual
+con el paso del tiempo, el orden no cambia si no se recalculan; por eso basta
+con sumar cada evento nuevo a ``Post.hot_score`` con un UPDATE atómico.
+
+``hot_score`` se guarda en escala log2 para no desbordar los float: sumar un
+evento de valor ``p`` es ``log2(2^score + 2^p)``. ``recompute()`` (comando
+``recompute_hot_scores``) rehace todas las puntuaciones a partir de las
+tablas y corrige lo que se haya desviado (comentarios rechazados, etc.).
+
+La fórmula se puede cambiar con ``BLOG_HOT_FORMULA`` (ruta a una subclase de
+``DecayFormula``).
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Greatest, Least, Log, Power
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Comment, CommentVote, Post, Reaction, Review
+
+PUBLISH, REACTION, COMMENT, REVIEW, VOTE = 'publish', 'reaction', 'comment', 'review', 'vote'
+
+# Un evento nunca deja la puntuación por debajo de esta fracción al quitarse
+_MIN_REMAINDER = 2.0 ** -20
+
+
+class DecayFormula:
+    """``hot = log2(Σ peso · 2^((t − epoch) / halflife))``."""
+    epoch = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    halflife = timedelta(hours=24)
+    weights = {PUBLISH: 1.0, REACTION: 1.0, VOTE: 0.5, COMMENT: 3.0, REVIEW: 2.0}
+
+    def point(self, kind, when):
+        """Aportación de un evento en escala log2 (None si no cuenta)."""
+        weight = self.weights.get(kind, 0)
+        if weight <= 0 or when is None:
+            return None
+        return (when - self.epoch) / self.halflife + math.log2(weight)
+
+    # ---------- incremental (SQL) ----------
+    def add_expression(self, point):
+        # log2(2^a + 2^b) = max(a, b) + log2(1 + 2^-|a − b|), sin desbordar
+        combined = Greatest(F('hot_score'), Value(point)) + Log(
+            Value(2.0), Value(1.0) + Power(Value(2.0), -Abs(F('hot_score') - Value(point))),
+        )
+        return Case(When(hot_score__isnull=True, then=Value(point)), default=combined, output_field=FloatField())
+
+    def remove_expression(self, point):
+        # log2(2^a − 2^b) = a + log2(1 − 2^(b − a)), acotado para no llegar a log(0)
+        remainder = Value(1.0) - Power(Value(2.0), Least(Value(point) - F('hot_score'), Value(0.0)))
+        return F('hot_score') + Log(Value(2.0), Greatest(remainder, Value(_MIN_REMAINDER)))
+
+    # ---------- por lotes (Python) ----------
+    def combine(self, accumulator, point):
+        """Añade ``point`` a un acumulador (máximo, suma relativa) de log-sum-exp."""
+        if accumulator is None:
+            return (point, 1.0)
+        top, total = accumulator
+        if point <= top:
+            return (top, total + 2.0 ** (point - top))
+        return (point, total * 2.0 ** (top - point) + 1.0)
+
+    def finish(self, accumulator):
+        top, total = accumulator
+        return top + math.log2(total)
+
+
+_formula = None
+
+
+def get_formula():
+    global _formula
+    if _formula is None:
+        path = getattr(settings, 'BLOG_HOT_FORMULA', 'blog.ranking.DecayFormula')
+        _formula = import_string(path)()
+    return _formula
+
+
+def record(kind, when=None, delta=1, **post_filters):
+    """Suma (``delta=1``) o resta (``delta=-1``) un evento a los posts de ``post_filters``."""
+    formula = get_formula()
+    point = formula.point(kind, when or timezone.now())
+    if point is None:
+        return
+    posts = Post.objects.filter(published=True, **post_filters)
+    if delta > 0:
+        posts.update(hot_score=formula.add_expression(point))
+    else:
+        posts.filter(hot_score__isnull=False).update(hot_score=formula.remove_expression(point))
+
+
+def record_publish(post):
+    """Puntuación inicial de un post recién publicado (la publicación es su primer evento)."""
+    point = get_formula().point(PUBLISH, post.published_date)
+    if point is not None:
+        Post.objects.filter(pk=post.pk, published=True, hot_score__isnull=True).update(hot_score=point)
+
+
+def event_sources():
+    """(tipo, queryset de (post_id, fecha)) de cada tabla que aporta a la puntuación."""
+    return [
+        (PUBLISH, Post.objects.filter(published=True).values_list('id', 'published_date')),
+        (REACTION, Reaction.objects.filter(post__published=True).values_list('post_id', 'created_at')),
+        (COMMENT, Comment.objects.filter(active=True, post__published=True).values_list('post_id', 'created_date')),
+        (REVIEW, Review.objects.filter(post__published=True).values_list('post_id', 'created_at')),
+        (VOTE, CommentVote.objects.filter(comment__post__published=True).values_list('comment__post_id', 'created_at')),
+    ]
+
+
+def accumulate(kind, rows, formula=None, accumulators=None):
+    """Acumula por post los eventos ``(post_id, fecha)`` de tipo ``kind``. Devuelve cuántos."""
+    formula = formula or get_formula()
+    accumulators = {} if accumulators is None else accumulators
+    point, combine, total = formula.point, formula.combine, 0
+    for post_id, when in rows:
+        value = point(kind, when)
+        if value is not None:
+            accumulators[post_id] = combine(accumulators.get(post_id), value)
+        total += 1
+    return total
+
+
+def recompute(batch_size=2000, formula=None):
+    """Recalcula ``hot_score`` de todos los posts. Devuelve (eventos leídos, posts corregidos)."""
+    formula = formula or get_formula()
+    accumulators, events = {}, 0
+    for kind, rows in event_sources():
+        events += accumulate(kind, rows.iterator(chunk_size=batch_size), formula, accumulators)
+
+    updated = []
+    for post in Post.objects.only('id', 'hot_score').iterator(chunk_size=batch_size):
+        accumulator = accumulators.get(post.id)
+        score = formula.finish(accumulator) if accumulator else None
+        if (score is None) != (post.hot_score is None) or (score is not None and abs(score - post.hot_score) > 1e-9):
+            post.hot_score = score
+            updated.append(post)
+    Post.objects.bulk_update(updated, ['hot_score'], batch_size=batch_size)
+    return events, len(updated)
@@ -0,0 +1,198 @@
+"""Límite de peticiones por vista, compartido entre procesos a través de la caché.
+
+Cada vista decorada con ``@ratelimit('<ámbito>')`` busca su tasa en
+``BLOG_RATELIMITS`` (``"10/m"``, ``"5/30s"``, ``"100/h"``; ``None`` lo
+desactiva). Se usa una ventana deslizante aproximada: un contador por ventana
+fija (``cache.add`` + ``cache.incr``) y el de la ventana anterior pesa según
+lo que falta de ella::
+
+    peticiones ≈ anterior · (1 − transcurrido/periodo) + actual
+
+Si se supera el límite se responde 429 con ``Retry-After``. Los contadores
+viven en la caché ``BLOG_RATELIMIT_CACHE``, que en producción debe ser
+compartida y con ``incr`` atómico: Redis, Memcached o
+``myblog.cache.CounterDatabaseCache`` (la que se usa sin Redis). Con la de
+base de datos o la de ficheros de Django dos peticiones simultáneas pueden
+contar como una.
+
+El decorador vale también para vistas ``async``: cuenta con los métodos
+async de la caché (``aadd``, ``aincr``...) sin ocupar un hilo.
+"""
+import asyncio
+import math
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .async_auth import aget_user
+
+_RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\w*\s*$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``"10/m"`` → (10, 60); ``"5/30s"`` → (5, 30)."""
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f'Tasa no válida: {rate!r}')
+    limit, amount, unit = match.groups()
+    return int(limit), int(amount or 1) * _UNITS[unit]
+
+
+def get_rate(scope):
+    return getattr(settings, 'BLOG_RATELIMITS', {}).get(scope)
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_RATELIMIT_CACHE', 'default')]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def user_or_ip(request):
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    return f'ip{client_ip(request)}'
+
+
+KEYS = {
+    'user': lambda request: f'u{request.user.pk}',
+    'ip': lambda request: f'ip{client_ip(request)}',
+    'user_or_ip': user_or_ip,
+}
+
+
+def _incr(cache, key, timeout):
+    # add crea el contador solo si no existe; incr lo sube de forma atómica
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:  # caducó entre add e incr
+        cache.add(key, 1, timeout)
+        return 1
+
+
+async def _aincr(cache, key, timeout):
+    await cache.aadd(key, 0, timeout)
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout)
+        return 1
+
+
+def _window(scope, ident, period, now):
+    """Claves de la ventana actual y la anterior y fracción transcurrida de la actual."""
+    window = int(now // period)
+    elapsed = (now - window * period) / period
+    return f'rl:{scope}:{ident}:{window}', f'rl:{scope}:{ident}:{window - 1}', elapsed
+
+
+def hit(scope, ident, rate, now=None):
+    """Cuenta una petición de ``ident`` en ``scope``.
+
+    Devuelve ``None`` si se permite o los segundos que hay que esperar si no
+    (en ese caso la petición no queda contada).
+    """
+    limit, period = parse_rate(rate)
+    current_key, previous_key, elapsed = _window(scope, ident, period, time.time() if now is None else now)
+    cache = get_cache()
+    previous = cache.get(previous_key, 0)
+    current = _incr(cache, current_key, period * 2)
+
+    if previous * (1 - elapsed) + current <= limit:
+        return None
+    try:
+        cache.decr(current_key)
+    except ValueError:
+        pass
+    current -= 1
+    return retry_after(limit, period, previous, current, elapsed)
+
+
+async def ahit(scope, ident, rate, now=None):
+    """``hit`` con los métodos async de la caché."""
+    limit, period = parse_rate(rate)
+    current_key, previous_key, elapsed = _window(scope, ident, period, time.time() if now is None else now)
+    cache = get_cache()
+    previous = await cache.aget(previous_key, 0)
+    current = await _aincr(cache, current_key, period * 2)
+
+    if previous * (1 - elapsed) + current <= limit:
+        return None
+    try:
+        await cache.adecr(current_key)
+    except ValueError:
+        pass
+    current -= 1
+    return retry_after(limit, period, previous, current, elapsed)
+
+
+def retry_after(limit, period, previous, current, elapsed):
+    """Segundos hasta que cabe una petición más en la ventana deslizante."""
+    room = limit - current  # hueco que deja la ventana actual
+    if room >= 1 and previous:
+        # esperar a que el peso de la ventana anterior baje lo suficiente
+        needed = 1 - (room - 1) / previous
+        return max(1, math.ceil((needed - elapsed) * period - 1e-9))
+    # la ventana actual ya está llena: en la siguiente pesa como "anterior"
+    needed = 1 - (limit - 1) / current if current else 0
+    return max(1, math.ceil((1 - elapsed + max(0.0, needed)) * period - 1e-9))
+
+
+def _too_many(request, seconds, json):
+    if json is None:
+        json = (
+            request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+            or 'application/json' in request.headers.get('Accept', '')
+        )
+    if json:
+        response = JsonResponse({'error': 'Too Many Requests', 'retry_after': seconds}, status=429)
+    else:
+        response = render(request, 'blog/ratelimited.html', {'retry_after': seconds}, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def ratelimit(scope, key='user_or_ip', methods=('POST',), json=None):
+    """Limita la vista según ``BLOG_RATELIMITS[scope]``.
+
+    ``key`` es ``"user"``, ``"ip"``, ``"user_or_ip"`` o una función
+    ``request -> str``; solo cuentan las peticiones con método en ``methods``.
+    El 429 es JSON si ``json`` es True (o si la petición es AJAX) y una página
+    si no.
+    """
+    key_func = KEYS[key] if isinstance(key, str) else key
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                rate = get_rate(scope)
+                if rate and request.method in methods:
+                    await aget_user(request)  # las claves por usuario leen request.user
+                    seconds = await ahit(scope, key_func(request), rate)
+                    if seconds is not None:
+                        # la página de error pasa por los context processors (sesión, usuario)
+                        return await sync_to_async(_too_many)(request, seconds, json)
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = get_rate(scope)
+            if rate and request.method in methods:
+                seconds = hit(scope, key_func(request), rate)
+                if seconds is not None:
+                    return _too_many(request, seconds, json)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
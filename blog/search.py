@@ -0,0 +1,321 @@
+"""Motor de búsqueda de posts.
+
+Indexa el texto plano (sin HTML) de título, resumen, contenido y etiquetas de
+los posts publicados y devuelve resultados ordenados por relevancia (BM25) con
+fragmentos resaltados. Hay tres backends:
+
+* ``SQLiteFTSBackend``: tabla virtual FTS5 (por defecto en SQLite).
+* ``PostgresSearchBackend``: ``tsvector`` con índice GIN (en PostgreSQL).
+* ``PythonSearchBackend``: índice invertido propio en tablas de Django.
+
+``BLOG_SEARCH_BACKEND`` en settings permite forzar uno ("fts5", "postgres",
+"python"); por defecto se elige según la base de datos.
+"""
+import html
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils.html import escape, strip_tags
+
+from .models import SearchDocument, SearchPosting
+
+SearchHit = namedtuple('SearchHit', ['post_id', 'score', 'highlight'])
+
+# Peso del título frente al cuerpo
+TITLE_WEIGHT = 3
+# Máximo de resultados que devuelve una búsqueda
+MAX_RESULTS = 200
+
+# Marcadores internos para resaltar sin mezclar HTML con el texto indexado
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+_WORD_RE = re.compile(r'\w+')
+
+
+# ==================== TEXTO ====================
+def plain_text(value):
+    """Texto plano a partir del HTML de CKEditor."""
+    return ' '.join(html.unescape(strip_tags(value or '')).split())
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return [token[:64] for token in _WORD_RE.findall(normalize(text)) if len(token) > 1]
+
+
+def document_for(post):
+    """(título, cuerpo) en texto plano de lo que se indexa de un post.
+
+    El texto del contenido es el que Post.save ya calculó (``content_text``).
+    """
+    tags = ' '.join(tag.name for tag in post.tags.all())
+    body = ' '.join(filter(None, [plain_text(post.excerpt), post.content_text, tags]))
+    return post.title, body
+
+
+def render_highlight(text):
+    """Escapa el fragmento y convierte los marcadores internos en <mark>."""
+    return escape(text).replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def snippet(text, terms, size=30):
+    """Fragmento de ``size`` palabras alrededor del primer término encontrado."""
+    words = text.split()
+    start = 0
+    for i, word in enumerate(words):
+        if set(tokenize(word)) & terms:
+            start = max(0, i - size // 3)
+            break
+    chunk = words[start:start + size]
+    marked = [
+        f'{_MARK_OPEN}{word}{_MARK_CLOSE}' if set(tokenize(word)) & terms else word
+        for word in chunk
+    ]
+    prefix = '… ' if start else ''
+    suffix = ' …' if start + size < len(words) else ''
+    return render_highlight(prefix + ' '.join(marked) + suffix)
+
+
+# ==================== BACKENDS ====================
+class BaseSearchBackend:
+    name = None
+
+    def ensure_schema(self):
+        """Crea lo que el backend necesita fuera de los modelos (se llama en post_migrate)."""
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=MAX_RESULTS):
+        raise NotImplementedError
+
+    def index_many(self, posts):
+        for post in posts:
+            self.index(post)
+
+
+class PythonSearchBackend(BaseSearchBackend):
+    """Índice invertido en SearchDocument/SearchPosting con ranking BM25 en Python."""
+    name = 'python'
+    k1 = 1.2
+    b = 0.75
+
+    def _postings(self, document, title, body):
+        frequencies = Counter(tokenize(body))
+        for token in tokenize(title):
+            frequencies[token] += TITLE_WEIGHT
+        document.length = sum(frequencies.values())
+        return [SearchPosting(document=document, term=term, frequency=freq) for term, freq in frequencies.items()]
+
+    def index(self, post):
+        self.index_many([post])
+
+    def index_many(self, posts):
+        documents, postings = [], []
+        for post in posts:
+            title, body = document_for(post)
+            document = SearchDocument(post_id=post.pk, title=title, body=body)
+            postings.extend(self._postings(document, title, body))
+            documents.append(document)
+        if not documents:
+            return
+        ids = [document.post_id for document in documents]
+        with transaction.atomic():
+            SearchDocument.objects.filter(post_id__in=ids).delete()
+            SearchDocument.objects.bulk_create(documents)
+            SearchPosting.objects.bulk_create(postings, batch_size=1000)
+
+    def remove(self, post_id):
+        SearchDocument.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+
+    def search(self, query, limit=MAX_RESULTS):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        stats = SearchDocument.objects.aggregate(total=models.Count('pk'), avg_length=models.Avg('length'))
+        total, avg_length = stats['total'], stats['avg_length'] or 1
+
+        # una sola consulta para las listas de todos los términos
+        by_document = defaultdict(dict)
+        rows = SearchPosting.objects.filter(term__in=terms).values_list('document_id', 'term', 'frequency', 'document__length')
+        lengths = {}
+        for document_id, term, frequency, length in rows:
+            by_document[document_id][term] = frequency
+            lengths[document_id] = length
+        df = Counter(term for found in by_document.values() for term in found)
+
+        scores = []
+        for document_id, found in by_document.items():
+            if len(found) < len(terms):
+                continue  # todos los términos deben aparecer (AND)
+            norm = self.k1 * (1 - self.b + self.b * lengths[document_id] / avg_length)
+            score = 0.0
+            for term, tf in found.items():
+                idf = math.log(1 + (total - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores.append((score, document_id))
+        scores.sort(reverse=True)
+        scores = scores[:limit]
+
+        bodies = dict(SearchDocument.objects.filter(post_id__in=[d for _, d in scores]).values_list('post_id', 'body'))
+        return [SearchHit(document_id, score, snippet(bodies.get(document_id, ''), terms)) for score, document_id in scores]
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Tabla virtual FTS5; ``bm25()`` y ``snippet()`` los calcula SQLite."""
+    name = 'fts5'
+    table = 'blog_search_fts'
+
+    @classmethod
+    def is_available(cls):
+        if connection.vendor != 'sqlite':
+            return False
+        # sin DDL: la tabla solo se crea en post_migrate (ensure_schema)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return bool(cursor.fetchone()[0])
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, post):
+        self.index_many([post])
+
+    def index_many(self, posts):
+        rows = [(post.pk, *document_for(post)) for post in posts]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(f"INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, query, limit=MAX_RESULTS):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # cada término entre comillas: nada del usuario se interpreta como sintaxis FTS
+        match = ' '.join(f'"{term}"' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({self.table}, {TITLE_WEIGHT}.0, 1.0) AS rank, "
+                f"snippet({self.table}, -1, %s, %s, '…', 30) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s ORDER BY rank LIMIT %s",
+                [_MARK_OPEN, _MARK_CLOSE, match, limit],
+            )
+            # bm25() de FTS5 es negativo: más bajo = más relevante
+            return [SearchHit(row[0], -row[1], render_highlight(row[2])) for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """``tsvector`` sobre SearchDocument con índice GIN de expresión.
+
+    PostgreSQL no implementa BM25; se usa ``ts_rank_cd`` (densidad de
+    cobertura) normalizado por longitud, que es lo más parecido disponible.
+    """
+    name = 'postgres'
+    config = 'spanish'
+    vector = "setweight(to_tsvector('{config}', title), 'A') || setweight(to_tsvector('{config}', body), 'D')"
+
+    def ensure_schema(self):
+        vector = self.vector.format(config=self.config)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS blog_searchdocument_tsv "
+                f"ON {SearchDocument._meta.db_table} USING GIN (({vector}))"
+            )
+
+    def index(self, post):
+        self.index_many([post])
+
+    def index_many(self, posts):
+        for post in posts:
+            title, body = document_for(post)
+            SearchDocument.objects.update_or_create(post_id=post.pk, defaults={'title': title, 'body': body})
+
+    def remove(self, post_id):
+        SearchDocument.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchDocument.objects.all().delete()
+
+    def search(self, query, limit=MAX_RESULTS):
+        if not query.strip():
+            return []
+        vector = self.vector.format(config=self.config)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT post_id, ts_rank_cd({vector}, q, 1) AS rank, "
+                f"ts_headline('{self.config}', body, q, %s) "
+                f"FROM {SearchDocument._meta.db_table}, websearch_to_tsquery('{self.config}', %s) q "
+                f"WHERE ({vector}) @@ q ORDER BY rank DESC LIMIT %s",
+                [f'StartSel={_MARK_OPEN}, StopSel={_MARK_CLOSE}, MaxWords=30, MinWords=10', query, limit],
+            )
+            return [SearchHit(row[0], row[1], render_highlight(row[2])) for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'python': PythonSearchBackend,
+    'fts5': SQLiteFTSBackend,
+    'postgres': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """Backend configurado (o el mejor disponible para la base de datos)."""
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'BLOG_SEARCH_BACKEND', 'auto')
+        if name == 'auto':
+            if connection.vendor == 'postgresql':
+                name = 'postgres'
+            elif SQLiteFTSBackend.is_available():
+                name = 'fts5'
+            else:
+                name = 'python'
+        _backend = BACKENDS[name]()
+    return _backend
+
+
+def search_posts(query, limit=MAX_RESULTS):
+    return get_backend().search(query, limit)
+
+
+def index_post(post):
+    """Indexa un post publicado o lo quita del índice si no lo está."""
+    backend = get_backend()
+    if post.published:
+        backend.index(post)
+    else:
+        backend.remove(post.pk)
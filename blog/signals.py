@@ -0,0 +1,222 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from . import notifications, page_cache, ranking, search, tasks, timeline
+from .models import Post, Reaction, Comment, CommentVote, Review, Subscription
+
+
+# ==================== REACCIONES ====================
+@receiver(post_save, sender=Reaction)
+def reaction_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_type', None)
+    if created:
+        Post.bump_reaction(instance.post_id, instance.type, 1)
+    elif previous and previous != instance.type:
+        Post.bump_reaction(instance.post_id, previous, -1)
+        Post.bump_reaction(instance.post_id, instance.type, 1)
+    instance._loaded_type = instance.type
+
+
+@receiver(post_delete, sender=Reaction)
+def reaction_deleted(sender, instance, **kwargs):
+    Post.bump_reaction(instance.post_id, getattr(instance, '_loaded_type', None) or instance.type, -1)
+
+
+# ==================== VOTOS DE COMENTARIOS ====================
+@receiver(post_save, sender=CommentVote)
+def comment_vote_saved(sender, instance, created, **kwargs):
+    previous = CommentVote.NEUTRAL if created else getattr(instance, '_loaded_vote', CommentVote.NEUTRAL)
+    if previous != instance.vote:
+        Comment.apply_vote(instance.comment_id, previous, instance.vote)
+        Post.bump_version(comments__id=instance.comment_id)
+    instance._loaded_vote = instance.vote
+
+
+@receiver(post_delete, sender=CommentVote)
+def comment_vote_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_vote', instance.vote)
+    Comment.apply_vote(instance.comment_id, previous, CommentVote.NEUTRAL)
+    Post.bump_version(comments__id=instance.comment_id)
+
+
+# ==================== RATINGS ====================
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        Post.bump_rating(instance.post_id, instance.rating, 1)
+    else:
+        previous = getattr(instance, '_loaded_rating', None)
+        if previous is not None and previous != instance.rating:
+            Post.bump_rating(instance.post_id, instance.rating - previous, 0)
+    instance._loaded_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    rating = getattr(instance, '_loaded_rating', None) or instance.rating
+    Post.bump_rating(instance.post_id, -rating, -1)
+
+
+# ==================== TENDENCIAS (hot_score) ====================
+@receiver(post_save, sender=Post)
+def post_published_rank(sender, instance, **kwargs):
+    if instance.published:
+        ranking.record_publish(instance)
+
+
+def _rank_event(instance, delta):
+    if isinstance(instance, CommentVote):
+        ranking.record(ranking.VOTE, instance.created_at, delta, comments__id=instance.comment_id)
+    elif isinstance(instance, Comment):
+        if instance.active:
+            ranking.record(ranking.COMMENT, instance.created_date, delta, pk=instance.post_id)
+    else:
+        kind = ranking.REACTION if isinstance(instance, Reaction) else ranking.REVIEW
+        ranking.record(kind, instance.created_at, delta, pk=instance.post_id)
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=CommentVote)
+def interaction_created_rank(sender, instance, created, **kwargs):
+    # editar una interacción no cambia su momento; la moderación la corrige recompute_hot_scores
+    if created:
+        _rank_event(instance, 1)
+
+
+@receiver(post_delete, sender=Reaction)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=CommentVote)
+def interaction_deleted_rank(sender, instance, **kwargs):
+    _rank_event(instance, -1)
+
+
+# ==================== AVISOS DE PUBLICACIÓN ====================
+# Registrado antes que post_published_timeline, que actualiza _loaded_published
+@receiver(post_save, sender=Post)
+def post_published_notify(sender, instance, created, **kwargs):
+    was_published = False if created else getattr(instance, '_loaded_published', None)
+    if instance.published and not was_published:
+        tasks.enqueue(notifications.notify_subscribers, instance.pk)
+
+
+# ==================== PORTADA "SIGUIENDO" (fan-out al publicar) ====================
+@receiver(post_save, sender=Post)
+def post_published_timeline(sender, instance, created, **kwargs):
+    was_published = False if created else getattr(instance, '_loaded_published', None)
+    if instance.published and not was_published:
+        tasks.enqueue(timeline.fan_out, instance.pk)
+    elif was_published and not instance.published:
+        tasks.enqueue(timeline.retract, instance.pk)
+    elif instance.published and instance.published_date != getattr(instance, '_loaded_published_date', instance.published_date):
+        tasks.enqueue(timeline.redate, instance.pk, instance.published_date)
+    instance._loaded_published = instance.published
+    instance._loaded_published_date = instance.published_date
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_added_timeline(sender, instance, action, pk_set, **kwargs):
+    # etiquetas añadidas a un post ya publicado (p.ej. save_m2m después de save)
+    if action == 'post_add' and isinstance(instance, Post) and instance.published and pk_set:
+        names = list(Tag.objects.filter(pk__in=pk_set).values_list('name', flat=True))
+        tasks.enqueue(timeline.fan_out, instance.pk, names)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created_timeline(sender, instance, created, **kwargs):
+    if created:
+        tasks.enqueue(timeline.backfill, instance.user_id, instance.author_id, instance.tag)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted_timeline(sender, instance, **kwargs):
+    tasks.enqueue(timeline.prune, instance.user_id, instance.author_id, instance.tag)
+
+
+# ==================== VERSIÓN DE POST (caché de fragmentos) ====================
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Review)
+def post_child_changed(sender, instance, **kwargs):
+    Post.bump_version(pk=instance.post_id)
+
+
+# ==================== ÍNDICE DE BÚSQUEDA ====================
+@receiver(post_migrate)
+def search_schema(sender, **kwargs):
+    # DDL fuera de las peticiones (y de las transacciones de los tests)
+    if sender.name == 'blog':
+        search.get_backend().ensure_schema()
+
+
+# ==================== TABLAS DE CACHÉ ====================
+@receiver(post_migrate)
+def cache_tables(sender, using, verbosity=1, **kwargs):
+    # las de las cachés de base de datos (la de contadores sin Redis, ver settings)
+    if sender.name == 'blog':
+        call_command('createcachetable', database=using, verbosity=verbosity)
+
+
+@receiver(post_save, sender=Post)
+def post_saved_index(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_index(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed_index(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        search.index_post(instance)
+
+
+# ==================== CACHÉ DE PÁGINAS (anónimos) ====================
+@receiver([post_save, post_delete], sender=Post)
+def post_changed_purge(sender, instance, **kwargs):
+    tags = list(instance.tags.values_list('slug', 'name')) if instance.pk else []
+    page_cache.purge(
+        posts=[instance.pk],
+        authors=[instance.author_id],
+        tags=[slug for slug, _ in tags],
+        tag_names=[name for _, name in tags],
+        extra=[page_cache.ALL_POSTS],
+    )
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Reaction)
+def post_child_changed_purge(sender, instance, **kwargs):
+    page_cache.purge(posts=[instance.post_id])
+
+
+@receiver([post_save, post_delete], sender=CommentVote)
+def comment_vote_changed_purge(sender, instance, **kwargs):
+    page_cache.purge(posts=Comment.objects.filter(pk=instance.comment_id).values_list('post_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=TaggedItem)
+def tagged_item_changed_purge(sender, instance, **kwargs):
+    try:
+        tag = instance.tag
+    except Tag.DoesNotExist:  # borrado en cascada junto con la etiqueta
+        page_cache.purge(posts=[instance.object_id])
+        return
+    page_cache.purge(posts=[instance.object_id], tags=[tag.slug], tag_names=[tag.name])
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed_purge(sender, instance, **kwargs):
+    page_cache.purge(tags=[instance.slug], tag_names=[instance.name])
+
+
+@receiver(post_save, sender=User)
+def author_changed_purge(sender, instance, **kwargs):
+    page_cache.purge(authors=[instance.pk])
@@ -0,0 +1,84 @@
+"""Asignación de slugs únicos para Post.
+
+En vez de probar ``titulo``, ``titulo-1``, ``titulo-2``... con una consulta por
+intento (O(n) por post, O(n²) en una importación), cada slug base tiene un
+contador en SlugCounter que se incrementa de forma atómica. La primera vez que
+aparece una base, el contador arranca desde el sufijo más alto ya usado (una
+sola consulta por prefijo).
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils.text import slugify
+
+from .models import Post, SlugCounter
+
+# deja sitio para el sufijo "-123456"
+MAX_BASE_LENGTH = Post._meta.get_field('slug').max_length - 8
+
+
+def base_slug(title):
+    return slugify(title)[:MAX_BASE_LENGTH].strip('-') or 'post'
+
+
+def _highest_suffix(base):
+    """Sufijo más alto ya usado por posts existentes (-1 si la base está libre)."""
+    suffix = re.compile(rf'^{re.escape(base)}(?:-(\d+))?$')
+    highest = -1
+    slugs = Post.objects.filter(Q(slug=base) | Q(slug__startswith=f'{base}-')).values_list('slug', flat=True)
+    for slug in slugs.iterator():
+        match = suffix.match(slug)
+        if match:
+            highest = max(highest, int(match.group(1) or 0))
+    return highest
+
+
+def _reserve(base, count):
+    """Reserva ``count`` números consecutivos para ``base``; devuelve el último."""
+    with transaction.atomic():
+        if not SlugCounter.objects.filter(base=base).update(last=F('last') + count):
+            try:
+                with transaction.atomic():
+                    SlugCounter.objects.create(base=base, last=_highest_suffix(base) + count)
+            except IntegrityError:
+                # otro proceso creó el contador a la vez
+                SlugCounter.objects.filter(base=base).update(last=F('last') + count)
+        return SlugCounter.objects.filter(base=base).values_list('last', flat=True).get()
+
+
+def reserve_slugs(slugs):
+    """Avanza los contadores para no volver a asignar slugs puestos a mano.
+
+    ``hola-7`` hace que el contador de ``hola`` no baje de 7. Solo afecta a
+    contadores ya creados: los nuevos arrancan desde lo que haya en la tabla.
+    """
+    for slug in slugs:
+        match = re.match(r'^(.+)-(\d+)$', slug)
+        if match:
+            SlugCounter.objects.filter(base=match.group(1), last__lt=int(match.group(2))).update(
+                last=int(match.group(2))
+            )
+
+
+def _slug(base, number):
+    return base if number == 0 else f'{base}-{number}'
+
+
+def allocate_slug(title):
+    base = base_slug(title)
+    return _slug(base, _reserve(base, 1))
+
+
+def allocate_slugs(titles):
+    """Slugs para muchos títulos a la vez: una reserva por base distinta."""
+    bases = [base_slug(title) for title in titles]
+    wanted = {}
+    for base in bases:
+        wanted[base] = wanted.get(base, 0) + 1
+    next_number = {base: _reserve(base, count) - count + 1 for base, count in wanted.items()}
+    slugs = []
+    for base in bases:
+        slugs.append(_slug(base, next_number[base]))
+        next_number[base] += 1
+    return slugs
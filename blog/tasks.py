@@ -0,0 +1,48 @@
+"""Cola de tareas en proceso para trabajo que no debe bloquear la petición.
+
+``BLOG_TASKS_BACKEND`` elige cómo se ejecutan:
+
+* ``"thread"`` (por defecto): un ThreadPoolExecutor compartido; la tarea se
+  lanza cuando se confirma la transacción actual, para que el worker vea las
+  filas que la petición acaba de escribir.
+* ``"sync"``: se ejecuta en el momento, en el mismo hilo (tests, scripts).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BLOG_TASKS_WORKERS', 4),
+            thread_name_prefix='blog-tasks',
+        )
+    return _executor
+
+
+def _run(func, args, kwargs, threaded):
+    if threaded:
+        close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Error en la tarea %s', getattr(func, '__name__', func))
+    finally:
+        if threaded:
+            connection.close()
+
+
+def enqueue(func, *args, **kwargs):
+    """Programa ``func(*args, **kwargs)`` según ``BLOG_TASKS_BACKEND``."""
+    if getattr(settings, 'BLOG_TASKS_BACKEND', 'thread') == 'sync':
+        _run(func, args, kwargs, threaded=False)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs, True))
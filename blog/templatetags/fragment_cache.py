@@ -0,0 +1,51 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog import fragments
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, post, skip):
+        self.nodelist = nodelist
+        self.name = name
+        self.post = post
+        self.skip = skip
+
+    def render(self, context):
+        if self.skip is not None and self.skip.resolve(context):
+            return self.nodelist.render(context)
+
+        name = self.name.resolve(context)
+        key = fragments.cache_key(name, self.post.resolve(context))
+        rendered = []
+
+        def render():
+            rendered.append(True)
+            return self.nodelist.render(context)
+
+        # get_or_set: con TieredCache un solo proceso renderiza un fragmento caducado
+        html = fragments.cache.get_or_set(key, render, fragments.TIMEOUT)
+        fragments.record(name, hit=not rendered)
+        return mark_safe(html)
+
+
+@register.tag
+def fragment(parser, token):
+    """{% fragment "nombre" post [skip=condicion] %} ... {% endfragment %}
+
+    Cachea el contenido bajo la versión actual del post. Con ``skip`` verdadero
+    se renderiza sin caché (p.ej. contenido distinto para el staff).
+    """
+    bits = token.split_contents()
+    if len(bits) not in (3, 4):
+        raise template.TemplateSyntaxError(f"'{bits[0]}' espera un nombre, un post y opcionalmente skip=...")
+    skip = None
+    if len(bits) == 4:
+        if not bits[3].startswith('skip='):
+            raise template.TemplateSyntaxError(f"'{bits[0]}' solo acepta skip=... como tercer argumento")
+        skip = parser.compile_filter(bits[3][len('skip='):])
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), skip)
@@ -0,0 +1,38 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _srcset(entries, key):
+    return ', '.join(f"{default_storage.url(entry[key])} {entry['width']}w" for entry in entries)
+
+
+@register.simple_tag
+def responsive_image(file, renditions, sizes='100vw', size='card', alt='', loading='lazy', **attrs):
+    """``<picture>`` con ``srcset`` WebP/JPEG de los derivados de blog/images.py.
+
+    Uso: ``{% responsive_image post.cover post.cover_renditions sizes="400px" class="img-fluid" %}``.
+    Si los derivados no existen todavía (o son de un fichero anterior) se usa
+    el original.
+    """
+    if not file:
+        return ''
+    attrs.update(alt=alt, loading=loading, decoding='async')
+
+    if not renditions or renditions.get('source') != file.name:
+        return format_html('<img src="{}"{}>', file.url, flatatt(attrs))
+
+    # un mismo ancho una sola vez (originales más pequeños que varios tamaños)
+    by_width = {}
+    for entry in renditions['sizes'].values():
+        by_width.setdefault(entry['width'], entry)
+    entries = [by_width[width] for width in sorted(by_width)]
+    default = renditions['sizes'].get(size) or entries[-1]
+    attrs.update(width=default['width'], height=default['height'], sizes=sizes, srcset=_srcset(entries, 'jpeg'))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img src="{}"{}></picture>',
+        _srcset(entries, 'webp'), sizes, default_storage.url(default['jpeg']), flatatt(attrs),
+    )
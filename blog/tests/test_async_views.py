@@ -0,0 +1,101 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from blog import async_views, views
+from blog.models import Comment, Post, Reaction, Subscription
+
+
+class AsyncRoutingTests(TestCase):
+    """Las vistas async solo se enrutan bajo ASGI (myblog/urls_async.py)."""
+
+    def test_asgi_urlconf_serves_async_views(self):
+        for name, sync_view, async_view in [
+            ('/post/s/', views.post_detail, async_views.post_detail),
+            ('/post/1/react/like/', views.toggle_reaction, async_views.toggle_reaction),
+            ('/comment/1/vote/up/', views.toggle_vote, async_views.toggle_vote),
+        ]:
+            self.assertIs(resolve(name).func, sync_view)
+            self.assertIs(resolve(name, urlconf='myblog.urls_async').func, async_view)
+        self.assertIs(resolve('/search/', urlconf='myblog.urls_async').func, views.search_posts)
+
+    def test_asgi_handler_uses_async_urlconf(self):
+        from myblog.handlers import BlogASGIHandler
+        scope = {'type': 'http', 'method': 'GET', 'path': '/post/s/', 'query_string': b'', 'headers': []}
+        request, _ = BlogASGIHandler().create_request(scope, None)
+        self.assertEqual(request.urlconf, 'myblog.urls_async')
+
+
+@override_settings(ROOT_URLCONF='myblog.urls_async')
+class AsyncViewTests(TestCase):
+    """Las vistas async servidas por el manejador ASGI (AsyncClient)."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        self.post = Post.objects.create(title='t', slug='s', author=self.author, content='c', published=True)
+        self.comment = Comment.objects.create(
+            post=self.post, user=self.author, name='autor', email='a@x.com', content='hola', is_approved=True,
+        )
+        Subscription.objects.create(user=self.user, author=self.author)
+        self.async_client.force_login(self.user)
+
+    async def react(self, reaction_type, **extra):
+        return await self.async_client.post(reverse('blog:toggle_reaction', args=[self.post.pk, reaction_type]), **extra)
+
+    async def test_toggle_reaction(self):
+        response = await self.react('like')
+        self.assertEqual(response.json()['action'], 'added')
+        response = await self.react('love')
+        self.assertEqual(response.json()['counts'], {'like': 0, 'love': 1, 'haha': 0, 'wow': 0})
+        response = await self.react('love', headers={'HX-Request': 'true'})
+        self.assertContains(response, 'id="reactions-area"')
+        post = await Post.objects.aget(pk=self.post.pk)
+        self.assertEqual(post.reaction_counts, {'like': 0, 'love': 0, 'haha': 0, 'wow': 0})
+        self.assertEqual((await self.react('nope')).status_code, 400)
+
+    async def test_one_reaction_per_user(self):
+        await self.react('like')
+        await self.react('love')
+        self.assertEqual(await Reaction.objects.filter(post=self.post, user=self.user).acount(), 1)
+
+    async def test_toggle_vote(self):
+        url = reverse('blog:vote_comment', args=[self.comment.pk, 'up'])
+        self.assertEqual((await self.async_client.post(url)).json(), {'up': 1, 'down': 0, 'total': 1, 'current': 1})
+        self.assertEqual((await self.async_client.post(url)).json(), {'up': 0, 'down': 0, 'total': 0, 'current': 0})
+        response = await self.async_client.post(reverse('blog:vote_comment', args=[self.comment.pk, 'down']))
+        self.assertEqual(response.json()['total'], -1)
+        response = await self.async_client.post(reverse('blog:vote_comment', args=[self.comment.pk + 1, 'up']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_get_is_not_allowed(self):
+        url = reverse('blog:toggle_reaction', args=[self.post.pk, 'like'])
+        self.assertEqual((await self.async_client.get(url)).status_code, 405)
+        url = reverse('blog:vote_comment', args=[self.comment.pk, 'up'])
+        self.assertEqual((await self.async_client.get(url)).status_code, 405)
+        self.assertFalse(await Reaction.objects.filter(post=self.post).aexists())
+
+    async def test_anonymous_is_redirected_to_login(self):
+        response = await AsyncClient().post(reverse('blog:toggle_reaction', args=[self.post.pk, 'like']))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('blog:login'), response['Location'])
+
+    @override_settings(BLOG_RATELIMITS={'toggle_reaction': '2/m'})
+    async def test_ratelimit(self):
+        statuses = [(await self.react('like')).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(BLOG_PERF_SERVER_TIMING=True)
+    async def test_post_detail(self):
+        response = await self.async_client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        self.assertContains(response, 'hola')
+        self.assertTrue(response.context['is_subscribed'])
+        # las consultas del ORM async, en otro hilo, cuentan en la medición de la petición
+        queries = int(re.search(r'desc="(\d+) consultas"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+        response = await self.async_client.get(reverse('blog:post_detail', args=['no-existe']))
+        self.assertEqual(response.status_code, 404)
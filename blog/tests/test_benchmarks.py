@@ -0,0 +1,103 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog.benchmarks import datagen, results
+from blog.models import Comment, Post, Reaction
+
+
+class DataGenerationTests(TestCase):
+    def fingerprint(self):
+        posts = Post.objects.filter(slug__startswith=datagen.PREFIX).order_by('slug')
+        return (
+            list(posts.values_list('slug', 'title', 'like_count', 'rating_sum', 'published')),
+            list(Comment.objects.filter(post__in=posts).order_by('id').values_list('content', 'score')),
+        )
+
+    def test_same_seed_same_data(self):
+        created = datagen.generate('tiny', seed=7)
+        first = self.fingerprint()
+        self.assertEqual(created['posts'], 20)
+        # contadores escritos junto al post coherentes con las filas
+        post = Post.objects.filter(slug__startswith=datagen.PREFIX).order_by('-like_count').first()
+        self.assertEqual(post.like_count, Reaction.objects.filter(post=post, type='like').count())
+
+        datagen.generate('tiny', seed=7)
+        self.assertEqual(self.fingerprint(), first)
+        datagen.generate('tiny', seed=8)
+        self.assertNotEqual(self.fingerprint(), first)
+
+        datagen.clear()
+        self.assertFalse(datagen.exists())
+        self.assertFalse(Post.objects.filter(slug__startswith=datagen.PREFIX).exists())
+
+
+class BenchViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        datagen.generate('tiny', seed=1)
+
+    def test_writes_json_and_compares_with_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'views.json'
+            call_command('bench_views', '--iterations', '3', '--warmup', '1', '--output', str(output), stdout=StringIO())
+            data = json.loads(output.read_text())
+            self.assertEqual(data['meta']['kind'], 'views')
+            for name in ('post_list', 'post_detail', 'search_posts', 'toggle_reaction', 'toggle_vote'):
+                self.assertEqual(data['results'][name]['count'], 3)
+                self.assertEqual(set(data['results'][name]['statuses']), {'200'})
+                self.assertGreater(data['results'][name]['queries'], 0)
+
+            # una consulta de menos en la línea base es una regresión
+            data['results']['post_detail']['queries'] -= 1
+            output.write_text(json.dumps(data))
+            with self.assertRaises(CommandError):
+                call_command('bench_views', '--iterations', '3', '--scenario', 'post_detail',
+                             '--baseline', str(output), '--threshold', '100', stdout=StringIO())
+
+
+class BenchAsgiTests(TransactionTestCase):
+    # Los hilos del servidor WSGI y los de cada petición ASGI abren sus propias
+    # conexiones: los datos tienen que estar confirmados. Un solo cliente: la
+    # base de datos en memoria de los tests bloquea tablas enteras sin esperar.
+    def test_compares_wsgi_and_asgi(self):
+        cache.clear()
+        datagen.generate('tiny', seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'asgi.json'
+            call_command('bench_asgi', '--clients', '1', '--clicks', '3', '--threads', '2',
+                         '--output', str(output), stdout=StringIO())
+            data = json.loads(output.read_text())
+        self.assertEqual(data['meta']['kind'], 'asgi')
+        for scenario in ('toggle_reaction', 'toggle_vote', 'post_detail'):
+            for server in ('wsgi', 'asgi'):
+                row = data['results'][f'{scenario}:{server}']
+                self.assertEqual(row['statuses'], {'200': 3})
+                self.assertIn('p99_ms', row)
+                self.assertGreater(row['rps'], 0)
+
+
+class BenchSearchTests(TestCase):
+    def test_tags_are_read_once_per_batch(self):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('bench_search', '--posts', '20', '--batch-size', '10', '--queries', '2', stdout=StringIO())
+        tag_reads = [q for q in ctx.captured_queries
+                     if q['sql'].startswith('SELECT') and 'taggit_tag' in q['sql']]
+        self.assertEqual(len(tag_reads), 2)
+
+
+class CompareTests(TestCase):
+    def test_thresholds(self):
+        baseline = {'a': {'p50_ms': 10, 'p95_ms': 20, 'queries': 5, 'rps': 100}}
+        current = {'a': {'p50_ms': 11, 'p95_ms': 30, 'queries': 5, 'rps': 70}, 'nuevo': {'p50_ms': 1}}
+        regressions = {(name, metric) for name, metric, *_, regression in
+                       results.compare(current, baseline, threshold=0.25) if regression}
+        self.assertEqual(regressions, {('a', 'p95_ms'), ('a', 'rps')})
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
-from .models import Post, Comment, CommentVote
+from blog.models import Post, Comment, CommentVote
 
 class CommentVoteTests(TestCase):
     def setUp(self):
@@ -42,7 +42,7 @@ class CommentVoteTests(TestCase):
         CommentVote.objects.create(comment=self.comment2, user=self.user1, vote=1)
         CommentVote.objects.create(comment=self.comment2, user=self.user2, vote=1)
 
-        comments = self.post.comments.filter(active=True, is_approved=True).annotate(score=models.Sum('votes__vote')).order_by('-pinned', '-score', 'created_date')
+        comments = self.post.comments.filter(active=True, is_approved=True).order_by('-pinned', '-score', 'created_date')
 
         # El comentario pinned debe ir primero
         self.assertEqual(comments[0], self.comment2)
@@ -54,3 +54,46 @@ class CommentVoteTests(TestCase):
         response = self.client.post(reverse('blog:toggle_pin_comment', args=[self.comment1.id]))
         self.comment1.refresh_from_db()
         self.assertTrue(self.comment1.pinned)
+
+    def test_pin_keeps_vote_totals(self):
+        """Fijar o guardar un comentario cargado antes de un voto no pisa los totales"""
+        self.client.force_login(self.staff)
+        CommentVote.objects.create(comment=self.comment1, user=self.user2, vote=1)
+        self.client.post(reverse('blog:toggle_pin_comment', args=[self.comment1.id]))
+        comment = Comment.objects.get(pk=self.comment1.pk)
+        self.assertTrue(comment.pinned)
+        self.assertEqual((comment.up_votes, comment.score), (1, 1))
+        # self.comment2 tiene los totales de antes del voto
+        CommentVote.objects.create(comment=self.comment2, user=self.user1, vote=-1)
+        self.comment2.active = True
+        self.comment2.save()
+        self.comment2.refresh_from_db()
+        self.assertEqual((self.comment2.down_votes, self.comment2.score), (1, -1))
+
+    def test_detail_renders_vote_counters(self):
+        """voteComment() actualiza up-, down- y total-<id>: los tres existen"""
+        CommentVote.objects.create(comment=self.comment1, user=self.user2, vote=-1)
+        response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        for prefix, value in (('up', 0), ('down', 1), ('total', -1)):
+            self.assertContains(response, f'<span id="{prefix}-{self.comment1.id}">{value}</span>', html=True)
+
+    def test_toggle_vote_keeps_totals(self):
+        """Los totales materializados siguen los votos creados, cambiados y anulados"""
+        self.client.force_login(self.user2)
+        url_up = reverse('blog:vote_comment', args=[self.comment1.id, 'up'])
+        url_down = reverse('blog:vote_comment', args=[self.comment1.id, 'down'])
+
+        data = self.client.post(url_up).json()
+        self.assertEqual((data['up'], data['down'], data['total']), (1, 0, 1))
+
+        data = self.client.post(url_down).json()
+        self.assertEqual((data['up'], data['down'], data['total']), (0, 1, -1))
+
+        data = self.client.post(url_down).json()
+        self.assertEqual((data['up'], data['down'], data['total'], data['current']), (0, 0, 0, 0))
+
+    def test_delete_vote_updates_score(self):
+        vote = CommentVote.objects.create(comment=self.comment1, user=self.user2, vote=1)
+        vote.delete()
+        self.comment1.refresh_from_db()
+        self.assertEqual((self.comment1.up_votes, self.comment1.score), (0, 0))
@@ -0,0 +1,66 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.content import render, sanitize
+from blog.models import Post
+
+
+class SanitizeTests(TestCase):
+    def test_removes_scripts_handlers_and_javascript_urls(self):
+        html, text = sanitize(
+            '<p onclick="x()">Hola <script>alert(1)</script><a href="java&#x09;script:alert(1)">enlace</a>'
+            '<img src="/media/a.png" onerror="x()"><style>p{}</style></p>'
+        )
+        self.assertEqual(
+            html,
+            '<p>Hola <a rel="nofollow noopener">enlace</a><img src="/media/a.png" loading="lazy"></p>',
+        )
+        self.assertEqual(text, 'Hola enlace')
+
+    def test_unwraps_unknown_tags_and_closes_open_ones(self):
+        html, _ = sanitize('<div><p>uno <strong>dos</div><marquee>tres</marquee> &lt;b&gt;')
+        self.assertEqual(html, '<p>uno <strong>dostres &lt;b&gt;</strong></p>')
+
+    def test_summary_and_reading_time(self):
+        rendered = render('<p>' + 'palabra ' * 450 + '</p>')
+        self.assertEqual(rendered.reading_time, 3)
+        self.assertEqual(len(rendered.summary.split()), 30)
+        self.assertEqual(render('<p>x</p>', excerpt='<b>Mi resumen</b>').summary, 'Mi resumen')
+
+
+class PostRenderingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('autor', 'a@x.com', 'pwd')
+
+    def test_save_renders_and_detail_uses_sanitized_html(self):
+        post = Post.objects.create(
+            title='Post', author=self.user, published=True,
+            content='<h2>Título</h2><p>Texto<script>alert("x")</script></p>',
+        )
+        self.assertEqual(post.content_html, '<h2>Título</h2><p>Texto</p>')
+        self.assertEqual(post.content_text, 'Título Texto')
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, '<h2>Título</h2><p>Texto</p>', html=False)
+        self.assertNotContains(response, 'alert("x")')
+
+        post.content = '<p>Nuevo</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.summary, 'Nuevo')
+
+    def test_listing_defers_content(self):
+        Post.objects.create(title='Post', author=self.user, published=True, content='<p>Cuerpo</p>')
+        post = Post.objects.listing().get()
+        self.assertEqual(post.get_deferred_fields(), {'content', 'content_html', 'content_text'})
+        self.assertContains(self.client.get(reverse('blog:post_list')), 'Cuerpo')
+
+    def test_backfill_command(self):
+        post = Post.objects.create(title='Post', author=self.user, published=True, content='<p>Cuerpo</p>')
+        Post.objects.filter(pk=post.pk).update(content_html='', summary='')
+        call_command('render_post_content', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.summary), ('<p>Cuerpo</p>', 'Cuerpo'))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from myblog.sqlite3.base import _pragma
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_profile_applied_on_connect(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('solo SQLite')
+        profile = settings.SQLITE_PROFILES[settings.BLOG_SQLITE_PROFILE]
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], profile['pragmas']['busy_timeout'])
+        self.assertEqual(connection.transaction_mode, profile['transaction_mode'])
+
+
+class PragmaValidationTests(SimpleTestCase):
+    def test_only_identifiers_and_integers(self):
+        self.assertEqual(_pragma('journal_mode', 'WAL'), 'PRAGMA journal_mode = WAL')
+        self.assertEqual(_pragma('cache_size', -64000), 'PRAGMA cache_size = -64000')
+        for name, value in [
+            ('journal_mode', 'WAL; DROP TABLE blog_post'),
+            ('cache_size = 1; --', 1),
+            ('foreign_keys', True),
+            ('mmap_size', 1.5),
+        ]:
+            with self.assertRaises(ImproperlyConfigured):
+                _pragma(name, value)
@@ -0,0 +1,93 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from blog import feeds
+from blog.models import Post
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.posts = []
+        for i in range(3):
+            post = Post.objects.create(
+                title=f'Post {i}', author=self.author, published=True,
+                content='<p>Texto <strong>largo</strong> del post</p>',
+            )
+            post.tags.add('django')
+            self.posts.append(post)
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_rss_is_streamed_and_valid(self):
+        response, content = self.get(reverse('blog:feed_posts'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        channel = ElementTree.fromstring(content).find('channel')
+        titles = [item.findtext('title') for item in channel.findall('item')]
+        self.assertEqual(titles, ['Post 2', 'Post 1', 'Post 0'])
+        # sin resumen: texto plano, no el HTML de CKEditor
+        self.assertEqual(channel.find('item').findtext('description'), 'Texto largo del post')
+
+    def test_atom_author_and_tag_feeds(self):
+        for url in (
+            reverse('blog:feed_author_atom', args=['autor']),
+            reverse('blog:feed_tag_atom', args=['Django']),
+        ):
+            response, content = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            entries = ElementTree.fromstring(content).findall('{http://www.w3.org/2005/Atom}entry')
+            self.assertEqual(len(entries), 3)
+
+    def test_item_count_is_bounded(self):
+        feeds.FEED_ITEMS, old = 2, feeds.FEED_ITEMS
+        self.addCleanup(setattr, feeds, 'FEED_ITEMS', old)
+        _, content = self.get(reverse('blog:feed_posts'))
+        self.assertEqual(len(ElementTree.fromstring(content).find('channel').findall('item')), 2)
+
+    def test_conditional_get_returns_304(self):
+        response, _ = self.get(reverse('blog:feed_posts'))
+        etag = response['ETag']
+        response, _ = self.get(reverse('blog:feed_posts'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_is_not_hidden_by_if_modified_since(self):
+        response, _ = self.get(reverse('blog:feed_posts'))
+        self.assertNotIn('Last-Modified', response)
+        self.posts[0].title = 'Editado'
+        self.posts[0].save()
+        response, content = self.get(reverse('blog:feed_posts'), HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Editado', content)
+
+    @override_settings(ALLOWED_HOSTS=['uno.example.com', 'dos.example.com'])
+    def test_cached_feed_is_per_host(self):
+        url = reverse('blog:feed_posts')
+        self.get(url, HTTP_HOST='uno.example.com')
+        _, content = self.get(url, HTTP_HOST='dos.example.com')
+        self.assertIn(b'http://dos.example.com/', content)
+        self.assertNotIn(b'uno.example.com', content)
+
+    def test_rendered_feed_is_cached_until_a_post_changes(self):
+        url = reverse('blog:feed_author', args=['autor'])
+        _, first = self.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response, cached = self.get(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(cached, first)
+        self.assertFalse(any('blog_post"."content' in q['sql'] for q in ctx.captured_queries))
+
+        self.posts[0].title = 'Editado'
+        self.posts[0].save()
+        _, content = self.get(url)
+        self.assertIn(b'Editado', content)
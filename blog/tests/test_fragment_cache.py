@@ -0,0 +1,76 @@
+from io import StringIO
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from blog import fragments
+from blog.models import Post, Comment, Review, Reaction
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        self.post = Post.objects.create(
+            title="t", slug="s", author=self.user, content="<p>cuerpo original</p>", published=True
+        )
+
+    def get(self):
+        return self.client.get(self.post.get_absolute_url())
+
+    def test_second_view_hits_every_fragment(self):
+        self.get()
+        self.get()
+        for name, (hits, misses) in fragments.stats().items():
+            self.assertEqual((hits, misses), (1, 1), name)
+
+    def test_cached_view_skips_comment_and_rating_queries(self):
+        Comment.objects.create(post=self.post, user=self.user, content="hola", is_approved=True)
+        self.get()
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.get()
+        self.assertContains(r, "hola")
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('blog_comment', sql)
+        self.assertNotIn('blog_review', sql)
+
+    def test_changes_bump_version(self):
+        version = Post.objects.get(pk=self.post.pk).version
+        comment = Comment.objects.create(post=self.post, user=self.user, content="x", is_approved=True)
+        Review.objects.create(post=self.post, user=self.user, rating=4)
+        Reaction.objects.create(post=self.post, user=self.user, type='like')
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, version + 4)
+
+        self.post.content = "<p>cuerpo editado</p>"
+        self.post.save()
+        self.assertEqual(self.post.version, version + 5)
+
+    def test_edit_shows_new_body(self):
+        self.assertContains(self.get(), "cuerpo original")
+        self.post.content = "<p>cuerpo editado</p>"
+        self.post.save()
+        self.assertContains(self.get(), "cuerpo editado")
+
+    def test_save_does_not_overwrite_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Reaction.objects.create(post=self.post, user=self.user, type='wow')
+        stale.title = "nuevo"
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.wow_count), ("nuevo", 1))
+
+    def test_staff_comments_are_not_cached(self):
+        staff = User.objects.create_user('staff', 's@x.com', 'pwd', is_staff=True)
+        self.client.force_login(staff)
+        self.get()
+        self.assertEqual(fragments.stats()['comments'], (0, 0))
+
+    def test_stats_command(self):
+        self.get()
+        out = StringIO()
+        call_command('fragment_cache_stats', stdout=out)
+        self.assertIn('body: 0 aciertos, 1 fallos', out.getvalue())
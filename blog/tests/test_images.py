@@ -0,0 +1,71 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from blog.models import Post, Profile
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def upload(name='foto.png', size=(2000, 1000), mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 10, 10, 128) if mode == 'RGBA' else (200, 10, 10)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageRenditionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.client.login(username='autor', password='pwd')
+
+    def test_cover_upload_builds_renditions(self):
+        self.client.post(reverse('blog:post_create'), {
+            'title': 'Con portada', 'content': '<p>x</p>', 'excerpt': '', 'published': 'on', 'cover': upload(),
+        })
+        post = Post.objects.get()
+        self.assertEqual((post.cover_width, post.cover_height), (2000, 1000))
+        sizes = post.cover_renditions['sizes']
+        self.assertEqual(sizes['card']['width'], 800)
+        self.assertEqual(sizes['card']['height'], 400)
+        with post.cover.storage.open(sizes['thumb']['webp']) as handle:
+            self.assertEqual(Image.open(handle).size, (320, 160))
+
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '800w')
+
+    def test_small_avatar_is_not_upscaled(self):
+        self.client.post(reverse('blog:profile_edit'), {'bio': 'hola', 'avatar': upload('a.png', (100, 100), 'RGB')})
+        profile = Profile.objects.get(user=self.user)
+        widths = {entry['width'] for entry in profile.avatar_renditions['sizes'].values()}
+        self.assertEqual(widths, {64, 100})
+
+        html = Template('{% load responsive_images %}{% responsive_image p.avatar p.avatar_renditions sizes="30px" size="thumb" %}').render(Context({'p': profile}))
+        self.assertIn('width="64"', html)
+        self.assertEqual(html.count('100w'), 2)  # webp y jpeg, sin repetir anchos
+
+    def test_template_falls_back_to_original(self):
+        post = Post.objects.create(title='x', content='x', author=self.user, cover=upload())
+        html = Template('{% load responsive_images %}{% responsive_image p.cover p.cover_renditions %}').render(Context({'p': post}))
+        self.assertIn(post.cover.url, html)
+        self.assertNotIn('<picture>', html)
+
+    def test_backfill_command(self):
+        post = Post.objects.create(title='x', content='x', author=self.user, cover=upload())
+        call_command('build_image_renditions', '--workers', '1', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual(set(post.cover_renditions['sizes']), {'thumb', 'card', 'full'})
@@ -0,0 +1,62 @@
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from blog import views
+from blog.models import Post, Comment
+
+
+class ListingQueryAssertions:
+    """Helper: el número de consultas de una página no depende de cuántos posts muestra."""
+
+    def assertFixedQueriesPerPage(self, fetch, sizes=(1, 5, 10)):
+        counts = []
+        for size in sizes:
+            self.create_posts(size - Post.objects.filter(published=True).count())
+            with CaptureQueriesContext(connection) as ctx:
+                response = fetch()
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx))
+        self.assertEqual(
+            len(set(counts)), 1,
+            f"Consultas por tamaño de página: {dict(zip(sizes, counts))}"
+        )
+        return counts[0]
+
+
+class PostListingQueryTests(ListingQueryAssertions, TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.users = [User.objects.create_user(f'autor{i}', f'a{i}@x.com', 'pwd') for i in range(3)]
+
+    def create_posts(self, n):
+        start = Post.objects.count()
+        for i in range(start, start + n):
+            post = Post.objects.create(
+                title=f"Post {i}",
+                author=self.users[i % len(self.users)],
+                content="<p>Contenido</p>",
+                published=True,
+            )
+            post.tags.add('django', f'tema{i}')
+            Comment.objects.create(post=post, user=self.users[0], content="hola", is_approved=True)
+
+    def test_post_list_fixed_queries(self):
+        self.assertFixedQueriesPerPage(lambda: self.client.get(reverse('blog:post_list')))
+
+    def test_feed_author_fixed_queries(self):
+        cache.clear()
+        request = self.factory.get('/')
+        self.assertFixedQueriesPerPage(lambda: views.feed_author(request, 'autor0'))
+
+    def test_listing_counts_only_approved_comments(self):
+        self.create_posts(1)
+        post = Post.objects.get()
+        Comment.objects.create(post=post, user=self.users[1], content="pendiente")
+        self.assertEqual(Post.objects.listing().get().approved_comment_count, 1)
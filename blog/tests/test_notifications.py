@@ -0,0 +1,163 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from blog import notifications
+from blog.models import Post, Comment, Notification, Subscription
+
+
+class NotificationPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.user = User.objects.create_user('lector', 'l@x.com', 'pwd')
+        self.post = Post.objects.create(title="t", slug="s", author=self.author, content="c", published=True)
+
+    def test_mentions_are_resolved_in_bulk(self):
+        friends = [User.objects.create_user(f'amigo{i}', f'f{i}@x.com', 'pwd') for i in range(30)]
+        text = ' '.join(f'@{u.username}' for u in friends) + ' @amigo0 @autor @lector @nadie'
+        comment = Comment.objects.create(post=self.post, user=self.user, content=text)
+
+        with CaptureQueriesContext(connection) as ctx:
+            notifications.notify_comment(comment.pk)
+        self.assertLessEqual(len(ctx), 4)
+
+        # 30 menciones (sin duplicados, sin el autor, sin uno mismo) + aviso al autor
+        self.assertEqual(Notification.objects.filter(kind=Notification.MENTION).count(), 30)
+        self.assertEqual(Notification.objects.filter(user=self.author, kind=Notification.COMMENT).count(), 1)
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+
+    def test_add_comment_view_notifies(self):
+        self.client.login(username='lector', password='pwd')
+        self.client.post(reverse('blog:add_comment', args=[self.post.id]), {'content': 'hola @autor'})
+        self.assertEqual(Notification.objects.filter(user=self.author).count(), 1)
+
+    def test_reactions_are_coalesced(self):
+        notifications.notify_reaction(self.post.pk, self.user.pk)
+        Notification.objects.update(is_read=True)
+        notifications.notify_reaction(self.post.pk, self.user.pk)
+
+        notification = Notification.objects.get()
+        self.assertFalse(notification.is_read)
+
+        Notification.objects.update(created_at=notification.created_at - notifications.REACTION_WINDOW * 2)
+        notifications.notify_reaction(self.post.pk, self.user.pk)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_no_notification_for_own_post(self):
+        notifications.notify_reaction(self.post.pk, self.author.pk)
+        self.assertFalse(Notification.objects.exists())
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.user = User.objects.create_user('lector', 'l@x.com', 'pwd')
+        self.post = Post.objects.create(title="t", slug="s", author=self.author, content="c", published=True)
+        self.client.login(username='autor', password='pwd')
+
+    def comment(self, text='hola'):
+        comment = Comment.objects.create(post=self.post, user=self.user, content=text)
+        notifications.notify_comment(comment.pk)
+
+    def test_badge_counter_follows_creation_and_reads(self):
+        self.assertEqual(self.client.get(reverse('blog:post_list')).context['unread_count'], 0)
+        self.comment()
+        self.comment()
+        self.assertEqual(notifications.unread_count(self.author.pk), 2)
+
+        notification = Notification.objects.filter(user=self.author).first()
+        self.client.get(reverse('blog:open_notification', args=[notification.id]))
+        self.client.get(reverse('blog:open_notification', args=[notification.id]))
+        self.assertEqual(notifications.unread_count(self.author.pk), 1)
+
+    def test_cached_counter_avoids_count_query(self):
+        self.comment()
+        notifications.unread_count(self.author.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(notifications.unread_count(self.author.pk), 1)
+        self.assertEqual(len(ctx), 0)
+
+    @override_settings(CACHES={
+        **settings.CACHES,
+        'counters': {'BACKEND': 'myblog.cache.CounterDatabaseCache', 'LOCATION': 'blog_unread_test'},
+    })
+    def test_counter_lives_in_the_atomic_cache(self):
+        call_command('createcachetable', 'blog_unread_test', verbosity=0)
+        self.comment()
+        self.assertEqual(notifications.unread_count(self.author.pk), 1)
+        self.comment()
+        key = f'unread-count:{self.author.pk}'
+        self.assertEqual(caches['counters'].get(key), 2)
+        self.assertIsNone(caches['default'].get(key))
+
+    def test_mark_all_read(self):
+        for _ in range(3):
+            self.comment()
+        with CaptureQueriesContext(connection) as ctx:
+            notifications.mark_all_read(self.author.pk)
+        self.assertEqual([q['sql'].split()[0] for q in ctx.captured_queries], ['UPDATE'])
+        self.comment()
+        self.assertEqual(self.client.get(reverse('blog:mark_all_notifications_read')).status_code, 405)
+        self.assertEqual(notifications.unread_count(self.author.pk), 1)
+        r = self.client.post(reverse('blog:mark_all_notifications_read'))
+        self.assertRedirects(r, reverse('blog:notification_list'))
+        self.assertEqual(notifications.unread_count(self.author.pk), 0)
+
+    def test_inbox_is_paginated(self):
+        for _ in range(25):
+            self.comment()
+        r = self.client.get(reverse('blog:notification_list'))
+        self.assertEqual(len(r.context['page_obj']), 20)
+        r2 = self.client.get(reverse('blog:notification_list'), {'after': r.context['page_obj'].next_token})
+        self.assertEqual(len(r2.context['page_obj']), 5)
+        profile = self.client.get(reverse('blog:profile'))
+        self.assertEqual(len(profile.context['notifications']), 5)
+
+
+class PublishNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.readers = [User.objects.create_user(f'lector{i}', f'l{i}@x.com', 'pwd') for i in range(5)]
+        for reader in self.readers[:3]:
+            Subscription.objects.create(user=reader, author=self.author)
+        for reader in self.readers[2:]:
+            Subscription.objects.create(user=reader, tag='Django')
+        Subscription.objects.create(user=self.author, tag='django')  # a sí mismo no
+        self.post = Post.objects.create(title="Borrador", author=self.author, content="c")
+        self.post.tags.add('django')
+
+    def test_publish_notifies_author_and_tag_subscribers_once(self):
+        self.assertFalse(Notification.objects.exists())
+        self.post.publish()
+
+        notified = Notification.objects.filter(kind=Notification.PUBLISH)
+        self.assertCountEqual(notified.values_list('user__username', flat=True),
+                              [reader.username for reader in self.readers])
+        self.assertEqual(notifications.unread_count(self.readers[2].pk), 1)
+
+        # volver a guardar, despublicar y republicar o repetir la tarea no avisa otra vez
+        self.post.save()
+        self.post.published = False
+        self.post.save()
+        self.post.publish()
+        self.assertEqual(notifications.notify_subscribers(self.post.pk), 0)
+        self.assertEqual(notified.count(), 5)
+
+    def test_notifications_are_inserted_in_batches(self):
+        Post.objects.filter(pk=self.post.pk).update(published=True, published_date=self.post.created_date)
+        size, notifications.PUBLISH_BATCH_SIZE = notifications.PUBLISH_BATCH_SIZE, 2
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(notifications.notify_subscribers(self.post.pk), 5)
+        finally:
+            notifications.PUBLISH_BATCH_SIZE = size
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "blog_notification"')]
+        self.assertEqual(len(inserts), 3)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from blog.models import Post
+from blog.pagination import CursorPaginator
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        now = timezone.now()
+        # 23 posts; dos comparten fecha para probar el desempate por id
+        for i in range(23):
+            Post.objects.create(
+                title=f"Post {i}", author=self.user, content="c", published=True,
+                published_date=now - timedelta(hours=i if i != 5 else 4),
+            )
+        self.expected = list(Post.objects.filter(published=True).order_by('-published_date', '-id'))
+
+    def walk(self, paginator, direction='after', start=None):
+        page = paginator.get_page(start or {})
+        pages = [page]
+        while (page.has_next() if direction == 'after' else page.has_previous()):
+            token = page.next_token if direction == 'after' else page.previous_token
+            page = paginator.get_page({direction: token})
+            pages.append(page)
+        return pages
+
+    def test_forward_walk_covers_everything_once(self):
+        pages = self.walk(CursorPaginator(Post.objects.listing(), 10))
+        self.assertEqual([len(p) for p in pages], [10, 10, 3])
+        self.assertEqual([post for p in pages for post in p], self.expected)
+
+    def test_backward_from_last_page(self):
+        pages = self.walk(CursorPaginator(Post.objects.listing(), 10), 'before', {'last': '1'})
+        self.assertFalse(pages[0].has_next())
+        self.assertEqual([post for p in reversed(pages) for post in p], self.expected)
+
+    def test_invalid_token_returns_first_page(self):
+        page = CursorPaginator(Post.objects.listing(), 10).get_page({'after': 'no-es-un-token'})
+        self.assertEqual(list(page), self.expected[:10])
+
+    def test_published_posts_always_have_date(self):
+        post = Post.objects.create(title="Sin fecha", author=self.user, content="c", published=True)
+        self.assertIsNotNone(post.published_date)
+        draft = Post.objects.create(title="Borrador", author=self.user, content="c")
+        draft.published = True  # como hace PostAdmin.list_editable
+        draft.save()
+        self.assertIsNotNone(draft.published_date)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Post.objects.filter(pk=post.pk).update(published_date=None)
+
+    def test_backfill_published_dates(self):
+        post = Post.objects.create(title="Antiguo", author=self.user, content="c")
+        # una fila de antes de la restricción: publicada y sin fecha
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA ignore_check_constraints = ON')
+            try:
+                Post.objects.filter(pk=post.pk).update(published=True)
+            finally:
+                cursor.execute('PRAGMA ignore_check_constraints = OFF')
+        self.assertTrue(Post.objects.filter(pk=post.pk, published=True, published_date__isnull=True).exists())
+        call_command('backfill_published_dates', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.published_date, post.created_date)
+        self.assertFalse(Post.objects.filter(published=True, published_date__isnull=True).exists())
+
+    def test_deep_page_does_not_count(self):
+        page = CursorPaginator(Post.objects.listing(), 10).get_page({})
+        with CaptureQueriesContext(connection) as ctx:
+            CursorPaginator(Post.objects.listing(), 10).get_page({'after': page.next_token})
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('COUNT(*)', sql.replace('COUNT("blog_comment"', ''))
+        self.assertNotIn('OFFSET', sql)
+
+    def test_views_render_with_cursor(self):
+        r = self.client.get(reverse('blog:post_list'))
+        self.assertContains(r, 'after=')
+        r2 = self.client.get(reverse('blog:post_list'), {'after': r.context['page_obj'].next_token})
+        self.assertEqual(r2.status_code, 200)
+        self.assertEqual(list(r2.context['page_obj']), self.expected[10:20])
+        r3 = self.client.get(reverse('blog:search_posts'), {'q': 'Post 1'})
+        self.assertEqual(r3.status_code, 200)
@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Post
+from myblog import perf
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('autor', password='x')
+        self.post = Post.objects.create(title='Medido', content='c', author=author, published=True)
+
+    @override_settings(BLOG_PERF_SERVER_TIMING=True)
+    def test_server_timing_and_window(self):
+        response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+        self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        samples = perf.window.samples()['blog:post_detail']
+        self.assertEqual(len(samples), 2)
+        self.assertGreater(perf.summary(samples)['queries_max'], 0)
+
+        out = StringIO()
+        call_command('perf_report', '--json', '--view', 'blog:post_detail', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['blog:post_detail']['count'], 2)
+        self.assertEqual(report['blog:post_detail']['budget'], 10)
+
+        call_command('perf_report', '--reset', stdout=StringIO())
+        self.assertEqual(perf.window.samples(), {})
+
+    def test_server_timing_only_for_staff_by_default(self):
+        url = reverse('blog:post_detail', args=[self.post.slug])
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(User.objects.create_user('lector', password='x'))
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.assertIn('Server-Timing', self.client.get(url))
+        with self.settings(DEBUG=True):
+            self.client.logout()
+            self.assertIn('Server-Timing', self.client.get(url))
+
+    @override_settings(BLOG_QUERY_BUDGETS={'blog:post_detail': 0})
+    def test_budget_fails_in_tests(self):
+        with self.assertRaisesMessage(perf.QueryBudgetExceeded, 'blog:post_detail'):
+            self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+
+    @override_settings(BLOG_QUERY_BUDGETS={'blog:post_detail': 0}, BLOG_QUERY_BUDGET_STRICT=False)
+    def test_budget_warns_in_production(self):
+        with self.assertLogs('myblog.perf', 'WARNING') as logs:
+            response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['event'], 'query_budget')
+
+
+@override_settings(CACHES={
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'perf-shared'},
+    'tiered': {'BACKEND': 'myblog.cache.TieredCache', 'LOCATION': 'perf-tiered', 'OPTIONS': {'SHARED': 'shared'}},
+})
+class MeasureTests(TestCase):
+    def test_counts_queries_and_cache(self):
+        tiered = caches['tiered']
+        tiered.clear()
+        with perf.measure('bloque') as measurement:
+            list(Post.objects.all())
+            tiered.get('post:1')
+            tiered.set('post:1', 1)
+            tiered.get('post:1')
+        self.assertEqual(measurement.queries, 1)
+        self.assertEqual((measurement.cache_hits, measurement.cache_misses), (1, 1))
+        self.assertGreater(measurement.duration, 0)
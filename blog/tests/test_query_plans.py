@@ -0,0 +1,48 @@
+import re
+from unittest import skipUnless
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db import connection
+from blog.models import Post
+from blog.pagination import CursorPaginator
+
+FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Los planes se comprueban con EXPLAIN QUERY PLAN de SQLite')
+class ListingQueryPlanTests(TestCase):
+    """Las consultas de listados deben resolverse con índices, sin recorrer y ordenar toda la tabla."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        for i in range(30):
+            post = Post.objects.create(title=f"Post {i}", author=self.user, content="c", published=i % 3 != 0)
+            post.tags.add('django')
+        self.paginator = CursorPaginator(Post.objects.listing(), 10)
+
+    def assertIndexedPlan(self, queryset, allow_sort=False):
+        plan = queryset.explain()
+        scans = FULL_SCAN.findall(plan)
+        self.assertFalse(scans, f"Recorrido completo de {scans}:\n{plan}")
+        if not allow_sort:
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f"Ordenación sin índice:\n{plan}")
+
+    def test_post_list_first_page(self):
+        self.assertIndexedPlan(self.paginator._ordered(True)[:11])
+
+    def test_post_list_deep_page_seeks_index(self):
+        token = self.paginator.get_page({}).next_token
+        qs = self.paginator._ordered(True).filter(self.paginator._seek(self.paginator._parse(token), True))[:11]
+        self.assertIndexedPlan(qs)
+        self.assertIn('post_timeline_idx (published_date<?)', qs.explain())
+
+    def test_post_list_last_page(self):
+        self.assertIndexedPlan(self.paginator._ordered(False)[:11])
+
+    def test_author_feed(self):
+        self.assertIndexedPlan(Post.objects.listing().filter(author=self.user)[:20])
+
+    def test_tag_page(self):
+        # el orden de los posts de una etiqueta se hace en memoria, pero sin recorrer blog_post
+        qs = CursorPaginator(Post.objects.listing().filter(tags__slug='django'), 10)._ordered(True)[:11]
+        self.assertIndexedPlan(qs, allow_sort=True)
@@ -0,0 +1,74 @@
+import math
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import ranking
+from blog.models import Comment, CommentVote, Post, Reaction, Review
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('autor', password='x')
+        self.reader = User.objects.create_user('lector', password='x')
+        self.post = Post.objects.create(title='Caliente', content='c', author=self.author, published=True)
+
+    def score(self, post=None):
+        return Post.objects.values_list('hot_score', flat=True).get(pk=(post or self.post).pk)
+
+    def test_publish_sets_initial_score(self):
+        formula = ranking.get_formula()
+        self.assertAlmostEqual(self.score(), formula.point(ranking.PUBLISH, self.post.published_date))
+        draft = Post.objects.create(title='Borrador', content='c', author=self.author)
+        self.assertIsNone(self.score(draft))
+
+    def test_incremental_matches_recompute(self):
+        Reaction.objects.create(post=self.post, user=self.reader, type='like')
+        comment = Comment.objects.create(post=self.post, user=self.reader, content='hola', active=True)
+        Review.objects.create(post=self.post, user=self.reader, rating=4)
+        CommentVote.objects.create(user=self.author, comment=comment, vote=CommentVote.UP)
+        incremental = self.score()
+
+        Post.objects.filter(pk=self.post.pk).update(hot_score=0)
+        events, fixed = ranking.recompute()
+        self.assertEqual((events, fixed), (5, 1))
+        self.assertAlmostEqual(self.score(), incremental, places=6)
+
+    def test_removing_event_restores_score(self):
+        before = self.score()
+        reaction = Reaction.objects.create(post=self.post, user=self.reader, type='love')
+        self.assertGreater(self.score(), before)
+        reaction.delete()
+        self.assertAlmostEqual(self.score(), before, places=6)
+
+    def test_recent_activity_ranks_first(self):
+        old = Post.objects.create(
+            title='Antiguo', content='c', author=self.author, published=True,
+            published_date=timezone.now() - timedelta(days=10),
+        )
+        ranking.recompute()
+        self.assertGreater(self.score(), self.score(old))
+        # muchas reacciones viejas no superan a un post nuevo
+        formula = ranking.get_formula()
+        accumulators = {}
+        ranking.accumulate(ranking.REACTION, [(old.pk, old.published_date)] * 100, formula, accumulators)
+        self.assertLess(formula.finish(accumulators[old.pk]), self.score())
+
+    def test_accumulate_is_log_sum(self):
+        formula = ranking.get_formula()
+        when = timezone.now()
+        accumulators = {}
+        ranking.accumulate(ranking.REACTION, [(1, when)] * 4, formula, accumulators)
+        self.assertAlmostEqual(formula.finish(accumulators[1]), formula.point(ranking.REACTION, when) + math.log2(4))
+
+    def test_trending_view_orders_by_score(self):
+        other = Post.objects.create(title='Otro', content='c', author=self.author, published=True)
+        for i in range(3):
+            user = User.objects.create_user(f'fan{i}', password='x')
+            Reaction.objects.create(post=self.post, user=user, type='like')
+        response = self.client.get(reverse('blog:trending'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post.pk for post in response.context['page_obj']], [self.post.pk, other.pk])
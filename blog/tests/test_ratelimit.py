@@ -0,0 +1,169 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import ratelimit
+from blog.models import Comment, Post
+
+FILE_CACHE_DIR = tempfile.mkdtemp(prefix='blog-ratelimit-')
+
+
+def shared_caches(backend, location):
+    return {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': backend, 'LOCATION': location},
+    }
+
+
+class RateParsingTests(TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('5/30s'), (5, 30))
+        self.assertEqual(ratelimit.parse_rate('100/h'), (100, 3600))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('diez por minuto')
+
+
+class SlidingWindowMixin:
+    """Se ejecuta contra una caché compartida entre procesos (fichero o base de datos)."""
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_limit_within_window(self):
+        for _ in range(3):
+            self.assertIsNone(ratelimit.hit('scope', 'u1', '3/m', now=600))
+        # llena hasta 600 + 60 y la ventana anterior pesa hasta que quede hueco: 680
+        self.assertEqual(ratelimit.hit('scope', 'u1', '3/m', now=610), 70)
+        # otro usuario tiene su propio contador
+        self.assertIsNone(ratelimit.hit('scope', 'u2', '3/m', now=610))
+
+    def test_previous_window_weighs_in(self):
+        for _ in range(3):
+            ratelimit.hit('scope', 'u1', '3/m', now=650)
+        # a mitad de la ventana siguiente aún pesan 1.5 peticiones: cabe una
+        self.assertIsNone(ratelimit.hit('scope', 'u1', '3/m', now=690))
+        wait = ratelimit.hit('scope', 'u1', '3/m', now=690)
+        self.assertEqual(wait, 10)
+        self.assertIsNone(ratelimit.hit('scope', 'u1', '3/m', now=690 + wait))
+
+    def test_rejected_hits_are_not_counted(self):
+        ratelimit.hit('scope', 'u1', '1/m', now=600)
+        for _ in range(5):
+            self.assertIsNotNone(ratelimit.hit('scope', 'u1', '1/m', now=601))
+        self.assertEqual(caches['shared'].get('rl:scope:u1:10'), 1)
+
+
+@override_settings(
+    CACHES=shared_caches('django.core.cache.backends.filebased.FileBasedCache', FILE_CACHE_DIR),
+    BLOG_RATELIMIT_CACHE='shared',
+)
+class FileCacheRateLimitTests(SlidingWindowMixin, TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(FILE_CACHE_DIR, ignore_errors=True)
+
+
+@override_settings(
+    CACHES=shared_caches('django.core.cache.backends.db.DatabaseCache', 'blog_ratelimit_test'),
+    BLOG_RATELIMIT_CACHE='shared',
+)
+class DatabaseCacheRateLimitTests(SlidingWindowMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('createcachetable', 'blog_ratelimit_test', verbosity=0)
+
+
+@override_settings(
+    CACHES=shared_caches('myblog.cache.CounterDatabaseCache', 'blog_counter_test'),
+    BLOG_RATELIMIT_CACHE='shared',
+)
+class CounterDatabaseCacheRateLimitTests(SlidingWindowMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('createcachetable', 'blog_counter_test', verbosity=0)
+
+    def test_incr_locks_the_row_before_reading(self):
+        cache = caches['shared']
+        cache.add('n', 0, 60)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(cache.incr('n'), 1)
+        statements = [query['sql'].split()[0].upper() for query in queries]
+        statements = [statement for statement in statements if statement not in ('SAVEPOINT', 'RELEASE')]
+        self.assertEqual(statements[0], 'UPDATE')
+        self.assertEqual(cache.decr('n', 3), -2)
+        self.assertEqual(cache.get('n'), -2)
+
+    def test_incr_keeps_expiry_and_needs_the_key(self):
+        cache = caches['shared']
+        cache.add('n', 5, 60)
+        cache.incr('n')
+        with mock.patch('django.core.cache.backends.db.tz_now', return_value=timezone.now() + timedelta(seconds=90)):
+            self.assertIsNone(cache.get('n'))
+        with self.assertRaises(ValueError):
+            cache.incr('otra')
+        cache.add('caducada', 1, 1)
+        with mock.patch('myblog.cache.tz_now', return_value=timezone.now() + timedelta(seconds=5)):
+            with self.assertRaises(ValueError):
+                cache.incr('caducada')
+
+
+@override_settings(BLOG_RATELIMITS={'add_comment': '2/m', 'toggle_vote': '1/m', 'login': '1/m'})
+class RateLimitedViewsTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('u', password='pwd')
+        self.post = Post.objects.create(title='t', content='c', author=self.user, published=True)
+        self.client.login(username='u', password='pwd')
+
+    def test_comment_limit_returns_page_with_retry_after(self):
+        url = reverse('blog:add_comment', args=[self.post.id])
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'content': 'hola'}).status_code, 302)
+        response = self.client.post(url, {'content': 'hola'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertContains(response, 'demasiadas peticiones', status_code=429)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_vote_limit_is_json(self):
+        comment = Comment.objects.create(post=self.post, user=self.user, content='c')
+        url = reverse('blog:vote_comment', args=[comment.id, 'up'])
+        self.client.post(url)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['error'], 'Too Many Requests')
+
+    def test_vote_and_reaction_refuse_get(self):
+        # un GET no pasa el límite (solo cuenta POST): no debe cambiar nada
+        comment = Comment.objects.create(post=self.post, user=self.user, content='c')
+        url = reverse('blog:vote_comment', args=[comment.id, 'up'])
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url).status_code, 200)
+        comment.refresh_from_db()
+        self.assertEqual(comment.up_votes, 1)
+        url = reverse('blog:toggle_reaction', args=[self.post.id, 'like'])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertFalse(self.post.reactions.exists())
+
+    def test_login_counts_only_posts_per_ip(self):
+        self.client.logout()
+        url = reverse('blog:login')
+        self.client.post(url, {'username': 'u', 'password': 'mal'})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.post(url, {'username': 'u', 'password': 'pwd'}).status_code, 429)
+        self.assertEqual(self.client.post(url, REMOTE_ADDR='10.0.0.2', data={'username': 'u', 'password': 'pwd'}).status_code, 302)
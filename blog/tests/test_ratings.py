@@ -0,0 +1,74 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from blog.models import Post, Review
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.users = [User.objects.create_user(f'u{i}', f'u{i}@x.com', 'pwd') for i in range(3)]
+        self.post = Post.objects.create(title='Post', content='x', author=self.author, published=True)
+
+    def rating(self):
+        self.post.refresh_from_db()
+        return self.post.rating_sum, self.post.rating_count, round(self.post.rating_score, 4)
+
+    def test_create_update_delete_keep_aggregates(self):
+        first = Review.objects.create(post=self.post, user=self.users[0], rating=5)
+        Review.objects.create(post=self.post, user=self.users[1], rating=3)
+        self.assertEqual(self.rating(), (8, 2, round((5 * 3.0 + 8) / 7, 4)))
+        self.assertEqual(self.post.average_rating(), 4)
+
+        first.rating = 1
+        first.save()
+        self.assertEqual(self.rating()[:2], (4, 2))
+
+        Review.objects.get(pk=first.pk).delete()
+        first = Review.objects.get(user=self.users[1])
+        first.delete()
+        self.assertEqual(self.rating(), (0, 0, 0))
+
+    def test_save_does_not_overwrite_aggregates(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Review.objects.create(post=self.post, user=self.users[0], rating=4)
+        stale.title = 'Editado'
+        stale.save()
+        self.assertEqual(self.rating()[:2], (4, 1))
+
+    def test_duplicate_review_is_caught_by_constraint(self):
+        self.client.login(username='u0', password='pwd')
+        url = reverse('blog:add_review', args=[self.post.slug])
+        self.client.post(url, {'rating': 4})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(url, {'rating': 2})
+        # sin comprobación previa: el INSERT falla por unique_together
+        review_selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'blog_review' in q['sql']]
+        self.assertEqual(review_selects, [])
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertContains(response, 'Ya has hecho una review')
+        self.assertEqual(self.rating()[:2], (4, 1))
+
+    def test_top_rated_uses_bayesian_score(self):
+        many = Post.objects.create(title='Muchas', content='x', author=self.author, published=True)
+        for user in self.users:
+            Review.objects.create(post=many, user=user, rating=5)
+        # un único 5 pesa menos que tres 5
+        Review.objects.create(post=self.post, user=self.users[0], rating=5)
+        Post.objects.create(title='Sin reviews', content='x', author=self.author, published=True)
+
+        response = self.client.get(reverse('blog:top_rated'))
+        titles = [post.title for post in response.context['page_obj']]
+        self.assertEqual(titles, ['Muchas', 'Post'])
+
+    def test_rebuild_command(self):
+        Review.objects.create(post=self.post, user=self.users[0], rating=4)
+        Post.objects.filter(pk=self.post.pk).update(rating_sum=0, rating_count=0, rating_score=0)
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        self.assertEqual(self.rating()[:2], (4, 1))
@@ -0,0 +1,94 @@
+from io import StringIO
+from unittest import mock
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.query import QuerySet
+from blog.forms import PostForm
+from blog.models import Post, Reaction
+
+class ReactionCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        self.post = Post.objects.create(
+            title="t",
+            slug="s",
+            author=self.author,
+            content="c",
+            published=True
+        )
+        self.client.login(username='u', password='pwd')
+
+    def react(self, reaction_type):
+        cache.clear()  # evita el cooldown entre clicks
+        return self.client.post(reverse('blog:toggle_reaction', args=[self.post.id, reaction_type]))
+
+    def test_simultaneous_first_clicks(self):
+        # el otro clic inserta su reacción después de que esta petición no la encuentre
+        first = QuerySet.first
+
+        def missed(queryset):
+            if queryset.model is Reaction and not Reaction.objects.exists():
+                Reaction.objects.create(post=self.post, user=self.user, type='like')
+                return None
+            return first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', missed):
+            r = self.react('love')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()['action'], 'changed')
+        self.assertEqual(r.json()['counts'], {'like': 0, 'love': 1, 'haha': 0, 'wow': 0})
+
+    def test_toggle_updates_counters(self):
+        r = self.react('like')
+        self.assertEqual(r.json()['counts']['like'], 1)
+
+        # Cambiar de tipo mueve el contador
+        r = self.react('love')
+        self.assertEqual(r.json()['counts'], {'like': 0, 'love': 1, 'haha': 0, 'wow': 0})
+
+        # Quitar la reacción
+        r = self.react('love')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.reaction_counts, {'like': 0, 'love': 0, 'haha': 0, 'wow': 0})
+
+    def test_rebuild_command_fixes_drift(self):
+        Reaction.objects.create(post=self.post, user=self.user, type='wow')
+        Post.objects.filter(pk=self.post.pk).update(wow_count=7, like_count=3)
+
+        call_command('rebuild_reaction_counts', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.wow_count, 1)
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_detail_does_not_count_reactions(self):
+        Reaction.objects.create(post=self.post, user=self.user, type='haha')
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(self.post.get_absolute_url())
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['counts']['haha'], 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'blog_reaction' in q['sql']])
+
+    def test_editing_post_keeps_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        editing = Post.objects.get(pk=self.post.pk)  # como edit_post: instancia leída al abrir el form
+        self.react('like')
+        form = PostForm({'title': 't editado', 'content': 'c', 'excerpt': '', 'published': 'on'}, instance=editing)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 't editado')
+        self.assertEqual(self.post.like_count, 1)
+
+        # una instancia vieja tampoco pisa el contador al guardarse
+        stale.title = 'otra vez'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
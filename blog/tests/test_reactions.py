@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from blog.models import Post, Reaction
@@ -45,6 +45,7 @@ class ReactionToggleTests(TestCase):
         r = self.client.post(url)
         self.assertEqual(r.status_code, 400)
 
+    @override_settings(BLOG_RATELIMITS={'toggle_reaction': '1/m'})
     def test_rate_limit(self):
         url = reverse('blog:toggle_reaction', args=[self.post.id, 'like'])
 
@@ -55,6 +56,7 @@ class ReactionToggleTests(TestCase):
         # Segundo intento inmediato → bloqueado (429)
         r2 = self.client.post(url)
         self.assertEqual(r2.status_code, 429)
+        self.assertIn('Retry-After', r2)
 
     def test_unique_constraint(self):
         url = reverse('blog:toggle_reaction', args=[self.post.id, 'like'])
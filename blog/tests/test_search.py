@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from io import StringIO
+from blog import search
+from blog.models import Post
+
+
+class SearchBackendMixin:
+    backend_class = None
+
+    def setUp(self):
+        search._backend = self.backend_class()
+        self.addCleanup(setattr, search, '_backend', None)
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        self.django = Post.objects.create(
+            title="Aprendiendo Django", author=self.user, published=True,
+            content="<p>Los <strong>modelos</strong> de Django y el ORM.</p>",
+        )
+        self.python = Post.objects.create(
+            title="Notas de Python", author=self.user, published=True,
+            content="<p>Un poco de Django al final, pero sobre todo Python.</p>",
+        )
+        self.draft = Post.objects.create(
+            title="Borrador Django", author=self.user, published=False, content="<p>Django</p>",
+        )
+
+    def ids(self, query):
+        return [hit.post_id for hit in search.search_posts(query)]
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.ids('django'), [self.django.pk, self.python.pk])
+
+    def test_ignores_markup_and_accents(self):
+        self.assertEqual(self.ids('strong'), [])
+        self.assertEqual(self.ids('módelos'), [self.django.pk])
+
+    def test_index_follows_saves_tags_and_deletes(self):
+        self.draft.publish()
+        self.assertIn(self.draft.pk, self.ids('borrador'))
+        self.python.tags.add('tutoriales')
+        self.assertEqual(self.ids('tutoriales'), [self.python.pk])
+        self.python.delete()
+        self.assertEqual(self.ids('tutoriales'), [])
+
+    def test_highlight_is_escaped(self):
+        Post.objects.create(title="xss", author=self.user, published=True, content="<p>&lt;script&gt; alerta</p>")
+        highlight = search.search_posts('alerta')[0].highlight
+        self.assertIn('<mark>alerta</mark>', highlight)
+        self.assertNotIn('<script>', highlight)
+
+
+class PythonSearchBackendTests(SearchBackendMixin, TestCase):
+    backend_class = search.PythonSearchBackend
+
+
+class SQLiteFTSBackendTests(SearchBackendMixin, TestCase):
+    backend_class = search.SQLiteFTSBackend
+
+    def test_no_ddl_outside_post_migrate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.python.title = 'Notas de Python 3'
+            self.python.save()
+            self.ids('python')
+            search.SQLiteFTSBackend.is_available()
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('CREATE')])
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        search._backend = None
+        self.user = User.objects.create_user('u', 'u@x.com', 'pwd')
+        for i in range(12):
+            Post.objects.create(title=f"Post {i}", author=self.user, published=True, content="<p>texto sobre Django</p>")
+
+    def test_search_view_paginates_ranked_results(self):
+        r = self.client.get(reverse('blog:search_posts'), {'q': 'django'})
+        self.assertEqual(len(r.context['page_obj']), 10)
+        self.assertContains(r, '<mark>')
+        r2 = self.client.get(reverse('blog:search_posts'), {'q': 'django', 'after': r.context['page_obj'].next_token})
+        self.assertEqual(len(r2.context['page_obj']), 2)
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('12 post(s)', out.getvalue())
+        self.assertEqual(len(search.search_posts('django')), 12)
@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post, SlugCounter
+from blog.slugs import allocate_slugs
+
+
+class SlugAllocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='autor', password='12345')
+
+    def create(self, title, **kwargs):
+        return Post.objects.create(title=title, content='-', author=self.user, **kwargs)
+
+    def test_same_title_gets_numbered_slugs(self):
+        slugs = [self.create('Hola mundo').slug for _ in range(3)]
+        self.assertEqual(slugs, ['hola-mundo', 'hola-mundo-1', 'hola-mundo-2'])
+
+    def test_counter_starts_after_existing_slugs(self):
+        Post.objects.bulk_create([
+            Post(title='x', slug='hola', content='-', author=self.user),
+            Post(title='x', slug='hola-7', content='-', author=self.user),
+            Post(title='x', slug='hola-mundo', content='-', author=self.user),
+        ])
+        self.assertEqual(self.create('Hola').slug, 'hola-8')
+        self.assertEqual(SlugCounter.objects.get(base='hola').last, 8)
+
+    def test_slug_queries_do_not_grow_with_duplicates(self):
+        for _ in range(5):
+            self.create('Repetido')
+        with CaptureQueriesContext(connection) as ctx:
+            self.create('Repetido')
+        counter_queries = [q for q in ctx.captured_queries if 'blog_slugcounter' in q['sql']]
+        post_lookups = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT') and '"blog_post"."slug" =' in q['sql']]
+        # UPDATE + SELECT del contador y ninguna búsqueda de slugs ocupados
+        self.assertEqual(len(counter_queries), 2)
+        self.assertEqual(post_lookups, [])
+
+    def test_retries_when_slug_taken(self):
+        self.create('Choque')
+        # alguien ocupó a mano el siguiente número
+        Post.objects.bulk_create([Post(title='x', slug='choque-1', content='-', author=self.user)])
+        self.assertEqual(self.create('Choque').slug, 'choque-2')
+
+    def test_explicit_slug_is_kept(self):
+        self.assertEqual(self.create('Otro', slug='a-mano').slug, 'a-mano')
+
+    def test_allocate_slugs_in_bulk(self):
+        self.create('Lote')
+        slugs = allocate_slugs(['Lote', 'Otro lote', 'Lote'])
+        self.assertEqual(slugs, ['lote-1', 'otro-lote', 'lote-2'])
@@ -0,0 +1,84 @@
+import threading
+import time
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+TIERED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-shared'},
+    'tiered': {
+        'BACKEND': 'myblog.cache.TieredCache',
+        'LOCATION': 'tiered-test',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 0.2, 'STALE_TIMEOUT': 5, 'STATS_INTERVAL': 0},
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['tiered']
+        self.shared = caches['shared']
+        self.cache.clear()
+        self.cache.reset_stats()
+
+    def test_local_tier_fronts_shared(self):
+        self.cache.set('post:1', 'uno')
+        # otro proceso lo borra de la compartida: aquí sigue en memoria un momento
+        self.shared.delete(self.cache.make_key('post:1'))
+        self.assertEqual(self.cache.get('post:1'), 'uno')
+        time.sleep(0.25)
+        self.assertIsNone(self.cache.get('post:1'))
+
+    def test_counters_skip_local_copy(self):
+        self.cache.set('count:1', 1)
+        self.assertEqual(self.cache.get('count:1'), 1)
+        self.assertEqual(self.cache.incr('count:1', 5), 6)
+        self.assertEqual(self.cache.get('count:1'), 6)
+
+    def test_bump_namespace_invalidates_its_keys(self):
+        self.cache.set_many({'fragment:a': 1, 'fragment:b': 2, 'page:a': 3})
+        self.cache.bump_namespace('fragment')
+        self.assertEqual(self.cache.get_many(['fragment:a', 'fragment:b', 'page:a']), {'page:a': 3})
+
+    def test_stale_while_revalidate(self):
+        self.assertEqual(self.cache.get_or_set('count:posts', lambda: 'viejo', 0.05), 'viejo')
+        time.sleep(0.1)
+        lock = self.cache.make_key('count:posts') + ':lock'
+        self.shared.add(lock, 1)  # otro proceso está recalculando
+        self.assertEqual(self.cache.get_or_set('count:posts', lambda: 'nuevo', 60), 'viejo')
+        self.shared.delete(lock)
+        self.assertEqual(self.cache.get_or_set('count:posts', lambda: 'nuevo', 60), 'nuevo')
+        self.assertEqual(self.cache.stats()['count']['stale'], 1)
+
+    def test_single_recompute_under_concurrency(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'valor'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caches['tiered'].get_or_set('slow:key', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['valor'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_stats_command(self):
+        self.cache.set('page:1', 'x')
+        self.cache.get('page:1')
+        self.cache.get('page:2')
+        out = StringIO()
+        call_command('cache_stats', alias=['tiered'], stdout=out)
+        self.assertIn('page', out.getvalue())
+        self.assertIn('tasa de acierto 50.0%', out.getvalue())
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import timeline
+from blog.models import Post, Subscription, TimelineEntry
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autora', password='x')
+        self.reader = User.objects.create_user('lector', password='x')
+        self.other = User.objects.create_user('otro', password='x')
+
+    def post(self, title, author=None, days_ago=0, **kwargs):
+        return Post.objects.create(
+            title=title, content='c', author=author or self.author, published=True,
+            published_date=timezone.now() - timedelta(days=days_ago), **kwargs,
+        )
+
+    def entries(self, user):
+        return list(TimelineEntry.objects.filter(user=user).values_list('post__title', flat=True).order_by('-published_date'))
+
+    def test_publish_fans_out_to_author_and_tag_subscribers(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        Subscription.objects.create(user=self.other, tag='Django')
+        draft = Post.objects.create(title='Borrador', content='c', author=self.author)
+        draft.tags.add('django')
+        self.assertEqual(TimelineEntry.objects.count(), 0)
+
+        draft.publish()
+        self.assertEqual(self.entries(self.reader), ['Borrador'])
+        self.assertEqual(self.entries(self.other), ['Borrador'])
+        self.assertEqual(self.entries(self.author), [])
+        # idempotente
+        self.assertEqual(timeline.fan_out(draft.pk), 2)
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+
+    def test_create_post_view_fans_out(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        self.client.login(username='autora', password='x')
+        self.client.post(reverse('blog:post_create'), {
+            'title': 'Nuevo', 'content': '<p>c</p>', 'published': 'on',
+        })
+        self.assertEqual(self.entries(self.reader), ['Nuevo'])
+
+    def test_unpublish_retracts(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        post = self.post('Publicado')
+        post.published = False
+        post.save()
+        self.assertEqual(self.entries(self.reader), [])
+
+    def test_subscribe_backfills_and_unsubscribe_prunes(self):
+        old = self.post('Viejo', days_ago=3)
+        old.tags.add('django')
+        self.post('Reciente', days_ago=1)
+        Subscription.objects.create(user=self.reader, tag='django')
+        subscription = Subscription.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.entries(self.reader), ['Reciente', 'Viejo'])
+
+        subscription.delete()
+        # "Viejo" sigue llegando por la etiqueta
+        self.assertEqual(self.entries(self.reader), ['Viejo'])
+
+    @override_settings(BLOG_TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_merged_on_read(self):
+        star = User.objects.create_user('estrella', password='x')
+        Subscription.objects.create(user=self.reader, author=star)
+        Subscription.objects.create(user=self.other, author=star)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        cache.clear()  # fuentes populares
+
+        titles = []
+        for day in range(6):
+            author = star if day % 2 else self.author
+            titles.append(self.post(f'Post {day}', author=author, days_ago=day).title)
+        self.assertFalse(TimelineEntry.objects.filter(post__author=star).exists())
+
+        self.client.login(username='lector', password='x')
+        url = reverse('blog:timeline')
+        with self.settings(BLOG_TIMELINE_FANOUT_LIMIT=1):
+            paginator = timeline.TimelinePaginator(self.reader, 4)
+            first = paginator.get_page({})
+            second = paginator.get_page({'after': first.next_token})
+            back = paginator.get_page({'before': second.previous_token})
+        self.assertEqual([p.title for p in first] + [p.title for p in second], titles)
+        self.assertFalse(second.has_next())
+        self.assertEqual([p.title for p in back], titles[:4])
+
+        response = self.client.get(url)
+        self.assertEqual([p.title for p in response.context['page_obj']], titles)
+
+    def test_timeline_requires_login(self):
+        response = self.client.get(reverse('blog:timeline'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,84 @@
+import io
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from blog.models import Comment, Post, Reaction, Review
+from blog.transfer import PostImporter, export_records, read_jsonl, write_jsonl
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('autor', 'a@x.com', 'pwd')
+        self.reader = User.objects.create_user('lector', 'l@x.com', 'pwd')
+        post = Post.objects.create(title='Original', content='<p>Hola</p>', author=self.author, published=True)
+        post.tags.add('django', 'python')
+        Comment.objects.create(post=post, user=self.reader, name='Lector', email='l@x.com', content='Bien', is_approved=True)
+        Review.objects.create(post=post, user=self.reader, rating=4)
+        Reaction.objects.create(post=post, user=self.reader, type='love')
+
+    def export(self):
+        stream = io.StringIO()
+        write_jsonl(export_records(), stream)
+        stream.seek(0)
+        return list(read_jsonl(stream))
+
+    def test_round_trip_into_empty_database(self):
+        records = self.export()
+        Post.objects.all().delete()
+
+        stats = PostImporter(batch_size=2).run(iter(records))
+
+        post = Post.objects.get(slug='original')
+        self.assertEqual(stats.posts, 1)
+        self.assertEqual(sorted(post.tags.names()), ['django', 'python'])
+        self.assertEqual(post.comments.get().user, self.reader)
+        self.assertEqual(post.reviews.get().rating, 4)
+        # contadores calculados sin las señales de Reaction
+        self.assertEqual(post.love_count, 1)
+        self.assertEqual(post.reactions.get().created_at.isoformat(), records[0]['reactions'][0]['created_at'])
+
+    def test_existing_slugs_are_skipped(self):
+        stats = PostImporter().run(iter(self.export()))
+        self.assertEqual((stats.posts, stats.skipped), (0, 1))
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_new_posts_get_bulk_slugs_and_users(self):
+        records = [
+            {'title': 'Original', 'author': 'nuevo', 'content': 'x', 'published': True,
+             'reactions': [{'user': 'nuevo', 'type': 'like'}, {'user': 'nuevo', 'type': 'like'}]},
+            {'title': 'Original', 'author': 'nuevo', 'content': 'y'},
+        ]
+        stats = PostImporter(create_users=True).run(iter(records))
+        self.assertEqual(stats.users_created, 1)
+        slugs = sorted(Post.objects.filter(author__username='nuevo').values_list('slug', flat=True))
+        self.assertEqual(slugs, ['original-1', 'original-2'])
+        self.assertEqual(Post.objects.get(slug='original-1').like_count, 1)
+        self.assertIsNotNone(Post.objects.get(slug='original-1').published_date)
+
+    def test_one_reaction_per_user(self):
+        records = [{'title': 'Varias', 'author': 'autor', 'content': 'x', 'published': True, 'reactions': [
+            {'user': 'lector', 'type': 'like'}, {'user': 'lector', 'type': 'love'}, {'user': 'autor', 'type': 'love'},
+        ]}]
+        stats = PostImporter().run(iter(records))
+        post = Post.objects.get(slug='varias')
+        self.assertEqual(stats.reactions, 2)
+        self.assertEqual(post.reactions.get(user=self.reader).type, 'like')
+        self.assertEqual(post.reaction_counts, {'like': 1, 'love': 1, 'haha': 0, 'wow': 0})
+
+    def test_unknown_author_is_skipped_without_create_users(self):
+        stats = PostImporter().run(iter([{'title': 'X', 'author': 'nadie', 'content': 'x'}]))
+        self.assertEqual((stats.posts, stats.skipped), (0, 1))
+
+    def test_commands(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = f'{tmp.name}/posts.jsonl.gz'
+        call_command('export_posts', path, stderr=io.StringIO())
+        Post.objects.all().delete()
+        out = io.StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('filas/s', out.getvalue())
+        self.assertTrue(Post.objects.filter(slug='original').exists())
@@ -0,0 +1,216 @@
+"""Portada "siguiendo": posts de los autores y etiquetas a los que está suscrito cada usuario.
+
+Al publicarse un post se copia una fila ``TimelineEntry`` a cada suscriptor
+del autor o de sus etiquetas (``fan_out``, desde la cola de tareas y en lotes
+de ``bulk_create``). Leer la portada es así un rango del índice
+``(user, -published_date, -post)``, sin OR de autores y ``tags__name__in``
+sobre toda la tabla de posts.
+
+Los autores y etiquetas con más de ``BLOG_TIMELINE_FANOUT_LIMIT`` suscriptores
+no se copian (serían decenas de miles de filas por post). Al leer, sus posts
+salen de los índices por autor/etiqueta y se mezclan con las filas del usuario
+(fan-out en lectura, ``TimelinePaginator``).
+"""
+import heapq
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+from .models import Post, Subscription, TimelineEntry
+from .pagination import CursorPage, CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'BLOG_TIMELINE_BATCH_SIZE', 1000)
+# Posts recientes que se copian a la portada al suscribirse
+BACKFILL = 50
+POPULAR_TIMEOUT = 10 * 60
+
+
+def fanout_limit():
+    return getattr(settings, 'BLOG_TIMELINE_FANOUT_LIMIT', 10_000)
+
+
+# ==================== FUENTES POPULARES ====================
+def popular_sources():
+    """(ids de autores, etiquetas en minúsculas) con más suscriptores que el límite.
+
+    Se cachea unos minutos; escritura y lectura usan el mismo resultado, así que
+    un post está copiado o se lee del índice, no las dos cosas (salvo al cambiar
+    de lado una fuente, y la mezcla quita duplicados).
+    """
+    limit = fanout_limit()
+    key = f'timeline:popular:{limit}'
+    popular = cache.get(key)
+    if popular is None:
+        authors = (
+            Subscription.objects.filter(author__isnull=False)
+            .values('author').annotate(total=Count('id')).filter(total__gt=limit)
+            .values_list('author', flat=True).order_by()
+        )
+        tags = (
+            Subscription.objects.filter(tag__isnull=False).annotate(name=Lower('tag'))
+            .values('name').annotate(total=Count('id')).filter(total__gt=limit)
+            .values_list('name', flat=True).order_by()
+        )
+        popular = (set(authors), set(tags))
+        cache.set(key, popular, POPULAR_TIMEOUT)
+    return popular
+
+
+# ==================== ESCRITURA (fan-out) ====================
+def _copy(subscribers, post):
+    """Copia ``post`` a las portadas de ``subscribers`` (Subscription) por lotes. Devuelve cuántas."""
+    recipients = (
+        subscribers.exclude(user_id=post.author_id)
+        .values_list('user_id', flat=True).distinct().order_by('user_id')
+    )
+    total, last = 0, 0
+    while True:
+        # keyset por user_id: lecturas acotadas y ningún cursor abierto mientras se escribe
+        users = list(recipients.filter(user_id__gt=last)[:BATCH_SIZE])
+        if not users:
+            return total
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post.pk, published_date=post.published_date) for user_id in users],
+            ignore_conflicts=True,
+        )
+        total += len(users)
+        last = users[-1]
+
+
+def fan_out(post_id, tag_names=None):
+    """Copia un post publicado a las portadas de sus suscriptores (idempotente).
+
+    Con ``tag_names`` solo a los suscriptores de esas etiquetas (etiquetas
+    añadidas después de publicar).
+    """
+    post = Post.objects.filter(pk=post_id, published=True).only('id', 'author_id', 'published_date').first()
+    if post is None:
+        return 0
+    popular_authors, popular_tags = popular_sources()
+    sources = Q()
+    if tag_names is None:
+        tag_names = list(post.tags.values_list('name', flat=True))
+        if post.author_id not in popular_authors:
+            sources |= Q(author_id=post.author_id)
+    for name in tag_names:
+        if name.lower() not in popular_tags:
+            sources |= Q(tag__iexact=name)
+    if not sources:
+        return 0
+
+    started = time.perf_counter()
+    total = _copy(Subscription.objects.filter(sources), post)
+    elapsed = time.perf_counter() - started
+    logger.info('Post %s copiado a %s portadas en %.2fs (%.0f filas/s)',
+                post_id, total, elapsed, total / elapsed if elapsed else 0)
+    return total
+
+
+def retract(post_id):
+    """Quita de las portadas un post que ha dejado de estar publicado."""
+    TimelineEntry.objects.filter(post_id=post_id).delete()
+
+
+def redate(post_id, published_date):
+    TimelineEntry.objects.filter(post_id=post_id).update(published_date=published_date)
+
+
+def backfill(user_id, author_id=None, tag=None):
+    """Copia a la portada de un nuevo suscriptor los últimos posts de la fuente."""
+    popular_authors, popular_tags = popular_sources()
+    if author_id in popular_authors or (tag and tag.lower() in popular_tags):
+        return  # se leen del índice
+    posts = Post.objects.filter(published=True).exclude(author_id=user_id)
+    posts = posts.filter(author_id=author_id) if author_id else posts.filter(tags__name__iexact=tag)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, published_date=published_date)
+            for post_id, published_date in posts.order_by('-published_date', '-id').values_list('id', 'published_date')[:BACKFILL]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id=None, tag=None):
+    """Quita de la portada los posts de una fuente que el usuario ha dejado de seguir,
+    salvo los que sigan llegando por otra suscripción."""
+    following = Subscription.objects.filter(user_id=user_id)
+    authors = list(following.filter(author__isnull=False).values_list('author_id', flat=True))
+    tags = [name.lower() for name in following.filter(tag__isnull=False).values_list('tag', flat=True)]
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    entries = entries.filter(post__author_id=author_id) if author_id else entries.filter(post__tags__name__iexact=tag)
+    if authors or tags:
+        keep = Q(post__author_id__in=authors)
+        for name in tags:
+            keep |= Q(post__tags__name__iexact=name)
+        entries = entries.exclude(keep)
+    entries.delete()
+
+
+# ==================== LECTURA ====================
+class TimelinePaginator(CursorPaginator):
+    """Portada de ``user`` por cursor sobre (published_date, id).
+
+    Mezcla (``heapq.merge``) las filas de ``TimelineEntry`` del usuario con los
+    posts de cada fuente popular que sigue, leídos de sus índices por autor o
+    etiqueta; cada flujo aporta como mucho una página.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.listing(), per_page, keys=('published_date', 'id'))
+        self.user = user
+
+    def _streams(self):
+        yield TimelineEntry.objects.filter(user=self.user), ('published_date', 'post_id')
+        popular_authors, popular_tags = popular_sources()
+        if not (popular_authors or popular_tags):
+            return
+        for author_id, tag in Subscription.objects.filter(user=self.user).values_list('author_id', 'tag'):
+            if author_id in popular_authors:
+                yield Post.objects.filter(published=True, author_id=author_id), ('published_date', 'id')
+            elif tag and tag.lower() in popular_tags:
+                yield Post.objects.filter(published=True, tags__name__iexact=tag), ('published_date', 'id')
+
+    def _post_ids(self, cursor, forward, limit):
+        streams = []
+        for queryset, keys in self._streams():
+            if cursor is not None:
+                queryset = queryset.filter(self._seek(cursor, forward, keys))
+            ordering = [f'-{key}' if forward else key for key in keys]
+            streams.append(list(queryset.order_by(*ordering).values_list(*keys)[:limit]))
+
+        ids, seen = [], set()
+        for _, post_id in heapq.merge(*streams, reverse=forward):
+            if post_id not in seen:
+                seen.add(post_id)
+                ids.append(post_id)
+                if len(ids) == limit:
+                    break
+        return ids
+
+    def _load(self, ids):
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def get_page(self, params):
+        after = self._parse(params.get('after', ''))
+        before = self._parse(params.get('before', ''))
+        limit = self.per_page + 1
+
+        if after is not None:
+            ids = self._post_ids(after, True, limit)
+            return CursorPage(self._load(ids[:self.per_page]), self, len(ids) > self.per_page, True)
+
+        if before is not None or params.get('last'):
+            ids = self._post_ids(before, False, limit)
+            has_previous = len(ids) > self.per_page
+            return CursorPage(self._load(ids[:self.per_page][::-1]), self, before is not None, has_previous)
+
+        ids = self._post_ids(None, True, limit)
+        return CursorPage(self._load(ids[:self.per_page]), self, len(ids) > self.per_page, False)
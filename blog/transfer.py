@@ -0,0 +1,344 @@
+"""Importación y exportación masiva de posts en JSONL.
+
+Cada línea es un post con sus etiquetas, comentarios, reviews y reacciones;
+los usuarios se identifican por ``username``. Tanto la lectura como la
+escritura van por lotes, así que la memoria no crece con el tamaño del corpus.
+
+La importación usa ``bulk_create``, que no dispara señales: los contadores de
+reacciones y ratings y la puntuación de tendencias se calculan aquí, el índice de búsqueda se actualiza por lotes y
+la caché de páginas se invalida al final. No se envían notificaciones.
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from taggit.models import Tag, TaggedItem
+
+from . import page_cache, ranking, search
+from .models import Comment, Post, Profile, Reaction, Review
+from .slugs import allocate_slugs, reserve_slugs
+
+POST_FIELDS = ('title', 'slug', 'content', 'excerpt', 'created_date', 'published_date', 'published')
+COMMENT_FIELDS = ('name', 'email', 'content', 'created_date', 'active', 'is_approved', 'pinned')
+REACTION_TYPES = {key for key, _ in Reaction.REACTION_CHOICES}
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _parse_date(value):
+    return parse_datetime(value) if value else None
+
+
+# ==================== EXPORTACIÓN ====================
+def export_records(queryset=None, chunk_size=500):
+    """Genera un dict por post; se leen ``chunk_size`` posts por consulta."""
+    queryset = Post.objects.all() if queryset is None else queryset
+    posts = (
+        queryset.select_related('author')
+        .prefetch_related(
+            'tags',
+            Prefetch('comments', Comment.objects.select_related('user').order_by('pk')),
+            Prefetch('reviews', Review.objects.select_related('user').order_by('pk')),
+            Prefetch('reactions', Reaction.objects.select_related('user').order_by('pk')),
+        )
+        .order_by('pk')
+    )
+    for post in posts.iterator(chunk_size=chunk_size):
+        yield {
+            'title': post.title,
+            'slug': post.slug,
+            'author': post.author.username,
+            'content': post.content,
+            'excerpt': post.excerpt,
+            'cover': post.cover.name or None,
+            'created_date': _date(post.created_date),
+            'published_date': _date(post.published_date),
+            'published': post.published,
+            'tags': sorted(tag.name for tag in post.tags.all()),
+            'comments': [
+                {
+                    'user': comment.user.username if comment.user else None,
+                    **{name: getattr(comment, name) for name in COMMENT_FIELDS},
+                    'created_date': _date(comment.created_date),
+                }
+                for comment in post.comments.all()
+            ],
+            'reviews': [
+                {
+                    'user': review.user.username,
+                    'rating': review.rating,
+                    'comment': review.comment,
+                    'created_at': _date(review.created_at),
+                }
+                for review in post.reviews.all()
+            ],
+            'reactions': [
+                {'user': reaction.user.username, 'type': reaction.type, 'created_at': _date(reaction.created_at)}
+                for reaction in post.reactions.all()
+            ],
+        }
+
+
+def write_jsonl(records, stream):
+    total = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write('\n')
+        total += 1
+    return total
+
+
+# ==================== IMPORTACIÓN ====================
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f'Línea {number}: JSON no válido ({exc})') from exc
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@dataclass
+class ImportStats:
+    posts: int = 0
+    comments: int = 0
+    reviews: int = 0
+    reactions: int = 0
+    tags: int = 0
+    skipped: int = 0
+    users_created: int = 0
+    authors: set = field(default_factory=set)
+    tag_slugs: set = field(default_factory=set)
+
+    @property
+    def rows(self):
+        return self.posts + self.comments + self.reviews + self.reactions + self.tags
+
+
+class PostImporter:
+    """Importa lotes de registros (los que produce ``export_records``).
+
+    Los posts cuyo slug ya existe se saltan, así que repetir una importación no
+    duplica nada. Con ``create_users`` se crean los usuarios que falten (sin
+    contraseña utilizable); si no, se saltan los posts de autores desconocidos
+    y los comentarios, reviews y reacciones de usuarios desconocidos.
+    """
+
+    def __init__(self, batch_size=500, create_users=False, index=True):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.index = index
+        self.stats = ImportStats()
+        self.post_type = ContentType.objects.get_for_model(Post)
+
+    def run(self, records, progress=None):
+        for batch in batched(records, self.batch_size):
+            with transaction.atomic():
+                self.import_batch(batch)
+            if progress:
+                progress(self.stats)
+        page_cache.purge(
+            authors=self.stats.authors, tags=self.stats.tag_slugs, extra=[page_cache.ALL_POSTS]
+        )
+        return self.stats
+
+    # ---------- búsquedas por lote ----------
+    def _users(self, records):
+        names = set()
+        for record in records:
+            names.add(record['author'])
+            for key in ('comments', 'reviews', 'reactions'):
+                names.update(item['user'] for item in record.get(key, ()) if item.get('user'))
+        users = dict(User.objects.filter(username__in=names).values_list('username', 'pk'))
+        missing = names - users.keys()
+        if missing and self.create_users:
+            new_users = [User(username=name) for name in sorted(missing)]
+            for user in new_users:
+                user.set_unusable_password()
+            User.objects.bulk_create(new_users, batch_size=self.batch_size)
+            users.update(User.objects.filter(username__in=missing).values_list('username', 'pk'))
+            # bulk_create no dispara la señal que crea el perfil
+            Profile.objects.bulk_create([Profile(user_id=users[name]) for name in missing])
+            self.stats.users_created += len(missing)
+        return users
+
+    def _tags(self, records):
+        names = {name for record in records for name in record.get('tags', ())}
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+        missing = sorted(names - tags.keys())
+        if missing:
+            new_tags = [Tag(name=name, slug=Tag().slugify(name)) for name in missing]
+            taken = set(Tag.objects.filter(slug__in=[tag.slug for tag in new_tags]).values_list('slug', flat=True))
+            free, seen = [], set()
+            for tag in new_tags:
+                if tag.slug in taken or tag.slug in seen:
+                    # slug ocupado por otra etiqueta: taggit busca uno libre
+                    tag.slug = ''
+                    tag.save()
+                    tags[tag.name] = tag
+                else:
+                    seen.add(tag.slug)
+                    free.append(tag)
+            Tag.objects.bulk_create(free)
+            tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=[tag.name for tag in free]))
+        return tags
+
+    # ---------- lote ----------
+    def import_batch(self, records):
+        users = self._users(records)
+        tags = self._tags(records)
+        for record in records:
+            # sin tipos desconocidos ni filas que romperían la restricción unique:
+            # una reacción por usuario (la primera), los contadores salen de esta lista
+            valid = [item for item in record.get('reactions', ()) if item.get('type') in REACTION_TYPES]
+            record['reactions'] = list(self._unique(valid, users, ('user',)))
+            record['reviews'] = list(self._unique(record.get('reviews', ()), users, ('user',)))
+
+        wanted = [record['slug'] for record in records if record.get('slug')]
+        existing = set(Post.objects.filter(slug__in=wanted).values_list('slug', flat=True))
+        accepted, seen = [], set()
+        for record in records:
+            slug = record.get('slug')
+            if record['author'] not in users or (slug and (slug in existing or slug in seen)):
+                self.stats.skipped += 1
+                continue
+            if slug:
+                seen.add(slug)
+            accepted.append(record)
+        if not accepted:
+            return
+
+        # los slugs importados tal cual no deben volver a asignarse después
+        reserve_slugs(seen)
+        without_slug = [record for record in accepted if not record.get('slug')]
+        for record, slug in zip(without_slug, allocate_slugs([record['title'] for record in without_slug])):
+            record['slug'] = slug
+
+        posts = [self._post(record, users) for record in accepted]
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+
+        comments, reviews, reactions, tagged = [], [], [], []
+        for record, post in zip(accepted, posts):
+            self.stats.authors.add(post.author_id)
+            for name in record.get('tags', ()):
+                tagged.append(TaggedItem(tag=tags[name], content_type=self.post_type, object_id=post.pk))
+                self.stats.tag_slugs.add(tags[name].slug)
+            for item in record.get('comments', ()):
+                if item.get('user') and item['user'] not in users:
+                    continue
+                comments.append(Comment(
+                    post=post,
+                    user_id=users.get(item.get('user')),
+                    **{name: item[name] for name in COMMENT_FIELDS if name in item and name != 'created_date'},
+                    created_date=_parse_date(item.get('created_date')) or timezone.now(),
+                ))
+            for item in record['reviews']:
+                reviews.append(Review(
+                    post=post, user_id=users[item['user']], rating=item['rating'], comment=item.get('comment'),
+                    created_at=_parse_date(item.get('created_at')) or timezone.now(),
+                ))
+            for item in record['reactions']:
+                reactions.append(Reaction(
+                    post=post, user_id=users[item['user']], type=item['type'],
+                    created_at=_parse_date(item.get('created_at')) or timezone.now(),
+                ))
+
+        self._insert_with_dates(Comment, comments, 'created_date')
+        self._insert_with_dates(Review, reviews, 'created_at')
+        self._insert_with_dates(Reaction, reactions, 'created_at')
+        TaggedItem.objects.bulk_create(tagged, batch_size=self.batch_size)
+
+        if self.index:
+            published = Post.objects.filter(pk__in=[post.pk for post in posts if post.published])
+            search.get_backend().index_many(published.prefetch_related('tags'))
+
+        self.stats.posts += len(posts)
+        self.stats.comments += len(comments)
+        self.stats.reviews += len(reviews)
+        self.stats.reactions += len(reactions)
+        self.stats.tags += len(tagged)
+
+    def _post(self, record, users):
+        post = Post(author_id=users[record['author']], cover=record.get('cover') or None)
+        for name in POST_FIELDS:
+            if name in record:
+                value = record[name]
+                setattr(post, name, _parse_date(value) if name.endswith('_date') else value)
+        if post.created_date is None:
+            post.created_date = timezone.now()
+        if post.published and not post.published_date:
+            post.published_date = post.created_date
+        post.render_content()
+        # bulk_create no pasa por las señales que mantienen los contadores
+        counts = Counter(item['type'] for item in record['reactions'])
+        for key, total in counts.items():
+            setattr(post, Post.reaction_field(key), total)
+        post.rating_sum = sum(item['rating'] for item in record['reviews'])
+        post.rating_count = len(record['reviews'])
+        post.rating_score = Post.rating_score_for(post.rating_sum, post.rating_count)
+        if post.published:
+            post.hot_score = self._hot_score(post, record)
+        return post
+
+    @staticmethod
+    def _hot_score(post, record):
+        formula, accumulators = ranking.get_formula(), {}
+        ranking.accumulate(ranking.PUBLISH, [(None, post.published_date)], formula, accumulators)
+        for kind, key, date_field in (
+            (ranking.REACTION, 'reactions', 'created_at'),
+            (ranking.REVIEW, 'reviews', 'created_at'),
+            (ranking.COMMENT, 'comments', 'created_date'),
+        ):
+            rows = [
+                (None, _parse_date(item.get(date_field)) or timezone.now())
+                for item in record.get(key, ()) if item.get('active', True)
+            ]
+            ranking.accumulate(kind, rows, formula, accumulators)
+        return formula.finish(accumulators[None]) if accumulators else None
+
+    @staticmethod
+    def _unique(items, users, keys):
+        """Filas con usuario conocido y sin repetir la restricción unique."""
+        seen = set()
+        for item in items:
+            key = tuple(item[name] for name in keys)
+            if item['user'] in users and key not in seen:
+                seen.add(key)
+                yield item
+
+    def _insert_with_dates(self, model, objects, date_field):
+        # auto_now_add pisa la fecha en bulk_create; se restaura con un UPDATE
+        # preparado (executemany), mucho más barato que los CASE de bulk_update
+        dates = [getattr(obj, date_field) for obj in objects]
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        field = model._meta.get_field(date_field)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {quote(model._meta.db_table)} SET {quote(field.column)} = %s '
+                f'WHERE {quote(model._meta.pk.column)} = %s',
+                [(field.get_db_prep_value(value, connection), obj.pk) for obj, value in zip(objects, dates)],
+            )
+        for obj, value in zip(objects, dates):
+            setattr(obj, date_field, value)
@@ -16,6 +16,8 @@ urlpatterns = [
     path('profile/edit/', views.profile_edit, name='profile_edit'),
     path('profile/<str:username>/', views.profile, name='profile_user'),
     #Notifiaciones
+    path("notifications/", views.notification_list, name="notification_list"),
+    path("notifications/read-all/", views.mark_all_notifications_read, name="mark_all_notifications_read"),
     path("notifications/open/<int:notification_id>/", views.open_notification, name="open_notification"),
     # Comentarios
     path('comment/<int:comment_id>/approve/', views.approve_comment, name='approve_comment'),
@@ -32,6 +34,16 @@ urlpatterns = [
     # Tags y búsqueda
     path('tag/<slug:slug>/', views.posts_by_tag, name='posts_by_tag'),
     path('search/', views.search_posts, name='search_posts'),
+    path('top/', views.top_rated, name='top_rated'),
+    path('trending/', views.trending, name='trending'),
+    path('following/', views.timeline, name='timeline'),
+    # Feeds RSS y Atom
+    path('feed/', views.feed_posts, name='feed_posts'),
+    path('feed/atom/', views.feed_posts, {'format': 'atom'}, name='feed_posts_atom'),
+    path('feed/author/<str:username>/', views.feed_author, name='feed_author'),
+    path('feed/author/<str:username>/atom/', views.feed_author, {'format': 'atom'}, name='feed_author_atom'),
+    path('feed/tag/<str:tag>/', views.feed_tag, name='feed_tag'),
+    path('feed/tag/<str:tag>/atom/', views.feed_tag, {'format': 'atom'}, name='feed_tag_atom'),
     # CKEditor
     path('ckeditor5/', include('django_ckeditor_5.urls')),
     # redirige a tu propio perfil
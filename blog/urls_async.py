@@ -0,0 +1,18 @@
+"""Rutas del blog bajo ASGI: las de ``urls.py`` con las vistas de ``async_views``."""
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+_ASYNC_VIEWS = {
+    'post_detail': async_views.post_detail,
+    'vote_comment': async_views.toggle_vote,
+    'toggle_reaction': async_views.toggle_reaction,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), _ASYNC_VIEWS[pattern.name], pattern.default_args, name=pattern.name)
+    if getattr(pattern, 'name', None) in _ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
@@ -1,42 +1,50 @@
-from django.db.models import Avg, Q, Sum, Value as V, Count
-from django.db.models.functions import Coalesce
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
-from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_POST
+from django.urls import reverse
 from django.template.loader import render_to_string
 from .models import Post, Comment, Review, Reaction, CommentVote, Notification, Subscription, Profile
 from .forms import CommentForm, SignUpForm, ProfileForm, PostForm, ReviewForm
+from .pagination import CursorPaginator, RankedPaginator
+from .ratelimit import ratelimit
+from . import feeds, images, notifications, page_cache, search, tasks
+from .timeline import TimelinePaginator
 from taggit.models import Tag
-import re
-from django.utils.feedgenerator import Rss201rev2Feed
+from urllib.parse import urlencode
 
 User = get_user_model()
 
-# Cooldown en segundos entre reacciones (por usuario+post)
-REACTION_COOLDOWN = 2
+# Posts por página en los listados
+POSTS_PER_PAGE = 10
+
+# Notificaciones por página en la bandeja y en el perfil
+NOTIFICATIONS_PER_PAGE = 20
+PROFILE_NOTIFICATIONS = 5
 
 # ==================== POSTS ====================
 def post_list(request):
     """Lista de posts publicados"""
-    posts = Post.objects.filter(published=True).order_by('-published_date')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.listing()
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, count_cache_key='post-list-count')
+    page_obj = paginator.get_page(request.GET)
+    page_cache.depends(request, posts=[post.pk for post in page_obj], extra=[page_cache.ALL_POSTS])
     return render(request, 'blog/post_list.html', {'page_obj': page_obj})
 
 def post_detail(request, slug):
     """Detalle de un post con comentarios, reviews y reacciones"""
     post = get_object_or_404(Post, slug=slug, published=True)
+    page_cache.depends(request, posts=[post.pk], authors=[post.author_id])
     new_comment = None
 
-    average_rating = post.reviews.aggregate(Avg('rating'))['rating__avg']
-    counts = {key: post.reactions.filter(type=key).count() for key, _ in Reaction.REACTION_CHOICES}
+    # Lo que no depende del usuario se consulta de forma perezosa desde los
+    # fragmentos cacheados de la plantilla (ver blog/fragments.py)
+    counts = post.reaction_counts
 
     user_has_reviewed = request.user.is_authenticated and post.reviews.filter(user=request.user).exists()
 
@@ -53,11 +61,12 @@ def post_detail(request, slug):
         comment_form = CommentForm()
         review_form = ReviewForm()
 
-    comments = post.comments.filter(active=True, is_approved=True).annotate(
-        up_votes=Coalesce(Count('votes', filter=Q(votes__vote=1)), V(0)),
-        down_votes=Coalesce(Count('votes', filter=Q(votes__vote=-1)), V(0)),
-        total_score=Coalesce(Sum('votes__vote'), V(0)),
-    ).order_by('-pinned', '-total_score', 'created_date')
+    # up_votes/down_votes/score son columnas materializadas (ver comment_thread_idx)
+    comments = (
+        post.comments.filter(active=True, is_approved=True)
+        .select_related('user')
+        .order_by('-pinned', '-score', 'created_date')
+    )
 
     is_subscribed = False
     if request.user.is_authenticated and request.user != post.author:
@@ -70,7 +79,6 @@ def post_detail(request, slug):
         'new_comment': new_comment,
         'comment_form': comment_form,
         'review_form': review_form,
-        'average_rating': average_rating,
         'user_has_reviewed': user_has_reviewed,
         'counts': counts,
         'is_subscribed': is_subscribed,
@@ -85,6 +93,8 @@ def create_post(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if post.cover:
+                tasks.enqueue(images.process_post_cover, post.pk)
             messages.success(request, 'Post creado correctamente.')
             return redirect('blog:post_detail', slug=post.slug)
     else:
@@ -103,6 +113,8 @@ def edit_post(request, slug):
         form = PostForm(request.POST, request.FILES, instance=post)
         if form.is_valid():
             form.save()
+            if 'cover' in form.changed_data:
+                tasks.enqueue(images.process_post_cover, post.pk)
             messages.success(request, 'Post actualizado correctamente.')
             return redirect('blog:post_detail', slug=slug)
     else:
@@ -127,6 +139,7 @@ def delete_post(request, slug):
 
 # ==================== COMENTARIOS ====================
 @login_required
+@ratelimit('add_comment', key='user')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.method == 'POST':
@@ -138,28 +151,8 @@ def add_comment(request, post_id):
                 content=content
             )
 
-            # Notificación al autor
-            if request.user != post.author:
-                Notification.objects.create(
-                    user=post.author,
-                    origin_user=request.user,
-                    post=post,
-                    comment=comment,
-                    message=f"{request.user.username} comentó en tu post: {post.title}",
-                )
-
-            # Menciones @username
-            pattern = r"@(\w+)"
-            for username in re.findall(pattern, comment.content):
-                user = User.objects.filter(username=username).first()
-                if user and user != post.author:
-                    Notification.objects.create(
-                        user=user,
-                        origin_user=request.user,
-                        post=post,
-                        comment=comment,
-                        message=f"@{request.user.username} te mencionó en un comentario.",
-                    )
+            # Notificaciones al autor y a los @mencionados, fuera de la petición
+            tasks.enqueue(notifications.notify_comment, comment.pk)
 
             messages.success(request, "Tu comentario ha sido enviado exitosamente.")
         else:
@@ -182,7 +175,9 @@ def reject_comment(request, comment_id):
     messages.warning(request, "Comentario eliminado.")
     return redirect('blog:post_detail', pk=comment.post.id)
 
+@require_POST
 @login_required
+@ratelimit('toggle_vote', key='user', json=True)
 def toggle_vote(request, comment_id, vote_type):
     comment = get_object_or_404(Comment, id=comment_id)
     user = request.user
@@ -191,15 +186,18 @@ def toggle_vote(request, comment_id, vote_type):
     if value is None:
         return JsonResponse({"error": "Invalid vote type"}, status=400)
 
-    vote, created = CommentVote.objects.get_or_create(comment=comment, user=user, defaults={"vote": value})
-    if not created:
-        vote.vote = 0 if vote.vote == value else value
-        vote.save()
+    # Los totales de Comment se actualizan con deltas en las señales de CommentVote
+    with transaction.atomic():
+        vote, created = CommentVote.objects.select_for_update().get_or_create(
+            comment=comment, user=user, defaults={"vote": value}
+        )
+        if not created:
+            vote.vote = 0 if vote.vote == value else value
+            vote.save()
 
-    up_count = CommentVote.objects.filter(comment=comment, vote=1).count()
-    down_count = CommentVote.objects.filter(comment=comment, vote=-1).count()
+    comment.refresh_from_db(fields=["up_votes", "down_votes", "score"])
 
-    return JsonResponse({"up": up_count, "down": down_count, "current": vote.vote})
+    return JsonResponse({"up": comment.up_votes, "down": comment.down_votes, "total": comment.score, "current": vote.vote})
 
 @login_required
 def toggle_pin_comment(request, comment_id):
@@ -209,39 +207,41 @@ def toggle_pin_comment(request, comment_id):
     return redirect(comment.post.get_absolute_url())
 
 # ==================== REACCIONES ====================
+@require_POST
 @login_required
+@ratelimit('toggle_reaction', key='user', json=True)
 def toggle_reaction(request, post_id, reaction_type):
     post = get_object_or_404(Post, id=post_id)
     allowed = dict(Reaction.REACTION_CHOICES)
     if reaction_type not in allowed:
         return JsonResponse({"error": "Tipo de reacción inválido"}, status=400)
 
-    cache_key = f"reaction-cooldown:{request.user.id}:{post.id}"
-    if cache.get(cache_key):
-        return JsonResponse({"error": "Too Many Requests"}, status=429)
-    cache.set(cache_key, True, timeout=REACTION_COOLDOWN)
-
-    existing = Reaction.objects.filter(post=post, user=request.user).first()
-    if existing:
-        if existing.type == reaction_type:
-            existing.delete()
-            action = "removed"
-        else:
-            existing.type = reaction_type
-            existing.save()
-            action = "changed"
-    else:
-        Reaction.objects.create(post=post, user=request.user, type=reaction_type)
-        action = "added"
-        if request.user != post.author:
-            Notification.objects.create(
-                user=post.author,
-                origin_user=request.user,
-                post=post,
-                message=f"{request.user.username} reaccionó a tu post: {post.title}",
-            )
-
-    counts = {key: post.reactions.filter(type=key).count() for key, _ in Reaction.REACTION_CHOICES}
+    # Los contadores de Post se actualizan con F() desde las señales de Reaction
+    with transaction.atomic():
+        reactions = Reaction.objects.select_for_update().filter(post=post, user=request.user)
+        existing = reactions.first()
+        if existing is None:
+            # unique_together('post', 'user') detecta el primer clic simultáneo
+            try:
+                with transaction.atomic():
+                    Reaction.objects.create(post=post, user=request.user, type=reaction_type)
+            except IntegrityError:
+                existing = reactions.get()
+            else:
+                action = "added"
+                if request.user != post.author:
+                    tasks.enqueue(notifications.notify_reaction, post.pk, request.user.pk)
+        if existing is not None:
+            if existing.type == reaction_type:
+                existing.delete()
+                action = "removed"
+            else:
+                existing.type = reaction_type
+                existing.save()
+                action = "changed"
+
+    post.refresh_from_db(fields=[Post.reaction_field(key) for key, _ in Reaction.REACTION_CHOICES])
+    counts = post.reaction_counts
 
     wants_html = request.headers.get("HX-Request") == "true" or request.GET.get("format") == "html"
     if wants_html:
@@ -252,11 +252,9 @@ def toggle_reaction(request, post_id, reaction_type):
 
 # ==================== REVIEWS ====================
 @login_required
+@ratelimit('add_review', key='user')
 def add_review(request, slug):
     post = get_object_or_404(Post, slug=slug)
-    if Review.objects.filter(post=post, user=request.user).exists():
-        messages.warning(request, "Ya has hecho una review de este post.")
-        return redirect('blog:post_detail', slug=post.slug)
 
     if request.method == 'POST':
         form = ReviewForm(request.POST)
@@ -264,7 +262,13 @@ def add_review(request, slug):
             review = form.save(commit=False)
             review.user = request.user
             review.post = post
-            review.save()
+            # unique_together('post', 'user') detecta la review repetida
+            try:
+                with transaction.atomic():
+                    review.save()
+            except IntegrityError:
+                messages.warning(request, "Ya has hecho una review de este post.")
+                return redirect('blog:post_detail', slug=post.slug)
             messages.success(request, "Tu review ha sido enviada.")
             return redirect('blog:post_detail', slug=post.slug)
         else:
@@ -272,20 +276,49 @@ def add_review(request, slug):
     return redirect('blog:post_detail', slug=post.slug)
 
 # ==================== BÚSQUEDAS / TAGS ====================
+def top_rated(request):
+    """Posts mejor valorados según la media bayesiana guardada (rating_score)."""
+    posts = Post.objects.listing().filter(rating_count__gt=0)
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, keys=('rating_score', 'id'), count_cache_key='top-rated-count')
+    page_obj = paginator.get_page(request.GET)
+    return render(request, 'blog/top_rated.html', {'page_obj': page_obj})
+
+def trending(request):
+    """Posts en tendencia: interacciones recientes pesan más (ver blog/ranking.py)."""
+    posts = Post.objects.listing().filter(hot_score__isnull=False)
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, keys=('hot_score', 'id'), count_cache_key='trending-count')
+    page_obj = paginator.get_page(request.GET)
+    return render(request, 'blog/trending.html', {'page_obj': page_obj})
+
+@login_required
+def timeline(request):
+    """Portada personal: posts de los autores y etiquetas que sigue el usuario."""
+    page_obj = TimelinePaginator(request.user, POSTS_PER_PAGE).get_page(request.GET)
+    return render(request, 'blog/timeline.html', {'page_obj': page_obj})
+
 def posts_by_tag(request, slug):
     tag = get_object_or_404(Tag, slug=slug)
-    posts = Post.objects.filter(published=True, tags__slug=slug)
-    return render(request, 'blog/posts_by_tag.html', {'tag': tag, 'posts': posts})
+    posts = Post.objects.listing().filter(tags__slug=slug)
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, count_cache_key=f'tag-count:{tag.pk}')
+    page_obj = paginator.get_page(request.GET)
+    page_cache.depends(request, posts=[post.pk for post in page_obj], tags=[tag.slug])
+    return render(request, 'blog/posts_by_tag.html', {'tag': tag, 'page_obj': page_obj})
 
 def search_posts(request):
-    query = request.GET.get('q')
-    posts = Post.objects.filter(published=True)
-    if query:
-        posts = posts.filter(Q(title__icontains=query) | Q(content__icontains=query))
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return render(request, 'blog/search_results.html', {'posts': posts, 'query': query, 'page_obj': page_obj})
+    query = request.GET.get('q', '').strip()
+    hits = search.search_posts(query) if query else []
+    highlights = {hit.post_id: hit.highlight for hit in hits}
+
+    def load(ids):
+        posts = Post.objects.listing().in_bulk(ids)
+        for post in posts.values():
+            post.search_highlight = highlights.get(post.pk, '')
+        return posts
+
+    paginator = RankedPaginator([hit.post_id for hit in hits], POSTS_PER_PAGE, load)
+    page_obj = paginator.get_page(request.GET)
+    extra_query = urlencode({'q': query}) + '&' if query else ''
+    return render(request, 'blog/search_results.html', {'query': query, 'page_obj': page_obj, 'extra_query': extra_query})
 
 # ==================== PERFIL / USUARIO ====================
 @login_required
@@ -297,8 +330,10 @@ def profile_edit(request):
         form = ProfileForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
             form.save()
+            if 'avatar' in form.changed_data:
+                tasks.enqueue(images.process_avatar, profile.pk)
             messages.success(request, 'Perfil actualizado correctamente.')
-            return redirect('blog:profile', username=request.user.username)
+            return redirect('blog:profile_user', username=request.user.username)
     else:
         form = ProfileForm(instance=profile)
     return render(request, 'blog/profile_edit.html', {'form': form})
@@ -313,18 +348,24 @@ def profile(request, username=None):
     if request.user != profile_user:
         is_subscribed = Subscription.objects.filter(user=request.user, author=profile_user).exists()
 
-    notifications = request.user.notifications.order_by('-created_at') if request.user == profile_user else []
+    # solo las últimas; el resto está en la bandeja paginada (notification_list)
+    recent_notifications = []
+    if request.user == profile_user:
+        recent_notifications = request.user.notifications.select_related(
+            'origin_user', 'post', 'comment__post'
+        ).order_by('-created_at', '-id')[:PROFILE_NOTIFICATIONS]
 
     return render(request, "blog/profile.html", {
         "profile_user": profile_user,
         "profile": profile_obj,
-        "notifications": notifications,
+        "notifications": recent_notifications,
         "is_subscribed": is_subscribed,
         "subscriber_count": subscriber_count,
     })
 
 # ==================== SUSCRIPCIONES ====================
 @login_required
+@ratelimit('subscribe', key='user')
 def subscribe(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -341,12 +382,28 @@ def unsubscribe(request, username):
     return redirect('blog:profile_user', username=username)
 
 # ==================== NOTIFICACIONES ====================
+@login_required
+def notification_list(request):
+    """Bandeja de notificaciones paginada por cursor"""
+    queryset = request.user.notifications.select_related('origin_user', 'post', 'comment__post')
+    paginator = CursorPaginator(queryset, NOTIFICATIONS_PER_PAGE, keys=('created_at', 'id'))
+    page_obj = paginator.get_page(request.GET)
+    return render(request, 'blog/notifications.html', {'page_obj': page_obj})
+
+@require_POST
+@login_required
+def mark_all_notifications_read(request):
+    updated = notifications.mark_all_read(request.user.pk)
+    if updated:
+        messages.success(request, f"{updated} notificación(es) marcadas como leídas.")
+    return redirect('blog:notification_list')
+
 @login_required
 def open_notification(request, notification_id):
-    notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    if not notification.is_read:
-        notification.is_read = True
-        notification.save()
+    notification = get_object_or_404(
+        Notification.objects.select_related('post', 'comment__post'), id=notification_id, user=request.user
+    )
+    notifications.mark_read(notification)
 
     if notification.comment:
         comment = notification.comment
@@ -354,6 +411,7 @@ def open_notification(request, notification_id):
     return redirect(notification.post.get_absolute_url())
 
 # ==================== LOGIN / LOGOUT / SIGNUP ====================
+@ratelimit('signup', key='ip')
 def signup(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
@@ -365,6 +423,7 @@ def signup(request):
         form = SignUpForm()
     return render(request, 'blog/signup.html', {'form': form})
 
+@ratelimit('login', key='ip')
 def login_view(request):
     if request.method == 'POST':
         form = AuthenticationForm(request, data=request.POST)
@@ -386,6 +445,7 @@ def logout_view(request):
     return redirect('blog:login')
 
 @login_required
+@ratelimit('subscribe', key='user')
 def subscribe_author(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -402,6 +462,7 @@ def unsubscribe_author(request, username):
 
 
 @login_required
+@ratelimit('subscribe', key='user')
 def subscribe_tag(request, tag_name):
     Subscription.objects.get_or_create(user=request.user, tag=tag_name)
     messages.success(request, f"Te has suscrito al tema: {tag_name}")
@@ -413,42 +474,32 @@ def unsubscribe_tag(request, tag_name):
     messages.success(request, f"Te has dejado de suscribir al tema: {tag_name}")
     return redirect('blog:post_list')
 
-def feed_author(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author, published=True).order_by('-published_date')
-
-    feed = Rss201rev2Feed(
-        title=f"Posts de {author.username}",
-        link=f"/feed/author/{author.username}/",
-        description=f"Últimos posts publicados por {author.username}"
+def feed_posts(request, format='rss'):
+    return feeds.serve(
+        request, feeds.feed_posts(), format,
+        title="Últimos posts",
+        link=reverse('blog:post_list'),
+        description="Últimos posts publicados en el blog",
+        extra=[page_cache.ALL_POSTS],
     )
 
-    for post in posts:
-        feed.add_item(
-            title=post.title,
-            link=post.get_absolute_url(),
-            description=post.excerpt or post.content,
-            pubdate=post.published_date
-        )
-
-    return HttpResponse(feed.writeString('utf-8'), content_type='application/rss+xml')
 
+def feed_author(request, username, format='rss'):
+    author = get_object_or_404(User, username=username)
+    return feeds.serve(
+        request, feeds.feed_posts(author=author), format,
+        title=f"Posts de {author.username}",
+        link=reverse('blog:profile_user', args=[author.username]),
+        description=f"Últimos posts publicados por {author.username}",
+        authors=[author.pk],
+    )
 
-def feed_tag(request, tag):
-    posts = Post.objects.filter(tags__name__iexact=tag, published=True).order_by('-published_date')
 
-    feed = Rss201rev2Feed(
+def feed_tag(request, tag, format='rss'):
+    return feeds.serve(
+        request, feeds.feed_posts(tags__name__iexact=tag), format,
         title=f"Posts con etiqueta #{tag}",
-        link=f"/feed/tag/{tag}/",
-        description=f"Últimos posts publicados con la etiqueta #{tag}"
+        link=reverse('blog:post_list'),
+        description=f"Últimos posts publicados con la etiqueta #{tag}",
+        tag_names=[tag],
     )
-
-    for post in posts:
-        feed.add_item(
-            title=post.title,
-            link=post.get_absolute_url(),
-            description=post.excerpt or post.content,
-            pubdate=post.published_date
-        )
-
-    return HttpResponse(feed.writeString('utf-8'), content_type='application/rss+xml')
\ No newline at end of file
@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from myblog.handlers import BlogASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myblog.settings")
+# Servido con uvicorn/daphne (uvicorn myblog.asgi:application), cada petición
+# corre su código síncrono en un hilo propio: una conexión persistente se
+# quedaría abierta en un hilo que no vuelve a usarse.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+# las vistas async del blog solo se sirven aquí (ver myblog/handlers.py)
+application = BlogASGIHandler()
@@ -0,0 +1,406 @@
+"""Caché en dos niveles: LRU local por proceso delante de una caché compartida.
+
+``TieredCache`` es un backend de Django. Guarda cada valor en la caché
+compartida (``OPTIONS['SHARED']``: alias de Redis, Memcached, base de datos o
+fichero) y lo recuerda en memoria del proceso durante ``LOCAL_TIMEOUT``
+segundos, con un máximo de ``LOCAL_MAX_ENTRIES`` entradas (LRU). Así una clave
+muy leída no cruza la red en cada petición. A cambio, otro proceso puede ver
+un valor viejo durante ese tiempo. ``incr``/``decr``/``add`` siempre van a la
+compartida y olvidan la copia local, así que dentro del mismo proceso un
+contador nunca se lee desfasado.
+
+Además:
+
+* **claves versionadas por espacio de nombres**: el espacio es lo que va antes
+  del primer ``:`` de la clave (``fragment:body:1:3`` → ``fragment``).
+  ``bump_namespace('fragment')`` invalida todas sus claves de una vez.
+* **protección contra estampidas** en ``get_or_set``: cuando un valor caduca,
+  un solo proceso lo recalcula (cerrojo con ``add``) y los demás siguen
+  sirviendo el valor anterior hasta ``STALE_TIMEOUT`` segundos más. Si no hay
+  valor anterior, el resto espera hasta ``LOCK_WAIT`` segundos a que aparezca.
+* **estadísticas** de aciertos (local/compartido), fallos y valores viejos
+  servidos por espacio de nombres. Se acumulan en el proceso y se vuelcan a la
+  compartida cada ``STATS_INTERVAL`` segundos (comando ``cache_stats``).
+
+Los valores de la copia local no se copian: quien los lee no debe modificarlos.
+
+``CounterDatabaseCache`` es la caché de base de datos de Django con ``incr``
+atómico (la de Django lee y escribe sin cerrojo): la usan los contadores del
+límite de peticiones cuando no hay Redis.
+"""
+import base64
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, models, router, transaction
+from django.utils.timezone import now as tz_now
+
+from . import perf
+
+OUTCOMES = ('local', 'shared', 'miss', 'stale')
+
+_MISSING = object()
+
+
+class _Entry:
+    """Valor guardado por ``get_or_set``: sabe hasta cuándo está fresco."""
+    __slots__ = ('value', 'fresh_until')
+
+    def __init__(self, value, fresh_until):
+        self.value = value
+        self.fresh_until = fresh_until
+
+    def __getstate__(self):
+        return (self.value, self.fresh_until)
+
+    def __setstate__(self, state):
+        self.value, self.fresh_until = state
+
+
+def _unwrap(value):
+    return value.value if isinstance(value, _Entry) else value
+
+
+class LocalTier:
+    """LRU con caducidad, compartido por todos los hilos del proceso."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.flushed_at = time.monotonic()
+
+    def get(self, key, default=_MISSING):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        if timeout <= 0:
+            return self.delete(key)
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def count(self, namespace, outcome):
+        with self.lock:
+            self.stats[namespace, outcome] += 1
+
+    def take_stats(self, interval):
+        """Contadores acumulados si toca volcarlos (y los pone a cero)."""
+        with self.lock:
+            now = time.monotonic()
+            if not self.stats or now - self.flushed_at < interval:
+                return None
+            stats, self.stats, self.flushed_at = self.stats, Counter(), now
+            return stats
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def _local_tier(name, max_entries):
+    # Django crea una instancia del backend por hilo; la LRU es una por proceso
+    with _tiers_lock:
+        if name not in _tiers:
+            _tiers[name] = LocalTier(max_entries)
+        return _tiers[name]
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.name = location or self.key_prefix or 'tiered'
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.stale_timeout = options.get('STALE_TIMEOUT', 60)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self.lock_wait = options.get('LOCK_WAIT', 2)
+        self.stats_interval = options.get('STATS_INTERVAL', 10)
+        self.local = _local_tier(self.name, options.get('LOCAL_MAX_ENTRIES', 1000))
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    # ---------- claves ----------
+    @staticmethod
+    def namespace(key):
+        return str(key).split(':', 1)[0]
+
+    def _namespace_key(self, namespace):
+        return f'{self.name}:nsv:{namespace}'
+
+    def namespace_version(self, namespace):
+        ns_key = self._namespace_key(namespace)
+        version = self.local.get(ns_key)
+        if version is _MISSING:
+            self.shared.add(ns_key, 1, None)
+            version = self.shared.get(ns_key, 1)
+            self.local.set(ns_key, version, self.local_timeout)
+        return version
+
+    def bump_namespace(self, namespace):
+        """Invalida todas las claves del espacio ``namespace``."""
+        ns_key = self._namespace_key(namespace)
+        self.local.delete(ns_key)
+        try:
+            return self.shared.incr(ns_key)
+        except ValueError:
+            self.shared.add(ns_key, 2, None)
+            return 2
+
+    def make_key(self, key, version=None):
+        namespace = self.namespace(key)
+        key = f'{namespace}@{self.namespace_version(namespace)}:{key}'
+        return super().make_key(key, version)
+
+    def _local_timeout(self, timeout):
+        timeout = self._shared_timeout(timeout)
+        return self.local_timeout if timeout is None else min(self.local_timeout, timeout)
+
+    # ---------- estadísticas ----------
+    def _count(self, key, outcome):
+        if outcome != 'stale':  # el acierto ya se contó al leerlo
+            perf.count_cache(outcome != 'miss')
+        self.local.count(self.namespace(key), outcome)
+        stats = self.local.take_stats(self.stats_interval)
+        if stats:
+            self._flush(stats)
+
+    def _stats_key(self, namespace, outcome):
+        return f'{self.name}:stats:{namespace}:{outcome}'
+
+    def _flush(self, stats):
+        namespaces_key = f'{self.name}:stats-namespaces'
+        namespaces = set(self.shared.get(namespaces_key, ()))
+        for (namespace, outcome), total in stats.items():
+            namespaces.add(namespace)
+            key = self._stats_key(namespace, outcome)
+            if not self.shared.add(key, total, None):
+                try:
+                    self.shared.incr(key, total)
+                except ValueError:
+                    self.shared.set(key, total, None)
+        self.shared.set(namespaces_key, sorted(namespaces), None)
+
+    def flush_stats(self):
+        stats = self.local.take_stats(0)
+        if stats:
+            self._flush(stats)
+
+    def stats(self):
+        """{espacio: Counter(local=, shared=, miss=, stale=)} de todos los procesos."""
+        self.flush_stats()
+        namespaces = self.shared.get(f'{self.name}:stats-namespaces', ())
+        keys = {self._stats_key(ns, outcome): (ns, outcome) for ns in namespaces for outcome in OUTCOMES}
+        values = self.shared.get_many(list(keys))
+        result = {ns: Counter() for ns in namespaces}
+        for key, (namespace, outcome) in keys.items():
+            result[namespace][outcome] = values.get(key, 0)
+        return result
+
+    def reset_stats(self):
+        namespaces = self.shared.get(f'{self.name}:stats-namespaces', ())
+        self.local.take_stats(0)
+        self.shared.delete_many([self._stats_key(ns, outcome) for ns in namespaces for outcome in OUTCOMES])
+        self.shared.delete(f'{self.name}:stats-namespaces')
+
+    # ---------- API de caché ----------
+    def _get_raw(self, key, made_key):
+        value = self.local.get(made_key)
+        if value is not _MISSING:
+            self._count(key, 'local')
+            return value
+        value = self.shared.get(made_key, _MISSING)
+        if value is _MISSING:
+            self._count(key, 'miss')
+            return value
+        self._count(key, 'shared')
+        self.local.set(made_key, value, self.local_timeout)
+        return value
+
+    def get(self, key, default=None, version=None):
+        value = self._get_raw(key, self.make_key(key, version))
+        return default if value is _MISSING else _unwrap(value)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version): key for key in keys}
+        found, pending = {}, []
+        for made_key, key in made.items():
+            value = self.local.get(made_key)
+            if value is _MISSING:
+                pending.append(made_key)
+            else:
+                self._count(key, 'local')
+                found[key] = _unwrap(value)
+        shared = self.shared.get_many(pending) if pending else {}
+        for made_key in pending:
+            key = made[made_key]
+            if made_key in shared:
+                self._count(key, 'shared')
+                self.local.set(made_key, shared[made_key], self.local_timeout)
+                found[key] = _unwrap(shared[made_key])
+            else:
+                self._count(key, 'miss')
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version)
+        self.shared.set(made_key, value, self._shared_timeout(timeout))
+        self.local.set(made_key, value, self._local_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version)
+        self.local.delete(made_key)
+        return self.shared.add(made_key, value, self._shared_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version)
+        self.local.delete(made_key)
+        return self.shared.touch(made_key, self._shared_timeout(timeout))
+
+    def delete(self, key, version=None):
+        made_key = self.make_key(key, version)
+        self.local.delete(made_key)
+        return self.shared.delete(made_key)
+
+    def delete_many(self, keys, version=None):
+        made_keys = [self.make_key(key, version) for key in keys]
+        for made_key in made_keys:
+            self.local.delete(made_key)
+        self.shared.delete_many(made_keys)
+
+    def has_key(self, key, version=None):
+        return self._get_raw(key, self.make_key(key, version)) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self.make_key(key, version)
+        self.local.delete(made_key)
+        return self.shared.incr(made_key, delta)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def _shared_timeout(self, timeout):
+        # la compartida recibe segundos relativos (None = sin caducidad)
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    # ---------- anti-estampida ----------
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Como ``BaseCache.get_or_set`` pero un solo proceso recalcula el valor."""
+        made_key = self.make_key(key, version)
+        raw = self._get_raw(key, made_key)
+        now = time.time()
+        if raw is not _MISSING and (not isinstance(raw, _Entry) or raw.fresh_until > now):
+            return _unwrap(raw)
+
+        lock_key = f'{made_key}:lock'
+        if not self.shared.add(lock_key, 1, self.lock_timeout):
+            if raw is not _MISSING:
+                self._count(key, 'stale')
+                return raw.value  # otro proceso lo está recalculando
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self.shared.get(made_key, _MISSING)
+                if value is not _MISSING:
+                    return _unwrap(value)
+            # el que tenía el cerrojo tarda demasiado: se calcula aquí sin guardarlo
+            return default() if callable(default) else default
+        try:
+            value = default() if callable(default) else default
+            if value is not None:
+                self._store(made_key, value, timeout)
+            return value
+        finally:
+            self.shared.delete(lock_key)
+
+    def _store(self, made_key, value, timeout):
+        timeout = self._shared_timeout(timeout)
+        if timeout is None:
+            self.shared.set(made_key, value, None)
+            self.local.set(made_key, value, self.local_timeout)
+            return
+        entry = _Entry(value, time.time() + timeout)
+        self.shared.set(made_key, entry, timeout + self.stale_timeout)
+        self.local.set(made_key, entry, min(self.local_timeout, timeout))
+
+
+class CounterDatabaseCache(DatabaseCache):
+    """``DatabaseCache`` con ``incr``/``decr`` atómicos y que conservan la caducidad.
+
+    El ``incr`` de Django hace ``get`` + ``set``: dos procesos pueden leer el
+    mismo valor y perder uno de los incrementos. Aquí la fila se bloquea antes
+    de leerla (en SQLite, la base entera) y se reescribe en la misma
+    transacción. La tabla la crea ``createcachetable`` (en post_migrate).
+    """
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table, cache_key = quote_name(self._table), quote_name('cache_key')
+        value_column, expires_column = quote_name('value'), quote_name('expires')
+
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            # escribir antes de leer toma el cerrojo de escritura
+            cursor.execute(
+                f'UPDATE {table} SET {expires_column} = {expires_column} WHERE {cache_key} = %s', [key],
+            )
+            cursor.execute(f'SELECT {value_column}, {expires_column} FROM {table} WHERE {cache_key} = %s', [key])
+            row = cursor.fetchone()
+            if row is not None:
+                value, expires = row
+                expression = models.Expression(output_field=models.DateTimeField())
+                for converter in connection.ops.get_db_converters(expression) + expression.get_db_converters(connection):
+                    expires = converter(expires, expression, connection)
+            if row is None or expires < tz_now():
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(base64.b64decode(connection.ops.process_clob(value).encode())) + delta
+            cursor.execute(
+                f'UPDATE {table} SET {value_column} = %s WHERE {cache_key} = %s',
+                [base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1'), key],
+            )
+        return value
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr)(key, delta, version)
@@ -0,0 +1,16 @@
+from django.core.handlers.asgi import ASGIHandler
+
+
+class BlogASGIHandler(ASGIHandler):
+    """``ASGIHandler`` que enruta con ``myblog/urls_async.py``.
+
+    Solo bajo ASGI se sirven las vistas async (blog/async_views.py); bajo
+    WSGI siguen las síncronas de ``ROOT_URLCONF``, sin pasos entre hilos.
+    """
+    urlconf = "myblog.urls_async"
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
@@ -0,0 +1,337 @@
+"""Medición por petición: tiempo total, consultas SQL, caché y plantillas.
+
+``measure(name)`` es un gestor de contexto que acumula, mientras está abierto
+y en el contexto actual:
+
+* tiempo de reloj;
+* número de consultas y tiempo en la base de datos (un ``execute_wrapper``
+  en cada conexión que suma a las mediciones abiertas en el contexto; así
+  cuentan también las consultas de las vistas async, que se ejecutan en
+  otro hilo con otra conexión);
+* aciertos y fallos de caché (los cuenta ``myblog.cache.TieredCache``);
+* tiempo de render de plantillas (backend ``myblog.perf.DjangoTemplates``).
+
+``PerformanceMiddleware`` lo abre en cada petición con el nombre de la URL
+resuelta (``blog:post_detail``), añade la cabecera ``Server-Timing`` (solo con
+``DEBUG``, a los usuarios staff o con ``BLOG_PERF_SERVER_TIMING``: cuenta
+cuánto tarda cada parte a quien la lea), escribe
+una línea JSON en el logger ``myblog.perf`` y guarda la muestra en una ventana
+móvil por vista en la caché ``BLOG_PERF_CACHE``, común a todos los procesos
+(comando ``perf_report``).
+
+``BLOG_QUERY_BUDGETS`` fija el máximo de consultas por vista. Pasarse escribe
+un aviso en el log; con ``BLOG_QUERY_BUDGET_STRICT`` (los tests) lanza
+``QueryBudgetExceeded``.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+from django.urls import Resolver404, resolve
+from django.utils.functional import empty
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('perf_measurement', default=None)
+
+# Campos de cada muestra guardada en la ventana (tiempos en ms)
+SAMPLE_FIELDS = ('total_ms', 'queries', 'db_ms', 'template_ms', 'cache_hits', 'cache_misses')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class Measurement:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.duration = 0.0
+        self._rendering = False
+
+    def sample(self):
+        return (
+            round(self.duration * 1000, 2), self.queries, round(self.db_time * 1000, 2),
+            round(self.template_time * 1000, 2), self.cache_hits, self.cache_misses,
+        )
+
+    def as_dict(self):
+        return {'view': self.name, **dict(zip(SAMPLE_FIELDS, self.sample()))}
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} consultas"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} aciertos, {self.cache_misses} fallos"',
+            f'total;dur={self.duration * 1000:.1f}',
+        ])
+
+
+def _execute(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        # un bloque dentro de otro cuenta en los dos
+        while measurement is not None:
+            measurement.db_time += elapsed
+            measurement.queries += 1
+            measurement = measurement.parent
+
+
+def _install(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def _install_all(**kwargs):
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+# Las conexiones son por hilo: cada una lleva el wrapper desde que se abre, y
+# request_started (que ASGI envía desde el hilo donde correrá el ORM de la
+# petición) lo pone en las que ya estaban abiertas.
+connection_created.connect(_install)
+request_started.connect(_install_all)
+
+
+@contextmanager
+def measure(name):
+    """Mide lo que se ejecuta dentro del bloque (también fuera de peticiones)."""
+    _install_all()
+    measurement = Measurement(name, _current.get())
+    token = _current.set(measurement)
+    started = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        measurement.duration = time.perf_counter() - started
+        _current.reset(token)
+
+
+def count_cache(hit):
+    """Lo llaman los backends de caché en cada lectura."""
+    measurement = _current.get()
+    if measurement is not None:
+        if hit:
+            measurement.cache_hits += 1
+        else:
+            measurement.cache_misses += 1
+
+
+# ==================== PLANTILLAS ====================
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        measurement = _current.get()
+        # solo la plantilla exterior: un render_to_string dentro de un tag ya está contado
+        if measurement is None or measurement._rendering:
+            return super().render(context, request)
+        measurement._rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            measurement.template_time += time.perf_counter() - started
+            measurement._rendering = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """El backend de Django con las plantillas cronometradas."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+# ==================== PRESUPUESTOS ====================
+def check_budget(measurement):
+    budget = getattr(settings, 'BLOG_QUERY_BUDGETS', {}).get(measurement.name)
+    if budget is None or measurement.queries <= budget:
+        return
+    message = f'{measurement.name}: {measurement.queries} consultas (presupuesto {budget})'
+    if getattr(settings, 'BLOG_QUERY_BUDGET_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(json.dumps({'event': 'query_budget', 'budget': budget, **measurement.as_dict()}))
+
+
+# ==================== VENTANA MÓVIL ====================
+class Window:
+    """Últimas ``BLOG_PERF_WINDOW`` muestras por vista en la caché compartida.
+
+    Cada proceso acumula sus muestras y las añade cada ``BLOG_PERF_FLUSH_INTERVAL``
+    segundos (lectura + escritura de una lista: si dos procesos vuelcan a la
+    vez puede perderse algún lote, que para percentiles da igual).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(list)
+        self.flushed_at = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'BLOG_PERF_CACHE', 'default')]
+
+    @staticmethod
+    def _key(name):
+        return f'perf:window:{name}'
+
+    def add(self, name, sample):
+        interval = getattr(settings, 'BLOG_PERF_FLUSH_INTERVAL', 10)
+        with self.lock:
+            self.pending[name].append(sample)
+            now = time.monotonic()
+            if now - self.flushed_at < interval:
+                return
+            pending, self.pending, self.flushed_at = self.pending, defaultdict(list), now
+        self._flush(pending)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(list)
+        if pending:
+            self._flush(pending)
+
+    def _flush(self, pending):
+        size = getattr(settings, 'BLOG_PERF_WINDOW', 1000)
+        cache = self.cache
+        for name, samples in pending.items():
+            window = (cache.get(self._key(name)) or []) + samples
+            cache.set(self._key(name), window[-size:], None)
+        names = set(cache.get('perf:views', ()))
+        if not names.issuperset(pending):
+            cache.set('perf:views', sorted(names | set(pending)), None)
+
+    def samples(self):
+        """{vista: [muestra, ...]} de todos los procesos."""
+        self.flush()
+        names = self.cache.get('perf:views', ())
+        windows = self.cache.get_many([self._key(name) for name in names])
+        return {name: windows.get(self._key(name), []) for name in names}
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+        names = self.cache.get('perf:views', ())
+        self.cache.delete_many([self._key(name) for name in names] + ['perf:views'])
+
+
+window = Window()
+# lo pendiente de procesos que terminan antes del siguiente volcado
+atexit.register(window.flush)
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summary(samples):
+    """Resumen de una ventana: recuento, percentiles de tiempo y consultas, acierto de caché."""
+    columns = {field: sorted(sample[i] for sample in samples) for i, field in enumerate(SAMPLE_FIELDS)}
+    hits, misses = sum(columns['cache_hits']), sum(columns['cache_misses'])
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(columns['total_ms'], 50),
+        'p95_ms': percentile(columns['total_ms'], 95),
+        'p99_ms': percentile(columns['total_ms'], 99),
+        'db_p95_ms': percentile(columns['db_ms'], 95),
+        'template_p95_ms': percentile(columns['template_ms'], 95),
+        'queries_p50': percentile(columns['queries'], 50),
+        'queries_max': columns['queries'][-1] if samples else None,
+        'cache_hit_rate': hits / (hits + misses) if hits + misses else None,
+    }
+
+
+# ==================== MIDDLEWARE ====================
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # respuestas que no llegan a la vista (caché de páginas, redirecciones)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unresolved'
+    return match.view_name
+
+
+def _sends_server_timing(request):
+    if settings.DEBUG or getattr(settings, 'BLOG_PERF_SERVER_TIMING', False):
+        return True
+    # solo si la petición ya cargó el usuario: aquí no se consulta la sesión
+    user = getattr(request, 'user', None)
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return False
+    return user.is_staff
+
+
+class PerformanceMiddleware:
+    """Mide cada petición; va el primero para incluir al resto de middlewares.
+
+    Funciona en WSGI y en ASGI; en ASGI el registro de la muestra (log, volcado
+    de la ventana a la caché) se hace en un hilo para no bloquear el bucle.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'BLOG_PERF', True):
+            return self.get_response(request)
+        with measure(None) as measurement:
+            response = self.get_response(request)
+        self._record(request, response, measurement)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'BLOG_PERF', True):
+            return await self.get_response(request)
+        with measure(None) as measurement:
+            response = await self.get_response(request)
+        await sync_to_async(self._record, thread_sensitive=False)(request, response, measurement)
+        return response
+
+    def _record(self, request, response, measurement):
+        measurement.name = _view_name(request)
+        if _sends_server_timing(request):
+            response['Server-Timing'] = measurement.server_timing()
+        logger.info(json.dumps({
+            'event': 'request', 'method': request.method, 'path': request.path,
+            'status': response.status_code, **measurement.as_dict(),
+        }))
+        window.add(measurement.name, measurement.sample())
+        check_budget(measurement)
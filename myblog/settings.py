@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 from django.urls import path, include
 
@@ -26,6 +28,9 @@ SECRET_KEY = "django-insecure-vq#w9&e%8+un4eobbtt*r@+4=2_!omx_(gd@(+6ymqe@gs#@3@
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# True cuando se ejecuta `manage.py test`
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = []
 
 
@@ -44,7 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # el primero: mide la petición entera (myblog/perf.py)
+    "myblog.perf.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # antes de sesiones/mensajes: solo sirve a visitantes anónimos sin cookies
+    "blog.page_cache.AnonymousPageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,7 +66,8 @@ ROOT_URLCONF = "myblog.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # el de Django, con el tiempo de render en las mediciones de myblog/perf.py
+        "BACKEND": "myblog.perf.DjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -66,6 +76,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "blog.context_processors.unread_notifications",
             ],
         },
     },
@@ -77,12 +88,69 @@ WSGI_APPLICATION = "myblog.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+# Perfil según el entorno: BLOG_DB_ENGINE=postgres usa PostgreSQL (POSTGRES_*);
+# si no, SQLite con el perfil BLOG_SQLITE_PROFILE de SQLITE_PROFILES.
+# Las conexiones se reutilizan DB_CONN_MAX_AGE segundos (con comprobación previa).
+DB_ENGINE = os.environ.get('BLOG_DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# "default" deja SQLite como viene de fábrica, para poder comparar.
+# Los PRAGMA se aplican a cada conexión nueva (myblog/sqlite3/base.py).
+SQLITE_PROFILES = {
+    'default': {
+        'transaction_mode': 'DEFERRED',
+        'pragmas': {
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'cache_size': -2000,
+            'mmap_size': 0,
+        },
+    },
+    'tuned': {
+        # el cerrojo de escritura se pide al empezar atomic(): sin fallos al "subirlo"
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {
+            # lectores y un escritor a la vez; fsync solo en los checkpoints
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            # esperar al cerrojo en lugar de fallar con "database is locked"
+            'busy_timeout': 20000,
+            'cache_size': -64000,  # KiB
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    },
 }
+BLOG_SQLITE_PROFILE = os.environ.get('BLOG_SQLITE_PROFILE', 'tuned')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get('POSTGRES_DB', 'myblog'),
+            "USER": os.environ.get('POSTGRES_USER', 'myblog'),
+            "PASSWORD": os.environ.get('POSTGRES_PASSWORD', ''),
+            "HOST": os.environ.get('POSTGRES_HOST', 'localhost'),
+            "PORT": os.environ.get('POSTGRES_PORT', '5432'),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            # sqlite3 de Django con transaction_mode y pragmas (myblog/sqlite3/base.py)
+            "ENGINE": "myblog.sqlite3",
+            "NAME": os.environ.get('SQLITE_PATH', BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "transaction_mode": SQLITE_PROFILES[BLOG_SQLITE_PROFILE]['transaction_mode'],
+                "pragmas": SQLITE_PROFILES[BLOG_SQLITE_PROFILE]['pragmas'],
+            },
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
 
 
 # Password validation
@@ -151,3 +219,121 @@ CKEDITOR_5_CONFIGS = {
     }
 }
 
+# Cachés (myblog/cache.py). "shared" es la caché común a todos los procesos:
+# Redis si hay REDIS_URL, ficheros en local. Las funciones del blog usan sus
+# propios alias, con una LRU en memoria del proceso delante de "shared".
+# "ratelimit" y "counters" (contador de notificaciones no leídas) van directos a
+# la compartida: sus contadores no admiten retraso. Sin Redis usan la base de
+# datos, no los ficheros: necesitan un incr atómico.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+    COUNTER_CACHE = SHARED_CACHE
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('BLOG_CACHE_DIR', BASE_DIR / '.cache'),
+    }
+    # tabla creada por createcachetable (post_migrate del blog)
+    COUNTER_CACHE = {'BACKEND': 'myblog.cache.CounterDatabaseCache', 'LOCATION': 'blog_counter_cache'}
+
+
+def _tiered_cache(name, **options):
+    return {
+        'BACKEND': 'myblog.cache.TieredCache',
+        'LOCATION': name,
+        'KEY_PREFIX': name,
+        'OPTIONS': {'SHARED': 'shared', **options},
+    }
+
+
+CACHES = {
+    'shared': SHARED_CACHE,
+    'default': _tiered_cache('default'),
+    'pages': _tiered_cache('pages', LOCAL_TIMEOUT=2),
+    'fragments': _tiered_cache('fragments', LOCAL_MAX_ENTRIES=5000),
+    'feeds': _tiered_cache('feeds'),
+    'ratelimit': {**COUNTER_CACHE, 'KEY_PREFIX': 'ratelimit'},
+    'counters': {**COUNTER_CACHE, 'KEY_PREFIX': 'counters'},
+    'perf': {**SHARED_CACHE, 'KEY_PREFIX': 'perf'},
+}
+if TESTING:
+    # una sola LocMemCache para todos los alias: cache.clear() lo limpia todo
+    CACHES = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'blog-tests'}
+        for alias in CACHES
+    }
+
+# Caché de páginas para anónimos (blog/page_cache.py); apagada en los tests
+BLOG_PAGE_CACHE = not TESTING
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Cola de tareas en proceso (blog/tasks.py): hilos en servidor, síncrona en tests
+BLOG_TASKS_BACKEND = 'sync' if TESTING else 'thread'
+BLOG_TASKS_WORKERS = 4
+
+# Límites por vista (blog/ratelimit.py): "peticiones/periodo"; None los desactiva.
+# La caché tiene que ser compartida entre procesos para que el límite sea global.
+# Apagados en los tests (los que los prueban los activan con override_settings).
+BLOG_RATELIMIT_CACHE = 'ratelimit'
+BLOG_RATELIMITS = {} if TESTING else {
+    'toggle_reaction': '20/m',
+    'toggle_vote': '30/m',
+    'add_comment': '5/m',
+    'add_review': '5/m',
+    'subscribe': '20/m',
+    'login': '10/5m',
+    'signup': '5/h',
+}
+
+# Medición por petición (myblog/perf.py): cabecera Server-Timing, una línea JSON
+# por petición en el logger myblog.perf y percentiles por vista (perf_report)
+BLOG_PERF = True
+# Server-Timing para todos (con DEBUG y a los staff se envía siempre)
+BLOG_PERF_SERVER_TIMING = False
+BLOG_PERF_CACHE = 'perf'
+BLOG_PERF_WINDOW = 1000  # muestras por vista
+BLOG_PERF_FLUSH_INTERVAL = 0 if TESTING else 10
+
+# Máximo de consultas SQL por vista (nombre de la URL). Pasarse es un aviso en el
+# log; en los tests, un error.
+BLOG_QUERY_BUDGET_STRICT = TESTING
+# Las POST cuentan también las tareas de blog/tasks.py, que en los tests son síncronas.
+BLOG_QUERY_BUDGETS = {
+    'blog:post_list': 8,
+    'blog:post_detail': 10,
+    'blog:posts_by_tag': 8,
+    'blog:search_posts': 8,
+    'blog:top_rated': 8,
+    'blog:trending': 8,
+    'blog:timeline': 10,
+    'blog:profile': 8,
+    'blog:notification_list': 6,
+    'blog:feed_posts': 3,
+    'blog:feed_author': 3,
+    'blog:feed_tag': 3,
+    # bajo ASGI (blog/async_views.py) aupdate_or_create vuelve a leer la fila
+    # dentro de su transacción
+    'blog:toggle_reaction': 18,
+    'blog:vote_comment': 16,
+    'blog:add_comment': 12,
+    'blog:subscribe': 8,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'perf': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'myblog.perf': {
+            'handlers': ['perf'],
+            'level': os.environ.get('BLOG_PERF_LOG_LEVEL', 'WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
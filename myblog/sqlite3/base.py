@@ -0,0 +1,47 @@
+"""Backend SQLite con ``OPTIONS['transaction_mode']`` (lo trae Django 5.1) y ``OPTIONS['pragmas']``.
+
+Con transacciones ``DEFERRED`` (las de Django 4.2) una transacción que lee y
+luego escribe tiene que subir su cerrojo; si otra conexión está escribiendo,
+SQLite falla en el acto con "database is locked" sin esperar a
+``busy_timeout``. Con ``IMMEDIATE`` el cerrojo de escritura se pide al entrar
+en ``atomic()`` y las conexiones hacen cola respetando ``busy_timeout``.
+
+``pragmas`` (``{'journal_mode': 'WAL', 'busy_timeout': 20000, ...}``) se
+aplican a cada conexión nueva antes de usarla. PRAGMA no admite parámetros,
+así que nombres y valores se validan al leer la configuración: solo
+identificadores y enteros.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+_NAME_RE = re.compile(r'^[a-z_]+$')
+_WORD_RE = re.compile(r'^[A-Za-z_]+$')
+
+
+def _pragma(name, value):
+    if not _NAME_RE.match(str(name)):
+        raise ImproperlyConfigured(f'PRAGMA no válido: {name!r}')
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f'PRAGMA {name} = {int(value)}'
+    if isinstance(value, str) and _WORD_RE.match(value):
+        return f'PRAGMA {name} = {value}'
+    raise ImproperlyConfigured(f'Valor no válido para PRAGMA {name}: {value!r}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.transaction_mode = (params.pop('transaction_mode', None) or 'DEFERRED').upper()
+        self.pragmas = [_pragma(name, value) for name, value in (params.pop('pragmas', None) or {}).items()]
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.pragmas:
+            conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
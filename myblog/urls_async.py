@@ -0,0 +1,10 @@
+"""URLconf de ``myblog/asgi.py``: la de ``urls.py`` con las vistas async del blog."""
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path('', include('blog.urls_async', namespace='blog'))
+    if getattr(pattern, 'namespace', None) == 'blog' else pattern
+    for pattern in urls.urlpatterns
+]